@@ -0,0 +1,99 @@
+"""
+Archivos estáticos con fingerprint: URLs con hash de contenido, caché inmutable y variantes precomprimidas
+"""
+import os
+import re
+import hashlib
+import mimetypes
+from fastapi import Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from compression import CompressedBody
+from pages import compressed_response
+
+# Se puede desactivar en desarrollo para editar CSS/JS sin reiniciar
+ASSET_FINGERPRINT = os.getenv("ASSET_FINGERPRINT", "true").lower() in ("1", "true", "yes")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Tipos que se precomprimen al iniciar; las imágenes ya vienen comprimidas
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+# Las subidas de usuarios no forman parte del build
+EXCLUDED_DIRS = {"uploads"}
+
+# href="static/..." o src="/static/..." dentro de los HTML
+STATIC_REFERENCE_PATTERN = re.compile(r'''(\b(?:href|src)=["'])/?static/([^"'?#]+)''')
+
+class StaticAsset:
+    """Un archivo de /static con su nombre fingerprint y, si es texto, su cuerpo precomprimido"""
+
+    def __init__(self, logical_path: str, hashed_path: str, file_path: str, body: CompressedBody = None):
+        self.logical_path = logical_path
+        self.hashed_path = hashed_path
+        self.file_path = file_path
+        self.media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        # Starlette agrega el charset solo a los text/*
+        if self.media_type == "application/javascript":
+            self.media_type += "; charset=utf-8"
+        self.body = body
+
+class AssetManifest:
+    """Mapa ruta lógica -> ruta con hash de contenido, armado una vez al iniciar"""
+
+    def __init__(self, static_dir: str, url_prefix: str = "/static"):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self._by_logical = {}
+        self._by_hashed = {}
+
+    def build(self):
+        if not os.path.isdir(self.static_dir):
+            return self
+        for root, dirs, files in os.walk(self.static_dir):
+            dirs[:] = [name for name in dirs if name not in EXCLUDED_DIRS]
+            for filename in files:
+                file_path = os.path.join(root, filename)
+                logical_path = os.path.relpath(file_path, self.static_dir).replace(os.sep, "/")
+                with open(file_path, "rb") as f:
+                    content = f.read()
+                digest = hashlib.sha256(content).hexdigest()[:12]
+                stem, extension = os.path.splitext(logical_path)
+                hashed_path = f"{stem}.{digest}{extension}"
+                body = CompressedBody(content) if extension.lower() in COMPRESSIBLE_EXTENSIONS else None
+                asset = StaticAsset(logical_path, hashed_path, file_path, body)
+                self._by_logical[logical_path] = asset
+                self._by_hashed[hashed_path] = asset
+        print(f"📦 {len(self._by_logical)} archivos estáticos con fingerprint")
+        return self
+
+    def get(self, hashed_path: str):
+        return self._by_hashed.get(hashed_path)
+
+    def rewrite_html(self, html: str) -> str:
+        """Reemplazar las referencias a /static en un HTML por sus URLs con fingerprint"""
+        def replace(match):
+            asset = self._by_logical.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}{self.url_prefix}/{asset.hashed_path}"
+        return STATIC_REFERENCE_PATTERN.sub(replace, html)
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles que sirve las URLs con fingerprint desde memoria con caché de un año.
+
+    Las rutas sin hash (uploads, referencias armadas desde JS) siguen sirviéndose
+    como antes desde disco.
+    """
+
+    def __init__(self, *args, manifest: AssetManifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope):
+        asset = self.manifest.get(path.replace(os.sep, "/"))
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        if asset.body is not None:
+            return compressed_response(Request(scope), asset.body, asset.media_type, cache_control=IMMUTABLE_CACHE_CONTROL)
+        return FileResponse(asset.file_path, media_type=asset.media_type, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
@@ -0,0 +1,85 @@
+"""
+Sincronización en lote de los sub-recursos de un paquete (hoteles, features e info)
+
+El admin manda la lista completa deseada; se compara con las filas guardadas y se
+aplican altas, cambios, bajas y el nuevo orden en una sola transacción, en lugar de
+un request (y un commit) por ítem.
+"""
+from sqlalchemy import select, delete
+
+class SyncError(ValueError):
+    """La lista enviada no es válida para el paquete (ids ajenos o repetidos)"""
+
+async def sync_package_items(db, model, package_id, items, match_on=None):
+    """
+    Dejar las filas de model del paquete iguales a items (lista de dicts, en orden).
+
+    - Ítems con id: se actualizan solo los campos que cambiaron.
+    - Ítems sin id: se crean; con match_on se reutiliza primero una fila existente
+      (no reclamada por otro ítem) con el mismo valor en ese campo, así un texto que
+      no cambió conserva su id.
+    - Filas que no aparecen en items: se borran con un único DELETE.
+    - order_index pasa a ser la posición en la lista (desde 1).
+
+    No hace flush ni commit (los cambios quedan pendientes en la sesión).
+    Devuelve (filas finales en orden, filas borradas).
+    """
+    existing = {
+        row.id: row
+        for row in (await db.scalars(select(model).where(model.package_id == package_id))).all()
+    }
+
+    requested_ids = [item["id"] for item in items if item.get("id") is not None]
+    if len(requested_ids) != len(set(requested_ids)):
+        raise SyncError("La lista tiene ids repetidos")
+    unknown = [item_id for item_id in requested_ids if item_id not in existing]
+    if unknown:
+        raise SyncError(f"Los ids {unknown} no pertenecen al paquete")
+
+    unclaimed = {}
+    if match_on:
+        for row in existing.values():
+            if row.id not in requested_ids:
+                unclaimed.setdefault(getattr(row, match_on), []).append(row)
+
+    # Primero decidir qué fila corresponde a cada ítem (None: fila nueva)
+    targets = []
+    for item in items:
+        row = existing.get(item.get("id"))
+        if row is None and match_on and unclaimed.get(item.get(match_on)):
+            row = unclaimed[item[match_on]].pop(0)
+        targets.append(row)
+
+    kept_ids = {row.id for row in targets if row is not None}
+    removed = [row for row_id, row in existing.items() if row_id not in kept_ids]
+    if removed:
+        await db.execute(
+            delete(model).where(model.id.in_([row.id for row in removed])),
+            execution_options={"synchronize_session": False}
+        )
+        for row in removed:
+            db.expunge(row)
+
+    rows = []
+    for position, (item, row) in enumerate(zip(items, targets), start=1):
+        values = {field: value for field, value in item.items() if field != "id"}
+        values["order_index"] = position
+        if row is None:
+            row = model(package_id=package_id)
+            db.add(row)
+
+        # Asignar solo lo que cambió: las filas intactas no generan UPDATE
+        for field, value in values.items():
+            if getattr(row, field) != value:
+                setattr(row, field, value)
+        rows.append(row)
+
+    return rows, removed
+
+async def load_package_items(db, model, package_id, *order_by):
+    """Releer las filas del paquete después del commit (trae created_at/updated_at de la base)"""
+    return (await db.scalars(
+        select(model).where(model.package_id == package_id)
+        .order_by(*(order_by or (model.order_index, model.id)))
+        .execution_options(populate_existing=True)
+    )).all()
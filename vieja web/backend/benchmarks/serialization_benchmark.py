@@ -0,0 +1,112 @@
+"""
+Micro-benchmark de serialización de listados de paquetes (CPU por request, sin base de datos)
+
+Compara el camino anterior (to_dict con json.loads por fila + jsonable_encoder + json de la
+librería estándar, lo que hace FastAPI con un dict) con el actual (columnas JSON ya
+normalizadas al cargar + serialization.dumps con orjson).
+
+    python benchmarks/serialization_benchmark.py
+
+Opciones por variables de entorno:
+    BENCH_PACKAGES  paquetes por respuesta (default 100)
+    BENCH_REPEAT    requests simulados (default 300)
+"""
+import os
+import sys
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder
+from models import Package
+from catalog import CARD_FIELDS
+from serialization import dumps, ORJSON_AVAILABLE
+
+BENCH_PACKAGES = int(os.getenv("BENCH_PACKAGES", "100"))
+BENCH_REPEAT = int(os.getenv("BENCH_REPEAT", "300"))
+
+def synthetic_row(index):
+    itinerary = [{"title": f"Día {day}", "description": "Recorrido por la ciudad con guía especializado. " * 3} for day in range(1, 8)]
+    return {
+        "id": index,
+        "title": f"Paquete {index}",
+        "description": "Descubrí la región con vuelos, hotel y excursiones incluidas. " * 6,
+        "price": "USD 1.250",
+        "price_amount": Decimal("1250.00"),
+        "price_currency": "USD",
+        "price_tag": "DESDE",
+        "image": f"https://res.cloudinary.com/demo/image/upload/v1/arman-travel/{index}.jpg",
+        "category": "internacional",
+        "features": ["Vuelos incluidos", "Hotel 4 estrellas", "Traslados", "Desayuno buffet"],
+        "duration": "7 días / 6 noches",
+        "destination": "Miami, USA",
+        "ideal_for": "Familias y parejas",
+        "gallery_images": [f"https://res.cloudinary.com/demo/image/upload/v1/g/{index}-{n}.jpg" for n in range(4)],
+        "itinerary": itinerary,
+        "promoted": False,
+        "carousel_order": 0,
+        "created_at": datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc),
+        "updated_at": datetime(2025, 3, 2, 9, 15, tzinfo=timezone.utc)
+    }
+
+def legacy_to_dict(row):
+    """to_dict anterior: las columnas JSON podían venir como texto y se decodificaban en cada llamada"""
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "price": row["price"],
+        "price_amount": float(row["price_amount"]),
+        "price_currency": row["price_currency"],
+        "price_tag": row["price_tag"] or "DESDE",
+        "image": row["image"],
+        "category": row["category"],
+        "features": row["features"] if isinstance(row["features"], list) else json.loads(row["features"]) if row["features"] else [],
+        "duration": row["duration"],
+        "destination": row["destination"],
+        "ideal_for": row["ideal_for"],
+        "gallery_images": row["gallery_images"] if isinstance(row["gallery_images"], list) else json.loads(row["gallery_images"]) if row["gallery_images"] else [],
+        "itinerary": row["itinerary"] if isinstance(row["itinerary"], list) else json.loads(row["itinerary"]) if row["itinerary"] else [],
+        "promoted": row["promoted"],
+        "carousel_order": row["carousel_order"],
+        "created_at": row["created_at"].isoformat(),
+        "updated_at": row["updated_at"].isoformat()
+    }
+
+def measure(label, render):
+    render()  # calentar
+    started = time.process_time()
+    for _ in range(BENCH_REPEAT):
+        body = render()
+    per_request = (time.process_time() - started) / BENCH_REPEAT * 1000
+    print(f"{label:<52}{per_request:>9.3f} ms CPU/request{len(body):>10} bytes")
+    return per_request
+
+if __name__ == "__main__":
+    rows = [synthetic_row(index) for index in range(BENCH_PACKAGES)]
+    # Filas viejas: JSON guardado como texto en la columna
+    legacy_rows = [
+        {**row, **{key: json.dumps(row[key]) for key in ("features", "gallery_images", "itinerary")}}
+        for row in rows
+    ]
+    # Filas actuales: JSONList ya entregó listas al cargar
+    packages = [Package(**row) for row in rows]
+
+    print(f"🧪 {BENCH_PACKAGES} paquetes por respuesta, {BENCH_REPEAT} requests (orjson: {'sí' if ORJSON_AVAILABLE else 'no'})\n")
+    before = measure(
+        "antes: to_dict + jsonable_encoder + json",
+        lambda: json.dumps(jsonable_encoder([legacy_to_dict(row) for row in legacy_rows]), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    )
+    after = measure(
+        "ahora: to_dict + serialization.dumps",
+        lambda: dumps([package.to_dict() for package in packages])
+    )
+    cards = measure(
+        "ahora, proyección card: to_dict(fields) + dumps",
+        lambda: dumps([package.to_dict(CARD_FIELDS) for package in packages])
+    )
+    print(f"\nMejora: x{before / after:.1f} (listado completo), x{before / cards:.1f} (tarjetas)")
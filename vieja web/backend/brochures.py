@@ -0,0 +1,242 @@
+"""
+Folletos PDF de archivos/: registro de rutas resuelto al iniciar y descarga con Range, ETag y sendfile
+"""
+import os
+import re
+import time
+import threading
+import anyio
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request
+from starlette.responses import Response
+
+BROCHURE_CACHE_CONTROL = os.getenv("BROCHURE_CACHE_CONTROL", "public, max-age=3600")
+BROCHURE_RESCAN_INTERVAL = float(os.getenv("BROCHURE_RESCAN_INTERVAL", "10"))  # segundos entre re-escaneos al pedir un folleto desconocido
+CHUNK_SIZE = 64 * 1024
+
+# Mismos lugares donde se buscaban los PDF antes (Docker y desarrollo local)
+BROCHURE_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "archivos"),
+    os.path.join("..", "archivos"),
+    "archivos",
+]
+
+# Folletos que tenían ruta fija: su página de visor se sirve aunque el PDF no esté
+VIEWER_SLUGS = ("f1", "mundial")
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def brochure_slugs(filename: str) -> list:
+    """
+    Slugs de un folleto a partir del nombre de archivo.
+
+    BROCHURE-F1-SAO-PAULO-ARMAN-TRAVEL.pdf -> ["f1-sao-paulo", "f1"]
+    BROCHURE-MUNDIAL-ARMAN-TRAVEL.pdf      -> ["mundial"]
+    """
+    name = os.path.splitext(filename)[0].lower()
+    name = re.sub(r"^brochure[-_ ]+", "", name)
+    name = re.sub(r"[-_ ]+arman[-_ ]+travel$", "", name)
+    slug = re.sub(r"[^a-z0-9]+", "-", name).strip("-")
+    if not slug:
+        return []
+    short = slug.split("-")[0]
+    return [slug] if short == slug else [slug, short]
+
+def brochure_title(slug: str) -> str:
+    return "Paquete " + " ".join(part.capitalize() if len(part) > 2 else part.upper() for part in slug.split("-"))
+
+class Brochure:
+    """
+    Un PDF con los metadatos de la versión que hay en disco al crearlo (os.stat).
+
+    Se crea uno por request: si el archivo se reemplaza, Content-Length, ETag y Range
+    corresponden al archivo nuevo.
+    """
+
+    def __init__(self, slug: str, path: str):
+        self.slug = slug
+        self.path = os.path.abspath(path)
+        self.filename = os.path.basename(path)
+        stat_result = os.stat(self.path)
+        self.size = stat_result.st_size
+        self.mtime = stat_result.st_mtime
+        self.etag = f'"{int(stat_result.st_mtime_ns):x}-{stat_result.st_size:x}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+    @property
+    def title(self) -> str:
+        return brochure_title(self.slug)
+
+class BrochureRegistry:
+    """
+    Ruta de cada folleto por slug; se escanea al iniciar y de nuevo cuando se pide uno
+    desconocido o cuyo archivo ya no está. Solo se guardan rutas: los metadatos se leen
+    en cada request con get().
+    """
+
+    def __init__(self, directories):
+        self.directories = directories
+        self._paths = {}
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+
+    def scan(self):
+        paths = {}
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if not filename.lower().endswith(".pdf"):
+                    continue
+                path = os.path.abspath(os.path.join(directory, filename))
+                for slug in brochure_slugs(filename):
+                    # El primer directorio encontrado tiene prioridad, como en la búsqueda anterior
+                    if slug not in paths:
+                        paths[slug] = path
+        with self._lock:
+            self._paths = paths
+            self._last_scan = time.monotonic()
+        print(f"📄 Folletos disponibles: {', '.join(sorted(paths)) or 'ninguno'}")
+        return self
+
+    def _rescan_allowed(self) -> bool:
+        return time.monotonic() - self._last_scan > BROCHURE_RESCAN_INTERVAL
+
+    def path(self, slug: str):
+        path = self._paths.get(slug)
+        if path is None and self._rescan_allowed():
+            self.scan()
+            path = self._paths.get(slug)
+        return path
+
+    def get(self, slug: str):
+        """Folleto con el stat actual del archivo; None si no existe"""
+        path = self.path(slug)
+        if path is None:
+            return None
+        try:
+            return Brochure(slug, path)
+        except OSError:
+            # Se borró o renombró desde el último escaneo
+            if not self._rescan_allowed():
+                return None
+            self.scan()
+            path = self._paths.get(slug)
+            try:
+                return Brochure(slug, path) if path else None
+            except OSError:
+                return None
+
+    def has_page(self, slug: str) -> bool:
+        """Si /paquete-{slug} existe: folletos fijos de siempre o cualquier PDF registrado"""
+        return slug in VIEWER_SLUGS or self.path(slug) is not None
+
+def parse_range(header: str, size: int):
+    """Rango pedido como (inicio, fin) inclusivo; None si no aplica; ValueError si es insatisfacible"""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        # Rangos múltiples o unidades desconocidas: se responde el archivo completo
+        return None
+    start, end = match.groups()
+    if start == "" and end == "":
+        return None
+    if start == "":
+        # bytes=-N: los últimos N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("Rango vacío")
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("Rango fuera del archivo")
+    return start, end
+
+def is_not_modified(request: Request, brochure: Brochure) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return brochure.etag in tags or "*" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(brochure.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+class BrochureResponse(Response):
+    """
+    Envía un rango del archivo; usa el extension ASGI de zero-copy (sendfile) si el
+    servidor lo ofrece y si no lee por bloques en un thread.
+    """
+
+    def __init__(self, brochure: Brochure, start: int, end: int, status_code: int, headers: dict):
+        super().__init__(status_code=status_code, headers=headers, media_type="application/pdf")
+        self.brochure = brochure
+        self.start = start
+        self.count = end - start + 1
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.brochure.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.start,
+                    "count": self.count,
+                    "more_body": False
+                })
+            return
+        if "http.response.pathsend" in extensions and self.start == 0 and self.count == self.brochure.size:
+            await send({"type": "http.response.pathsend", "path": self.brochure.path})
+            return
+
+        async with await anyio.open_file(self.brochure.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # El archivo se achicó mientras se enviaba: cerrar el body igual
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def brochure_response(request: Request, brochure: Brochure) -> Response:
+    """Respuesta completa, parcial (206), 304 o 416 según los headers del pedido"""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": brochure.etag,
+        "Last-Modified": brochure.last_modified,
+        "Cache-Control": BROCHURE_CACHE_CONTROL,
+        "Content-Disposition": f'inline; filename="{brochure.filename}"'
+    }
+    if is_not_modified(request, brochure):
+        return Response(status_code=304, headers=headers)
+
+    start, end, status_code = 0, brochure.size - 1, 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range: solo se respeta el Range si el cliente tiene la misma versión
+    if range_header and (not if_range or if_range.strip() in (brochure.etag, brochure.last_modified)):
+        try:
+            requested = parse_range(range_header, brochure.size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{brochure.size}"
+            return Response(status_code=416, headers=headers)
+        if requested is not None:
+            start, end = requested
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{brochure.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return BrochureResponse(brochure, start, end, status_code, headers)
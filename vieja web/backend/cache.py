@@ -0,0 +1,123 @@
+"""
+Caché en memoria del catálogo público (respuestas JSON ya serializadas)
+
+La caché y su invalidación son por proceso: asume un solo worker de uvicorn (como en
+el Dockerfile). Con varios workers, una edición del admin invalida solo la caché del
+worker que la atendió y los demás pueden servir la versión anterior hasta el TTL
+(CATALOG_CACHE_TTL).
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from compression import CompressedBody, COMPRESSION_MINIMUM_SIZE
+
+# Se comprime una vez por entrada: se puede usar una calidad más alta que en el middleware
+JSON_BROTLI_QUALITY = int(os.getenv("JSON_BROTLI_QUALITY", "6"))
+
+class CachedJSON(CompressedBody):
+    """
+    Respuesta JSON ya serializada, con sus ETags fuertes y headers extra (ej: X-Next-Cursor).
+
+    El ETag es el hash del cuerpo: es el mismo en todos los workers y cambia solo si
+    cambia el contenido, así que sirve para revalidar también detrás de un CDN. Las
+    versiones gzip/brotli se generan la primera vez que alguien las pide y quedan en
+    la entrada, así los hits repetidos no vuelven a comprimir.
+    """
+
+    def __init__(self, body: bytes, headers: dict = None):
+        super().__init__(body, brotli_quality=JSON_BROTLI_QUALITY, gzip_level=6, lazy=True, minimum_size=COMPRESSION_MINIMUM_SIZE)
+        self.headers = headers or {}
+
+class CatalogCache:
+    """
+    Caché LRU versionada de respuestas serializadas.
+
+    Cada entrada guarda la versión del paquete al que pertenece (o la versión
+    global del catálogo para los listados). Invalidar solo incrementa la versión,
+    así que las entradas viejas dejan de ser válidas sin tener que recorrerlas.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._catalog_version = 0
+        self._package_versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _current_version(self, package_id):
+        if package_id is None:
+            return (self._generation, self._catalog_version)
+        return (self._generation, self._package_versions.get(package_id, 0))
+
+    def version(self, package_id=None):
+        """Versión vigente; se toma antes de consultar la base para no cachear datos ya invalidados"""
+        with self._lock:
+            return self._current_version(package_id)
+
+    def get(self, key, package_id=None):
+        """Obtener una respuesta cacheada o None si no existe, expiró o fue invalidada"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, stored_at, value = entry
+                if version == self._current_version(package_id) and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, package_id=None, version=None):
+        """Guardar una respuesta serializada asociada a un paquete (o al catálogo completo)"""
+        with self._lock:
+            current = self._current_version(package_id)
+            if version is not None and version != current:
+                # Hubo una escritura mientras se armaba la respuesta: no guardarla
+                return
+            self._entries[key] = (current, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_package(self, package_id):
+        """Invalidar las respuestas de un paquete y los listados que lo incluyen (usar invalidate_all si se borró)"""
+        with self._lock:
+            self._package_versions[package_id] = self._package_versions.get(package_id, 0) + 1
+            self._catalog_version += 1
+
+    def invalidate_all(self):
+        """Vaciar la caché completa y olvidar las versiones por paquete (ej: al borrar un paquete)"""
+        with self._lock:
+            self._entries.clear()
+            # La nueva generación invalida cualquier versión tomada antes, así que las
+            # versiones por paquete pueden volver a empezar sin que _package_versions crezca
+            self._package_versions.clear()
+            self._generation += 1
+
+    def stats(self):
+        """Contadores de uso de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "catalog_version": self._catalog_version
+            }
+
+catalog_cache = CatalogCache(
+    max_entries=int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "300"))
+)
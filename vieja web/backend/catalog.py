@@ -0,0 +1,328 @@
+"""
+Carga del catálogo de paquetes con un número fijo de consultas (sin N+1)
+"""
+import json
+import base64
+from datetime import datetime
+from decimal import Decimal
+from collections import defaultdict
+from sqlalchemy import select, update, values, column, case, func, and_, or_, Integer
+from sqlalchemy.orm import load_only
+from cache import catalog_cache
+from models import Package, PackageFeature, PackageGalleryImage, PackageHotel, PackageInfo
+
+async def load_features_by_package(db, package_ids):
+    """Obtener los textos de features de varios paquetes en una sola consulta, agrupados por package_id"""
+    features_by_package = defaultdict(list)
+    if not package_ids:
+        return features_by_package
+
+    rows = (await db.execute(
+        select(PackageFeature.package_id, PackageFeature.text).where(
+            PackageFeature.package_id.in_(package_ids)
+        ).order_by(PackageFeature.package_id, PackageFeature.order_index, PackageFeature.id)
+    )).all()
+
+    for package_id, text in rows:
+        features_by_package[package_id].append(text)
+
+    return features_by_package
+
+# Proyección para tarjetas y carrusel: sin descripción, itinerario ni galería
+CARD_FIELDS = ("id", "title", "price", "price_amount", "price_currency", "price_tag", "image", "category")
+
+def parse_fields(fields):
+    """
+    Claves pedidas con fields= ("card" se expande a CARD_FIELDS); None si se piden todas.
+
+    Devuelve una tupla en el orden de Package.DICT_FIELDS que siempre incluye el id.
+    """
+    if not fields:
+        return None
+    requested = {"id"}
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if field == "card":
+            requested.update(CARD_FIELDS)
+        elif field in Package.DICT_FIELDS:
+            requested.add(field)
+        else:
+            raise ValueError(f"Campo desconocido: {field}")
+    return tuple(field for field in Package.DICT_FIELDS if field in requested)
+
+def package_columns(fields, *extra_columns):
+    """Opción load_only para leer de la base solo las columnas de la proyección"""
+    columns = {getattr(Package, field) for field in fields} | set(extra_columns)
+    return load_only(*columns)
+
+async def serialize_packages(db, packages, fields=None):
+    """Convertir paquetes a diccionarios usando las features de la base de datos (una consulta extra en total)"""
+    if fields is not None and "features" not in fields:
+        return [package.to_dict(fields) for package in packages]
+
+    features_by_package = await load_features_by_package(db, [package.id for package in packages])
+
+    result = []
+    for package in packages:
+        package_dict = package.to_dict(fields)
+        # Si hay features en la base de datos, usarlas; sino usar las del JSON del paquete
+        db_features = features_by_package.get(package.id)
+        if db_features:
+            package_dict['features'] = db_features
+        result.append(package_dict)
+
+    return result
+
+async def load_catalog(db, promoted_only=False, fields=None):
+    """Obtener el catálogo de paquetes con sus features en un número constante de consultas"""
+    query = select(Package)
+    if fields is not None:
+        query = query.options(package_columns(fields))
+    if promoted_only:
+        query = query.where(Package.promoted == True).order_by(Package.carousel_order, Package.id)
+
+    packages = (await db.scalars(query)).all()
+    return await serialize_packages(db, packages, fields)
+
+# Clave del advisory lock que serializa las escrituras de carousel_order en PostgreSQL
+CAROUSEL_LOCK_KEY = 7_231_001
+
+async def lock_carousel(db):
+    """
+    Tomar el lock del carrusel hasta el fin de la transacción actual.
+
+    Sin él, dos promociones simultáneas leen el mismo max(carousel_order) y quedan con
+    el mismo orden. En SQLite las escrituras ya están serializadas.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(CAROUSEL_LOCK_KEY)))
+
+async def next_carousel_order(db):
+    """Orden para un paquete que entra al carrusel (al final); toma el lock del carrusel"""
+    await lock_carousel(db)
+    max_order = await db.scalar(select(func.max(Package.carousel_order)).where(Package.promoted == True))
+    return (max_order or 0) + 1
+
+async def reorder_carousel(db, orders):
+    """
+    Asignar carousel_order a varios paquetes promocionados en un solo UPDATE.
+
+    orders es un dict {package_id: orden}; los paquetes no promocionados se ignoran.
+    Devuelve los paquetes actualizados (RETURNING del mismo UPDATE) ordenados por carrusel.
+    """
+    if not orders:
+        return []
+
+    await lock_carousel(db)
+    if db.bind.dialect.name == "postgresql":
+        # UPDATE packages SET carousel_order = new_orders.carousel_order FROM (VALUES ...) AS new_orders
+        new_orders = values(
+            column("id", Integer), column("carousel_order", Integer), name="new_orders"
+        ).data(list(orders.items()))
+        statement = update(Package).where(
+            Package.id == new_orders.c.id, Package.promoted == True
+        ).values(carousel_order=new_orders.c.carousel_order)
+    else:
+        # SQLite no admite VALUES con nombres de columna en el FROM: CASE por id
+        statement = update(Package).where(
+            Package.id.in_(orders.keys()), Package.promoted == True
+        ).values(carousel_order=case(orders, value=Package.id))
+
+    packages = (await db.scalars(
+        statement.returning(Package),
+        execution_options={"synchronize_session": False, "populate_existing": True}
+    )).all()
+    return sorted(packages, key=lambda package: (package.carousel_order, package.id))
+
+# Orden del listado: columna y si es descendente; el id desempata y hace estable el cursor
+CATALOG_SORTS = {
+    "id": (Package.id, False),
+    "price": (Package.price_amount, False),
+    "-price": (Package.price_amount, True),
+    "created_at": (Package.created_at, False),
+    "-created_at": (Package.created_at, True),
+    "carousel_order": (Package.carousel_order, False),
+}
+CATALOG_PAGE_SIZE = 24
+CATALOG_MAX_PAGE_SIZE = 100
+
+class CatalogPage:
+    """Una página del listado y el cursor para pedir la siguiente (None si es la última)"""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def headers(self):
+        return {"X-Next-Cursor": self.next_cursor} if self.next_cursor else {}
+
+def encode_cursor(sort, package, column, currency=None):
+    value = getattr(package, column.key)
+    if isinstance(value, (Decimal, datetime)):
+        value = str(value) if isinstance(value, Decimal) else value.isoformat()
+    # La moneda es parte de la clave del orden por precio: el cursor solo vale para ella
+    raw = json.dumps([sort, value, package.id, currency], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, sort, currency=None):
+    """(valor, id) del último paquete de la página anterior; ValueError si el cursor no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, last_id, cursor_currency = json.loads(raw)
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if cursor_sort != sort or not isinstance(last_id, int):
+        raise ValueError("El cursor corresponde a otro orden")
+    if cursor_currency != currency:
+        raise ValueError("El cursor corresponde a otra moneda")
+    if value is not None:
+        if sort in ("price", "-price"):
+            value = Decimal(value)
+        elif sort in ("created_at", "-created_at"):
+            value = datetime.fromisoformat(value)
+    return value, last_id
+
+def keyset_condition(column, descending, value, last_id):
+    """Filas posteriores a (valor, id) en el orden columna (nulos al final), id"""
+    if column is Package.id:
+        return Package.id > last_id
+    if value is None:
+        # Ya se recorrieron todos los valores no nulos
+        return and_(column.is_(None), Package.id > last_id)
+    after = column < value if descending else column > value
+    return or_(after, and_(column == value, Package.id > last_id), column.is_(None))
+
+async def load_catalog_page(db, category=None, destination=None, promoted=None, min_price=None, max_price=None,
+                            currency=None, sort="id", limit=None, cursor=None, fields=None):
+    """
+    Listado filtrado y ordenado en SQL con paginación por cursor (keyset).
+
+    Sin limit ni cursor devuelve todas las filas que cumplen los filtros, como antes.
+    Ordenar o filtrar por precio exige currency: los montos de monedas distintas no se
+    pueden comparar (ValueError si falta).
+    """
+    if not currency and (sort in ("price", "-price") or min_price is not None or max_price is not None):
+        raise ValueError("Para ordenar o filtrar por precio indicá la moneda (currency)")
+    currency = currency.upper() if currency else None
+    column, descending = CATALOG_SORTS[sort]
+    query = select(Package)
+    if fields is not None:
+        # La columna de orden se carga aunque no se devuelva: la usa el cursor
+        query = query.options(package_columns(fields, column))
+    if category:
+        query = query.where(Package.category == category)
+    if destination:
+        query = query.where(func.lower(Package.destination) == destination.lower())
+    if promoted is not None:
+        query = query.where(Package.promoted == promoted)
+    if currency:
+        query = query.where(Package.price_currency == currency)
+    if min_price is not None:
+        query = query.where(Package.price_amount >= min_price)
+    if max_price is not None:
+        query = query.where(Package.price_amount <= max_price)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, currency)
+        query = query.where(keyset_condition(column, descending, value, last_id))
+        limit = limit or CATALOG_PAGE_SIZE
+
+    ordering = column.desc() if descending else column.asc()
+    if column is not Package.id:
+        query = query.order_by(ordering.nulls_last(), Package.id)
+    else:
+        query = query.order_by(Package.id)
+
+    if limit:
+        # Una fila de más indica si hay otra página
+        packages = (await db.scalars(query.limit(limit + 1))).all()
+        next_cursor = encode_cursor(sort, packages[limit - 1], column, currency) if len(packages) > limit else None
+        packages = packages[:limit]
+    else:
+        packages = (await db.scalars(query)).all()
+        next_cursor = None
+
+    return CatalogPage(await serialize_packages(db, packages, fields), next_cursor)
+
+async def migrate_json_features(db, package):
+    """Auto-migrar: si la tabla está vacía pero el JSON del paquete tiene features, crear las filas"""
+    json_features = package.features or []
+    if not json_features:
+        return []
+
+    for i, text in enumerate(json_features):
+        if text and str(text).strip():
+            new_feature = PackageFeature(
+                package_id=package.id,
+                text=str(text).strip(),
+                order_index=i + 1
+            )
+            db.add(new_feature)
+    await db.commit()
+    catalog_cache.invalidate_package(package.id)
+
+    return (await db.scalars(
+        select(PackageFeature).where(
+            PackageFeature.package_id == package.id
+        ).order_by(PackageFeature.order_index)
+    )).all()
+
+def group_hotels_by_destination(hotels):
+    """Agrupar hoteles (ya ordenados) por destino, conservando el orden de aparición"""
+    destinations = {}
+    for hotel in hotels:
+        destination = hotel.destination
+        if destination not in destinations:
+            destinations[destination] = []
+        destinations[destination].append(hotel.to_dict())
+    return destinations
+
+async def load_package_detail(db, package_id):
+    """Obtener paquete, galería, hoteles, info y features en 5 consultas fijas; None si el paquete no existe"""
+    package = await db.get(Package, package_id)
+    if not package:
+        return None
+
+    features = (await db.scalars(
+        select(PackageFeature).where(
+            PackageFeature.package_id == package_id
+        ).order_by(PackageFeature.order_index, PackageFeature.id)
+    )).all()
+    if not features:
+        features = await migrate_json_features(db, package)
+
+    gallery_images = (await db.scalars(
+        select(PackageGalleryImage).where(
+            PackageGalleryImage.package_id == package_id
+        ).order_by(PackageGalleryImage.order_index, PackageGalleryImage.id)
+    )).all()
+
+    hotels = (await db.scalars(
+        select(PackageHotel).where(
+            PackageHotel.package_id == package_id
+        ).order_by(
+            PackageHotel.destination,
+            PackageHotel.order_in_destination,
+            PackageHotel.order_index
+        )
+    )).all()
+
+    info_items = (await db.scalars(
+        select(PackageInfo).where(
+            PackageInfo.package_id == package_id
+        ).order_by(PackageInfo.order_index)
+    )).all()
+
+    package_dict = package.to_dict()
+    if features:
+        package_dict['features'] = [feature.text for feature in features]
+
+    return {
+        "package": package_dict,
+        "gallery": [img.to_dict() for img in gallery_images],
+        "hotels": group_hotels_by_destination(hotels),
+        "info": [item.to_dict() for item in info_items],
+        "features": [feature.to_dict() for feature in features]
+    }
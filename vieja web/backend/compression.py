@@ -0,0 +1,262 @@
+"""
+Compresión de respuestas: cuerpos precomprimidos (gzip/brotli) con ETag y middleware ASGI
+para el resto de las respuestas
+"""
+import os
+import gzip
+import zlib
+import hashlib
+from fastapi import Request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Respuestas más chicas no se comprimen: el ahorro no compensa el costo ni los headers extra
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Calidades para comprimir en caliente (lo precomprimido al iniciar usa el máximo)
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+
+# Formatos ya comprimidos o que no deben demorarse (eventos en vivo)
+SKIP_MEDIA_PREFIXES = (
+    "image/", "video/", "audio/", "font/woff", "application/pdf", "application/zip",
+    "application/gzip", "application/octet-stream", "text/event-stream"
+)
+
+class CompressedBody:
+    """
+    Un cuerpo ya serializado junto con sus versiones gzip/brotli y su ETag fuerte.
+
+    Con lazy=True cada codificación se comprime recién la primera vez que se pide y
+    queda guardada (respuestas JSON cacheadas); si no, se comprimen todas al crearlo.
+    """
+
+    def __init__(self, content: bytes, brotli_quality: int = 11, gzip_level: int = 9, lazy: bool = False, minimum_size: int = 0):
+        self.identity = content
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self.minimum_size = minimum_size
+        self._encoded = {}
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        # Cada codificación es una representación distinta: ETag distinto para cada una
+        self.etags = {
+            "identity": f'"{digest}"',
+            "gzip": f'"{digest}-gz"',
+            "br": f'"{digest}-br"'
+        }
+        if not lazy:
+            self.encoded("gzip")
+            self.encoded("br")
+
+    @property
+    def gzip(self) -> bytes:
+        return self.encoded("gzip")
+
+    @property
+    def br(self) -> bytes:
+        return self.encoded("br")
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding not in ("gzip", "br"):
+            return self.identity
+        # Una carrera entre requests solo comprime dos veces lo mismo
+        if encoding not in self._encoded:
+            if encoding == "gzip":
+                self._encoded[encoding] = gzip.compress(self.identity, compresslevel=self.gzip_level, mtime=0)
+            else:
+                self._encoded[encoding] = brotli.compress(self.identity, quality=self.brotli_quality) if BROTLI_AVAILABLE else None
+        return self._encoded[encoding]
+
+def parse_accept_encoding(header: str) -> set:
+    """Codificaciones aceptadas por el cliente (ignora las que tienen q=0)"""
+    accepted = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token)
+    return accepted
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    accepted = parse_accept_encoding(accept_encoding)
+    if BROTLI_AVAILABLE and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+def choose_encoding(request: Request, body: CompressedBody) -> str:
+    if len(body.identity) < body.minimum_size:
+        return "identity"
+    return negotiate_encoding(request.headers.get("accept-encoding"))
+
+def if_none_match_matches(request: Request, etags) -> bool:
+    """True si algún ETag de If-None-Match coincide (comparación débil, como pide RFC 9110)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag in candidates for etag in etags)
+
+def etag_matches(request: Request, body: CompressedBody) -> bool:
+    return if_none_match_matches(request, body.etags.values())
+
+class StreamCompressor:
+    """Compresor incremental gzip o brotli"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31: formato gzip (header + CRC), no zlib crudo
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+
+class CompressionMiddleware:
+    """
+    Comprime con brotli o gzip (según Accept-Encoding) las respuestas que todavía no
+    vienen comprimidas.
+
+    Se saltean los cuerpos chicos, los formatos ya comprimidos (imágenes, PDF, video),
+    los eventos en vivo y las respuestas que ya traen Content-Encoding (HTML, estáticos
+    con fingerprint y JSON del catálogo llegan precomprimidos desde su caché). Un
+    cuerpo en un solo mensaje se comprime de una vez; uno que llega por partes
+    (archivos) se comprime en streaming.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for index, (name, value) in enumerate(scope["headers"]):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif name == b"if-none-match" and b"W/" in value:
+                # If-None-Match compara en forma débil: sin el W/ que agrega este middleware
+                # el ETag vuelve a coincidir con el que calcula la app (ej: StaticFiles)
+                headers = list(scope["headers"])
+                headers[index] = (name, value.replace(b"W/", b""))
+                scope = {**scope, "headers": headers}
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class CompressionResponder:
+    """Estado de una respuesta: retiene el inicio hasta ver el primer bloque del cuerpo"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    def should_skip(self, message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return True
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1").lower() for name, value in message.get("headers", [])}
+        if "content-encoding" in headers or "content-range" in headers:
+            return True
+        if "no-transform" in headers.get("cache-control", ""):
+            return True
+        return headers.get("content-type", "").startswith(SKIP_MEDIA_PREFIXES)
+
+    def compressed_headers(self, content_length: int = None):
+        headers = []
+        vary = None
+        for name, value in self.start_message.get("headers", []):
+            lower = name.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"vary":
+                vary = value
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # Otra representación del mismo recurso: el ETag pasa a ser débil
+                value = b"W/" + value
+            headers.append((name, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower() and vary.strip() != b"*":
+            vary += b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return headers
+
+    async def send(self, message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            if self.should_skip(message):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body:
+                # Cuerpo completo en un solo mensaje
+                if len(body) < self.minimum_size:
+                    self.passthrough = True
+                    await self._send(self.start_message)
+                    await self._send(message)
+                    return
+                compressed = StreamCompressor(self.encoding)
+                data = compressed.compress(body) + compressed.finish()
+                await self._send({**self.start_message, "headers": self.compressed_headers(len(data))})
+                await self._send({"type": "http.response.body", "body": data, "more_body": False})
+                self.passthrough = True
+                return
+
+            # Cuerpo por partes: comprimir en streaming (sin Content-Length)
+            self.compressor = StreamCompressor(self.encoding)
+            await self._send({**self.start_message, "headers": self.compressed_headers()})
+
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.finish()
+        if data or not more_body:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -2,9 +2,13 @@
 Configuración de la base de datos PostgreSQL con SQLAlchemy
 """
 import os
-from sqlalchemy import create_engine, MetaData
+import time
+import threading
+from sqlalchemy import create_engine, MetaData, exc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
 # URL de conexión a PostgreSQL - Compatible con Render
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -21,26 +25,156 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
 
 print(f"[INFO] Conectando a: {DATABASE_URL[:50]}...")
 
-# Motor de SQLAlchemy
-engine = create_engine(DATABASE_URL, echo=False)
+def get_async_database_url(url: str) -> str:
+    """Convertir la URL síncrona a su driver async (asyncpg para PostgreSQL)"""
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
 
-# Sesión de base de datos
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
+
+# Configuración del pool de conexiones (por worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos; -1 desactiva el reciclado
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+class PoolMetrics:
+    """Contadores de uso de un pool de conexiones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+
+    def record_checkout(self, waited: bool, elapsed: float):
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += elapsed
+                self.max_wait_time = max(self.max_wait_time, elapsed)
+
+    def record_timeout(self, elapsed: float):
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.wait_time += elapsed
+            self.max_wait_time = max(self.max_wait_time, elapsed)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+class InstrumentedPoolMixin:
+    """Mixin para QueuePool que registra checkouts, esperas y conexiones nuevas"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        # Hay espera cuando no quedan conexiones libres ni lugar para overflow
+        saturated = self._max_overflow > -1 and self._overflow >= self._max_overflow and self._pool.empty()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(saturated, time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self):
+        self.metrics.record_connect()
+        return super()._create_connection()
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: conservar los contadores
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+    def stats(self):
+        metrics = self.metrics
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self._timeout,
+            "recycle_seconds": self._recycle,
+            "pre_ping": self._pre_ping,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": metrics.checkouts,
+            "connects": metrics.connects,
+            "waits": metrics.waits,
+            "timeouts": metrics.timeouts,
+            "wait_time_total_ms": round(metrics.wait_time * 1000, 2),
+            "wait_time_max_ms": round(metrics.max_wait_time * 1000, 2)
+        }
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING
+}
+
+# Motor de SQLAlchemy síncrono (scripts, init_db y migraciones)
+engine = create_engine(DATABASE_URL, echo=False, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+
+# Motor async para los handlers de FastAPI (no bloquea el event loop)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+
+# Sesión de base de datos síncrona
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sesión de base de datos async; expire_on_commit=False evita cargas implícitas después del commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base para los modelos
 Base = declarative_base()
 
 # Metadata para las tablas
 metadata = MetaData()
 
-# Dependencia para obtener la sesión de base de datos
-def get_db():
+# Dependencia para obtener la sesión async de base de datos
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependencia síncrona (fallback para scripts y código que no corre en el event loop)
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+# Estadísticas de los pools de conexiones
+def get_pool_stats():
+    return {
+        "async": async_engine.pool.stats(),
+        "sync": engine.pool.stats()
+    }
+
 # Función para probar la conexión a la base de datos
 def test_connection():
     try:
@@ -50,4 +184,15 @@ def test_connection():
         return True
     except Exception as e:
         print(f"Error de conexión a la base de datos: {e}")
-        return False
\ No newline at end of file
+        return False
+
+# Versión async de la prueba de conexión (para usar dentro de los handlers)
+async def test_async_connection():
+    try:
+        async with async_engine.connect() as connection:
+            from sqlalchemy import text
+            await connection.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"Error de conexión a la base de datos: {e}")
+        return False
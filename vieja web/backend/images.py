@@ -0,0 +1,106 @@
+"""
+Procesamiento de imágenes al subirlas: variantes responsive en WebP (y AVIF opcional) sin metadatos
+"""
+import os
+from io import BytesIO
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# AVIF necesita el plugin pillow-avif-plugin; si no está instalado se generan solo WebP
+AVIF_AVAILABLE = False
+if PIL_AVAILABLE:
+    try:
+        import pillow_avif  # noqa: F401  (registra el encoder AVIF en Pillow)
+        AVIF_AVAILABLE = True
+    except ImportError:
+        pass
+
+IMAGE_VARIANT_WIDTHS = sorted(
+    {int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "400,800,1200").split(",") if width.strip()},
+    reverse=True
+)
+# Alto máximo de la variante más grande (mismo límite 1200x800 que usaba la transformación de Cloudinary)
+IMAGE_MAX_HEIGHT = int(os.getenv("IMAGE_MAX_HEIGHT", "800"))
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_AVIF_QUALITY = int(os.getenv("IMAGE_AVIF_QUALITY", "60"))
+IMAGE_AVIF_ENABLED = os.getenv("IMAGE_AVIF_ENABLED", "false").lower() in ("1", "true", "yes") and AVIF_AVAILABLE
+# Protección contra imágenes con dimensiones absurdas (bombas de descompresión)
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40 * 1000 * 1000)))
+
+class ImageVariant:
+    """Una versión codificada de la imagen, lista para guardar"""
+
+    def __init__(self, width: int, height: int, format: str, data: bytes):
+        self.width = width
+        self.height = height
+        self.format = format
+        self.data = data
+
+    @property
+    def content_type(self):
+        return f"image/{self.format}"
+
+    @property
+    def extension(self):
+        return f".{self.format}"
+
+def is_processing_available() -> bool:
+    return PIL_AVAILABLE
+
+def encode_variant(image, format: str) -> bytes:
+    # Se guarda sin pasar exif ni icc_profile: la variante sale sin metadatos
+    buffer = BytesIO()
+    if format == "avif":
+        image.save(buffer, format="AVIF", quality=IMAGE_AVIF_QUALITY)
+    else:
+        image.save(buffer, format="WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+def process_image(file_obj):
+    """
+    Decodificar la imagen una sola vez y generar sus variantes responsive (bloqueante).
+
+    Devuelve la lista de variantes de mayor a menor ancho, o None si la imagen no
+    se puede procesar (Pillow no instalado, GIF animado o archivo ilegible); en ese
+    caso se sube el original como antes.
+    """
+    if not PIL_AVAILABLE:
+        return None
+
+    try:
+        file_obj.seek(0)
+        with Image.open(file_obj) as source:
+            if getattr(source, "is_animated", False):
+                return None
+            if source.width * source.height > IMAGE_MAX_PIXELS:
+                return None
+
+            # Aplicar la orientación EXIF antes de descartar los metadatos
+            image = ImageOps.exif_transpose(source)
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+            formats = ["avif", "webp"] if IMAGE_AVIF_ENABLED else ["webp"]
+            # La variante más grande nunca supera el original ni la caja máxima configurada
+            largest = min(image.width, IMAGE_VARIANT_WIDTHS[0], max(1, image.width * IMAGE_MAX_HEIGHT // image.height))
+            widths = [largest] + [width for width in IMAGE_VARIANT_WIDTHS if width < largest]
+
+            variants = []
+            current = image
+            for width in widths:
+                if width != current.width:
+                    height = max(1, round(current.height * width / current.width))
+                    # Reducir desde la variante anterior (más chica que el original) es más rápido
+                    current = current.resize((width, height), Image.LANCZOS)
+                for format in formats:
+                    variants.append(ImageVariant(current.width, current.height, format, encode_variant(current, format)))
+            return variants
+    except Exception as e:
+        print(f"⚠️ No se pudo procesar la imagen, se sube el original: {e}")
+        return None
+    finally:
+        file_obj.seek(0)
@@ -0,0 +1,281 @@
+"""
+Cola en segundo plano para las notificaciones de contacto por email
+"""
+import os
+import ssl
+import asyncio
+import smtplib
+from datetime import datetime, timezone, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from sqlalchemy import select, update
+from database import AsyncSessionLocal
+from models import ContactMessage
+
+# Configuración de email
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "info.armansolutions@gmail.com")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")  # Se configura en variables de entorno
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+# Sin contraseña no se envía, salvo que se habilite explícitamente (ej: servidor SMTP local de pruebas)
+SMTP_ENABLED = os.getenv("SMTP_ENABLED", "true" if SMTP_PASSWORD else "false").lower() in ("1", "true", "yes")
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))  # cerrar la conexión tras este tiempo sin envíos
+
+RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL", "travel@armansolutions.io")
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_DELAY = float(os.getenv("EMAIL_RETRY_BASE_DELAY", "30"))  # segundos, se duplica en cada intento
+EMAIL_CLAIM_TIMEOUT = float(os.getenv("EMAIL_CLAIM_TIMEOUT", "600"))  # segundos; un 'sending' más viejo es de un worker caído
+
+# Estados de envío guardados en contact_messages.email_status
+EMAIL_PENDING = "pending"
+EMAIL_SENDING = "sending"  # reclamado por un worker, envío en curso
+EMAIL_SENT = "sent"
+EMAIL_FAILED = "failed"
+EMAIL_SKIPPED = "skipped"
+
+def build_contact_email(contact: ContactMessage) -> MIMEMultipart:
+    """Armar el email de notificación para un mensaje de contacto"""
+    subject = f"Nueva consulta de {contact.name} - ARMAN TRAVEL"
+    received_at = contact.created_at.strftime('%d/%m/%Y %H:%M:%S') if contact.created_at else ""
+    body = f"""
+Nueva consulta recibida en ARMAN TRAVEL
+
+Datos del cliente:
+• Nombre: {contact.name}
+• Email: {contact.email}
+• Teléfono: {contact.phone or 'No proporcionado'}
+
+Mensaje:
+{contact.message}
+
+---
+Enviado desde el sitio web de ARMAN TRAVEL
+Fecha: {received_at} UTC
+    """
+
+    message = MIMEMultipart()
+    message["From"] = f"{contact.name} <{SMTP_USER}>"
+    message["To"] = RECIPIENT_EMAIL
+    message["Subject"] = subject
+    message["Reply-To"] = contact.email
+    message.attach(MIMEText(body.strip(), "plain", "utf-8"))
+    return message
+
+class SMTPConnection:
+    """Conexión SMTP reutilizable: se abre una vez y se reusa mientras siga viva"""
+
+    def __init__(self):
+        self._server = None
+
+    def _connect(self):
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+        if SMTP_STARTTLS:
+            server.starttls(context=ssl.create_default_context())
+        if SMTP_PASSWORD:
+            server.login(SMTP_USER, SMTP_PASSWORD)
+        self._server = server
+
+    def _ensure_connected(self):
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return
+            except smtplib.SMTPException:
+                pass
+            self.close()
+        self._connect()
+
+    def send(self, message):
+        self._ensure_connected()
+        try:
+            self._server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cortó la conexión entre el noop y el envío: reconectar una vez
+            self.close()
+            self._connect()
+            self._server.send_message(message)
+
+    def send_batch(self, messages):
+        """Enviar varios mensajes por la misma conexión; devuelve {id: error o None}"""
+        results = {}
+        for message_id, message in messages:
+            try:
+                self.send(message)
+                results[message_id] = None
+            except Exception as e:
+                results[message_id] = str(e)
+        return results
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+class ContactMailer:
+    """Worker que envía las notificaciones de contacto fuera del request"""
+
+    def __init__(self):
+        self._queue = None
+        self._worker = None
+        self._retries = set()
+        self._smtp = SMTPConnection()
+
+    async def start(self):
+        """Iniciar el worker y re-encolar los mensajes que quedaron pendientes"""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        async with AsyncSessionLocal() as db:
+            # Mensajes que quedaron reclamados por un worker que se cayó a mitad del envío
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=EMAIL_CLAIM_TIMEOUT)
+            released = await db.execute(
+                update(ContactMessage).where(
+                    ContactMessage.email_status == EMAIL_SENDING,
+                    ContactMessage.email_claimed_at < cutoff
+                ).values(email_status=EMAIL_PENDING, email_claimed_at=None)
+            )
+            if released.rowcount:
+                print(f"⚠️ {released.rowcount} notificaciones con envío interrumpido vuelven a pendientes")
+            await db.commit()
+
+            pending_ids = (await db.scalars(
+                select(ContactMessage.id).where(
+                    ContactMessage.email_status == EMAIL_PENDING
+                ).order_by(ContactMessage.id)
+            )).all()
+        for message_id in pending_ids:
+            self._queue.put_nowait(message_id)
+        if pending_ids:
+            print(f"📧 {len(pending_ids)} notificaciones pendientes re-encoladas")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in [self._worker, *self._retries]:
+            if task is not None:
+                task.cancel()
+        self._worker = None
+        self._retries.clear()
+        await asyncio.to_thread(self._smtp.close)
+
+    def enqueue(self, message_id: int):
+        """Encolar un mensaje ya guardado en contact_messages"""
+        if self._queue is not None:
+            self._queue.put_nowait(message_id)
+        # Si el worker no está corriendo, el mensaje queda pending y se envía al reiniciar
+
+    async def _run(self):
+        while True:
+            try:
+                message_id = await asyncio.wait_for(self._queue.get(), timeout=SMTP_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self._smtp.close)
+                continue
+
+            batch = [message_id]
+            while len(batch) < EMAIL_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._deliver(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error en el envío de notificaciones {batch}: {e}")
+
+    async def _claim(self, db, message_ids):
+        """
+        Pasar a sending los mensajes todavía pendientes y devolver sus ids.
+
+        Es un único UPDATE ... WHERE email_status = 'pending' RETURNING id: si otro worker
+        (u otro proceso) ya reclamó un mensaje, no vuelve acá y no se envía dos veces.
+        """
+        claimed_ids = (await db.scalars(
+            update(ContactMessage).where(
+                ContactMessage.id.in_(message_ids),
+                ContactMessage.email_status == EMAIL_PENDING
+            ).values(
+                email_status=EMAIL_SENDING,
+                email_claimed_at=datetime.now(timezone.utc)
+            ).returning(ContactMessage.id),
+            execution_options={"synchronize_session": False}
+        )).all()
+        await db.commit()
+        return claimed_ids
+
+    async def _deliver(self, message_ids):
+        async with AsyncSessionLocal() as db:
+            claimed_ids = await self._claim(db, message_ids)
+            if not claimed_ids:
+                return
+
+            contacts = (await db.scalars(
+                select(ContactMessage).where(
+                    ContactMessage.id.in_(claimed_ids)
+                ).order_by(ContactMessage.id)
+            )).all()
+            try:
+                await self._send(db, contacts)
+            except Exception:
+                # No dejar los mensajes reclamados: vuelven a pendientes para el próximo intento
+                await db.rollback()
+                await db.execute(
+                    update(ContactMessage).where(
+                        ContactMessage.id.in_(claimed_ids),
+                        ContactMessage.email_status == EMAIL_SENDING
+                    ).values(email_status=EMAIL_PENDING, email_claimed_at=None)
+                )
+                await db.commit()
+                raise
+
+    async def _send(self, db, contacts):
+        """Enviar los mensajes reclamados y guardar el resultado de cada uno"""
+        if not SMTP_ENABLED:
+            for contact in contacts:
+                print("⚠️ Email NO enviado - configuración SMTP no disponible")
+                print(f"📧 Contenido del email:\n{build_contact_email(contact).as_string()}")
+                contact.email_status = EMAIL_SKIPPED
+            await db.commit()
+            return
+
+        messages = [(contact.id, build_contact_email(contact)) for contact in contacts]
+        results = await asyncio.to_thread(self._smtp.send_batch, messages)
+
+        retries = []
+        for contact in contacts:
+            error = results.get(contact.id)
+            contact.email_attempts = (contact.email_attempts or 0) + 1
+            if error is None:
+                contact.email_status = EMAIL_SENT
+                contact.email_sent_at = datetime.now(timezone.utc)
+                print(f"✅ Email enviado correctamente a {RECIPIENT_EMAIL} (mensaje {contact.id})")
+            elif contact.email_attempts >= EMAIL_MAX_ATTEMPTS:
+                contact.email_status = EMAIL_FAILED
+                print(f"❌ Email del mensaje {contact.id} descartado tras {contact.email_attempts} intentos: {error}")
+            else:
+                delay = EMAIL_RETRY_BASE_DELAY * (2 ** (contact.email_attempts - 1))
+                print(f"⚠️ Error al enviar email del mensaje {contact.id}, reintento en {delay:g}s: {error}")
+                contact.email_status = EMAIL_PENDING
+                contact.email_claimed_at = None
+                retries.append((contact.id, delay))
+        await db.commit()
+
+        # Recién ahora: el reintento tiene que encontrar el mensaje ya de vuelta en pending
+        for message_id, delay in retries:
+            self._schedule_retry(message_id, delay)
+
+    def _schedule_retry(self, message_id: int, delay: float):
+        async def retry_later():
+            await asyncio.sleep(delay)
+            self.enqueue(message_id)
+
+        task = asyncio.create_task(retry_later())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+contact_mailer = ContactMailer()
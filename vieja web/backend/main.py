@@ -1,73 +1,69 @@
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Form, BackgroundTasks, Request, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 from typing import Optional, List
 import os
+import json
+import asyncio
 import uuid
 import shutil
 from datetime import datetime, timedelta
+from decimal import Decimal
 import jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, func
-from database import get_db, test_connection, engine
-from models import Package, ContactMessage, PackageGalleryImage, PackageHotel, PackageInfo, PackageFeature, Base
-import json
-import smtplib
-import ssl
-import re
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import cloudinary
-import cloudinary.uploader
-from cloudinary import CloudinaryImage
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, inspect
+from database import get_db, test_connection, test_async_connection, async_engine, get_pool_stats
+from models import Package, ContactMessage, PackageGalleryImage, PackageHotel, PackageInfo, PackageFeature, PACKAGE_CHILD_MODELS
+from catalog import load_catalog, load_catalog_page, next_carousel_order, reorder_carousel, parse_fields, CatalogPage, CATALOG_SORTS, CATALOG_MAX_PAGE_SIZE, serialize_packages, group_hotels_by_destination, load_package_detail, migrate_json_features
+from cache import catalog_cache, CachedJSON
+from serialization import dumps, DefaultJSONResponse
+from batch import sync_package_items, load_package_items, SyncError
+from search import search_packages, refresh_search_document, normalize_search_text, SEARCH_MAX_RESULTS
+from mailer import contact_mailer, RECIPIENT_EMAIL, EMAIL_PENDING
+from uploads import validate_image_upload, UploadSizeLimitMiddleware
+from assets import AssetManifest, FingerprintedStaticFiles, ASSET_FINGERPRINT
+from brochures import BrochureRegistry, BROCHURE_DIRS, brochure_response, brochure_title
+from pages import HTMLShell, HTMLShellRegistry, PackagePageRenderer, brochure_viewer_html, compressed_response, PACKAGE_SSR
+from compression import CompressionMiddleware
+from media import upload_image, upload_processed_image, delete_images, variant_urls, is_cloudinary_configured, shutdown_media_pool, extract_cloudinary_public_id, cleanup_assets, run_cleanup_retries
 
 # Configuración
-app = FastAPI(title="ARMAN TRAVEL API", version="2.0.0")
+app = FastAPI(title="ARMAN TRAVEL API", version="2.0.0", default_response_class=DefaultJSONResponse)
+
+# Cortar subidas que superan el tamaño máximo mientras llegan
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Comprimir (brotli/gzip) las respuestas que no llegan ya comprimidas
+app.add_middleware(CompressionMiddleware)
 
-# CORS
+# CORS (agregado al final: envuelve a los demás, así sus respuestas directas como el 413 llevan los headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Crear tablas si no existen
-Base.metadata.create_all(bind=engine)
-
 # Seguridad
 SECRET_KEY = os.getenv("SECRET_KEY", "arman-secret-key-super-secure-2024")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "300"))
 
-# Configuración de email
-SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-SMTP_USER = os.getenv("SMTP_USER", "info.armansolutions@gmail.com")  
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")  # Se configura en variables de entorno
-
-RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL", "travel@armansolutions.io")
-
-# Configuración de Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
-
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".jfif", ".bmp"}
 
 # Configuración de contacto
 CONTACT_EMAIL = os.getenv("CONTACT_EMAIL", "travel@armansolutions.io")
 WHATSAPP_NUMBER = os.getenv("WHATSAPP_NUMBER", "5491134115485")
 
+# Cache-Control de las lecturas públicas en JSON: navegador y CDN guardan la respuesta
+# pero revalidan con If-None-Match (304 barato). Para que el CDN sirva sin consultar
+# se puede agregar s-maxage, a costa de que los cambios del admin tarden en verse.
+JSON_CACHE_CONTROL = os.getenv("JSON_CACHE_CONTROL", "public, no-cache")
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -147,6 +143,9 @@ class HotelUpdate(BaseModel):
     order_index: Optional[int] = None
     order_in_destination: Optional[int] = None
 
+class HotelSyncItem(HotelCreate):
+    id: Optional[int] = None  # None: hotel nuevo
+
 # Eventos de inicio y cierre
 @app.on_event("startup")
 async def startup():
@@ -168,18 +167,31 @@ async def startup():
                 print(f"⚠️ Error al inicializar base de datos (intento {attempt + 1}): {e}")
                 if attempt < max_retries - 1:
                     print("🔄 Reintentando en 2 segundos...")
-                    import time
-                    time.sleep(2)
+                    await asyncio.sleep(2)
         else:
             print(f"❌ Error de conexión a PostgreSQL (intento {attempt + 1}/{max_retries})")
             if attempt < max_retries - 1:
                 print("🔄 Reintentando conexión en 3 segundos...")
-                import time
-                time.sleep(3)
+                await asyncio.sleep(3)
+
+    # Iniciar la cola de notificaciones por email (re-encola las pendientes)
+    try:
+        await contact_mailer.start()
+    except Exception as e:
+        print(f"⚠️ No se pudo iniciar la cola de emails: {e}")
+
+    # Reintentar en segundo plano (y periódicamente) los borrados de Cloudinary que fallaron
+    app.state.cleanup_retry = asyncio.create_task(run_cleanup_retries())
 
 @app.on_event("shutdown")
 async def shutdown():
     print("🛑 Cerrando ARMAN TRAVEL API...")
+    cleanup_retry = getattr(app.state, "cleanup_retry", None)
+    if cleanup_retry is not None:
+        cleanup_retry.cancel()
+    await contact_mailer.stop()
+    shutdown_media_pool()
+    await async_engine.dispose()
 
 # Funciones de utilidad
 def verify_password(plain_password, hashed_password):
@@ -228,101 +240,6 @@ def create_upload_directory():
     if not os.path.exists(UPLOAD_DIR):
         os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def is_valid_image_file(filename: str) -> bool:
-    """Verificar si el archivo es una imagen válida"""
-    return any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS)
-
-def upload_to_cloudinary(file: UploadFile, folder: str = "arman-travel") -> str:
-    """Subir archivo a Cloudinary y retornar la URL"""
-
-    # Verificar que Cloudinary esté configurado
-    if not all([os.getenv("CLOUDINARY_CLOUD_NAME"), os.getenv("CLOUDINARY_API_KEY"), os.getenv("CLOUDINARY_API_SECRET")]):
-        raise HTTPException(status_code=500, detail="Cloudinary no está configurado correctamente")
-
-    try:
-        # Leer el archivo
-        file_content = file.file.read()
-        file.file.seek(0)  # Reset para posibles usos posteriores
-
-        # Generar public_id único
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        public_id = f"{folder}/{uuid.uuid4()}"
-
-        # Subir a Cloudinary con optimizaciones
-        upload_result = cloudinary.uploader.upload(
-            file_content,
-            public_id=public_id,
-            resource_type="image",
-            transformation=[
-                {"width": 1200, "height": 800, "crop": "limit"}
-            ]
-        )
-
-        print(f"✅ Imagen subida a Cloudinary: {upload_result.get('secure_url')}")
-
-        return upload_result.get('secure_url')
-
-    except Exception as e:
-        print(f"❌ Error al subir imagen a Cloudinary: {e}")
-        raise HTTPException(status_code=500, detail=f"Error al subir imagen: {str(e)}")
-
-def extract_cloudinary_public_id(image_url: str) -> str:
-    """Extraer public_id de una URL de Cloudinary"""
-    if not image_url or "cloudinary.com" not in image_url:
-        return None
-
-    try:
-        # Ejemplo URL: https://res.cloudinary.com/cloud/image/upload/v1234567890/arman-travel/covers/uuid.jpg
-        # Queremos extraer: arman-travel/covers/uuid
-        parts = image_url.split('/')
-        if 'upload' in parts:
-            upload_index = parts.index('upload')
-            # Tomar todo después de 'upload' excepto la versión (v1234567890)
-            public_id_parts = parts[upload_index + 1:]
-
-            # Remover versión si existe (empieza con 'v' y seguido de números)
-            if public_id_parts and public_id_parts[0].startswith('v') and public_id_parts[0][1:].isdigit():
-                public_id_parts = public_id_parts[1:]
-
-            # Unir las partes y remover extensión
-            public_id = '/'.join(public_id_parts)
-            if '.' in public_id:
-                public_id = public_id.rsplit('.', 1)[0]
-
-            return public_id
-    except Exception as e:
-        print(f"❌ Error extrayendo public_id de {image_url}: {e}")
-        return None
-
-def delete_cloudinary_image(image_url: str) -> bool:
-    """Eliminar imagen de Cloudinary usando su URL"""
-    if not image_url:
-        return False
-
-    public_id = extract_cloudinary_public_id(image_url)
-    if not public_id:
-        print(f"⚠️ No es una URL de Cloudinary o no se pudo extraer public_id: {image_url}")
-        return False
-
-    try:
-        # Eliminar de Cloudinary
-        result = cloudinary.uploader.destroy(public_id)
-
-        if result.get('result') == 'ok':
-            print(f"✅ Imagen eliminada de Cloudinary: {public_id}")
-            return True
-        else:
-            print(f"⚠️ No se pudo eliminar imagen de Cloudinary: {result}")
-            return False
-
-    except Exception as e:
-        print(f"❌ Error eliminando imagen de Cloudinary {public_id}: {e}")
-        return False
-        
-    except Exception as e:
-        print(f"❌ Error subiendo a Cloudinary: {e}")
-        raise HTTPException(status_code=500, detail=f"Error subiendo imagen a Cloudinary: {str(e)}")
-
 def save_uploaded_file_local(file: UploadFile) -> str:
     """Guardar archivo localmente (fallback)"""
     create_upload_directory()
@@ -340,42 +257,6 @@ def save_uploaded_file_local(file: UploadFile) -> str:
     # Retornar URL relativa
     return f"/static/uploads/{unique_filename}"
 
-# Función para enviar emails
-async def send_email(subject: str, body: str, sender_name: str = "ARMAN TRAVEL", sender_email: str = ""):
-    """
-    Envía un email usando Gmail SMTP
-    """
-    try:
-        # Crear mensaje
-        message = MIMEMultipart()
-        message["From"] = f"{sender_name} <{SMTP_USER}>"
-        message["To"] = RECIPIENT_EMAIL
-        message["Subject"] = subject
-        
-        # Agregar cuerpo del mensaje
-        message.attach(MIMEText(body, "plain", "utf-8"))
-        
-        # Solo intentar enviar si hay contraseña configurada
-        if SMTP_PASSWORD:
-            # Crear conexión SMTP segura
-            context = ssl.create_default_context()
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-                server.starttls(context=context)
-                server.login(SMTP_USER, SMTP_PASSWORD)
-                server.send_message(message)
-            
-            print(f"✅ Email enviado correctamente a {RECIPIENT_EMAIL}")
-        else:
-            print(f"⚠️ Email NO enviado - configuración SMTP no disponible")
-            print(f"📧 Contenido del email:")
-            print(f"Asunto: {subject}")
-            print(f"Destinatario: {RECIPIENT_EMAIL}")
-            print(f"Mensaje:\n{body}")
-            
-    except Exception as e:
-        print(f"❌ Error al enviar email: {e}")
-        # No lanzamos excepción para no romper el flujo principal
-
 # Servir archivos estáticos
 # Docker: frontend está en /app/frontend, ejecutamos desde /app/backend
 # Local: frontend está en ../frontend
@@ -391,8 +272,12 @@ print(f"📁 Frontend exists: {os.path.exists(frontend_dir)}")
 
 # Solo montar si el directorio static existe
 static_dir = f"{frontend_dir}/static"
+# Hash de contenido de cada archivo estático: los HTML apuntan a URLs con fingerprint cacheables por un año
+asset_manifest = AssetManifest(static_dir)
+if ASSET_FINGERPRINT:
+    asset_manifest.build()
 if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.mount("/static", FingerprintedStaticFiles(directory=static_dir, manifest=asset_manifest), name="static")
     print(f"✅ Static files mounted from: {static_dir}")
 else:
     print(f"⚠️ Static directory not found: {static_dir}")
@@ -402,140 +287,119 @@ UPLOAD_DIR = f"{frontend_dir}/static/uploads"
 print(f"📁 Upload directory: {UPLOAD_DIR}")
 
 # Función helper para servir archivos HTML
-def get_html_file(filename: str, fallback_content: str = None):
-    try:
-        file_path = f"{frontend_dir}/{filename}"
-        with open(file_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        default_content = fallback_content or f"<h1>Archivo {filename} no encontrado</h1><p>El archivo no está disponible.</p>"
-        return HTMLResponse(content=default_content)
+# Se leen una sola vez, quedan precomprimidas en memoria y se recargan si cambia el archivo
+html_shells = HTMLShellRegistry(frontend_dir, transform=asset_manifest.rewrite_html)
+# package-detail.html es un template Jinja2 (renderizado en el servidor)
+package_pages = PackagePageRenderer(frontend_dir, transform=asset_manifest.rewrite_html)
+
+def get_html_file(request: Request, filename: str, fallback_content: str = None):
+    return html_shells.get(filename, fallback_content).response(request)
+
+# Función helper para respuestas públicas del catálogo cacheadas ya serializadas
+# build puede devolver un CatalogPage: se serializan sus items y se cachean sus headers (cursor)
+# Si el cliente (o el CDN) ya tiene la versión cacheada se responde 304 sin consultar ni serializar,
+# y la versión comprimida se guarda en la misma entrada
+async def cached_json_response(request: Request, cache_key, build, package_id=None):
+    entry = catalog_cache.get(cache_key, package_id)
+    if entry is None:
+        version = catalog_cache.version(package_id)
+        data = await build()
+        headers = {}
+        if isinstance(data, CatalogPage):
+            data, headers = data.items, data.headers()
+        entry = CachedJSON(dumps(data), headers)
+        catalog_cache.set(cache_key, entry, package_id, version)
+
+    return compressed_response(request, entry, "application/json", cache_control=JSON_CACHE_CONTROL, headers=entry.headers)
 
 # Endpoints
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
-    return get_html_file("index.html", "<h1>ARMAN TRAVEL</h1><p>Página principal no disponible</p>")
+async def read_root(request: Request):
+    return get_html_file(request, "index.html", "<h1>ARMAN TRAVEL</h1><p>Página principal no disponible</p>")
 
 @app.get("/index.html", response_class=HTMLResponse)
-async def read_index():
-    return get_html_file("index.html", "<h1>ARMAN TRAVEL</h1><p>Página principal no disponible</p>")
+async def read_index(request: Request):
+    return get_html_file(request, "index.html", "<h1>ARMAN TRAVEL</h1><p>Página principal no disponible</p>")
 
 @app.get("/admin.html", response_class=HTMLResponse)
-async def read_admin_html():
-    return get_html_file("admin.html", "<h1>Panel de Administración</h1><p>Panel no disponible</p>")
+async def read_admin_html(request: Request):
+    return get_html_file(request, "admin.html", "<h1>Panel de Administración</h1><p>Panel no disponible</p>")
 
 @app.get("/admin", response_class=HTMLResponse)
-async def read_admin():
-    return get_html_file("admin.html", "<h1>Panel de Administración</h1><p>Panel no disponible</p>")
-
-@app.get("/paquete-f1/pdf")
-async def paquete_f1_pdf():
-    possible_paths = [
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "archivos", "BROCHURE-F1-SAO-PAULO-ARMAN-TRAVEL.pdf"),
-        os.path.join("..", "archivos", "BROCHURE-F1-SAO-PAULO-ARMAN-TRAVEL.pdf"),
-        os.path.join("archivos", "BROCHURE-F1-SAO-PAULO-ARMAN-TRAVEL.pdf"),
-    ]
-    for pdf_path in possible_paths:
-        if os.path.exists(pdf_path):
-            return FileResponse(pdf_path, media_type="application/pdf")
-    raise HTTPException(status_code=404, detail="PDF no encontrado")
-
-@app.get("/paquete-f1", response_class=HTMLResponse)
-async def paquete_f1():
-    return HTMLResponse(content="""<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Paquete F1 - ARMAN TRAVEL</title>
-    <link rel="icon" type="image/png" href="/static/images/logo_arman.PNG">
-    <style>
-        * { margin: 0; padding: 0; }
-        html, body { width: 100%; height: 100%; overflow: hidden; }
-        iframe { width: 100%; height: 100%; border: none; }
-    </style>
-</head>
-<body>
-    <iframe src="/paquete-f1/pdf"></iframe>
-</body>
-</html>""")
-
-@app.get("/paquete-mundial/pdf")
-async def paquete_mundial_pdf():
-    possible_paths = [
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "archivos", "BROCHURE-MUNDIAL-ARMAN-TRAVEL.pdf"),
-        os.path.join("..", "archivos", "BROCHURE-MUNDIAL-ARMAN-TRAVEL.pdf"),
-        os.path.join("archivos", "BROCHURE-MUNDIAL-ARMAN-TRAVEL.pdf"),
-    ]
-    for pdf_path in possible_paths:
-        if os.path.exists(pdf_path):
-            return FileResponse(pdf_path, media_type="application/pdf")
-    raise HTTPException(status_code=404, detail="PDF no encontrado")
-
-@app.get("/paquete-mundial", response_class=HTMLResponse)
-async def paquete_mundial():
-    return HTMLResponse(content="""<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Paquete Mundial - ARMAN TRAVEL</title>
-    <link rel="icon" type="image/png" href="/static/images/logo_arman.PNG">
-    <style>
-        * { margin: 0; padding: 0; }
-        html, body { width: 100%; height: 100%; overflow: hidden; }
-        iframe { width: 100%; height: 100%; border: none; }
-    </style>
-</head>
-<body>
-    <iframe src="/paquete-mundial/pdf"></iframe>
-</body>
-</html>""")
+async def read_admin(request: Request):
+    return get_html_file(request, "admin.html", "<h1>Panel de Administración</h1><p>Panel no disponible</p>")
+
+# Folletos PDF de archivos/, rutas resueltas al iniciar (/paquete-{slug} y /paquete-{slug}/pdf)
+brochure_registry = BrochureRegistry(BROCHURE_DIRS).scan()
+brochure_pages = {}
+
+@app.api_route("/paquete-{slug}/pdf", methods=["GET", "HEAD"])
+async def brochure_pdf(slug: str, request: Request):
+    brochure = brochure_registry.get(slug)
+    if not brochure:
+        raise HTTPException(status_code=404, detail="PDF no encontrado")
+    return brochure_response(request, brochure)
+
+@app.get("/paquete-{slug}", response_class=HTMLResponse)
+async def brochure_page(slug: str, request: Request):
+    # El visor no depende del PDF (si falta, el iframe muestra el 404 de /pdf)
+    if not brochure_registry.has_page(slug):
+        raise HTTPException(status_code=404, detail="Folleto no encontrado")
+    page = brochure_pages.get(slug)
+    if page is None:
+        page = HTMLShell(content=brochure_viewer_html(brochure_title(slug), f"/paquete-{slug}/pdf"), transform=asset_manifest.rewrite_html)
+        brochure_pages[slug] = page
+    return page.response(request)
 
 @app.get("/package-detail/{package_id}", response_class=HTMLResponse)
-async def read_package_detail(package_id: int):
-    return get_html_file("package-detail.html", "<h1>Detalle del Paquete</h1><p>Página no disponible</p>")
+async def read_package_detail(package_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Detalle renderizado en el servidor con los datos embebidos; cacheado por paquete"""
+    if not PACKAGE_SSR:
+        return compressed_response(request, package_pages.shell(), "text/html")
+
+    try:
+        cache_key = ("page", package_id, package_pages.template_version())
+        body = catalog_cache.get(cache_key, package_id)
+        if body is None:
+            version = catalog_cache.version(package_id)
+            detail = await load_package_detail(db, package_id)
+            if detail is None:
+                # El JS muestra "Paquete no encontrado"; el 404 evita que se indexe
+                return compressed_response(request, package_pages.shell(), "text/html", status_code=404)
+            body = package_pages.render_body(detail)
+            catalog_cache.set(cache_key, body, package_id, version)
+
+        return compressed_response(request, body, "text/html")
+
+    except Exception as e:
+        # Si falla el render, el shell sigue funcionando cargando los datos desde el navegador
+        print(f"❌ Error al renderizar detalle del paquete {package_id}: {e}")
+        return compressed_response(request, package_pages.shell(), "text/html")
 
 @app.post("/contact")
-async def contact_message(message: ContactMessageCreate, db: Session = Depends(get_db)):
+async def contact_message(message: ContactMessageCreate, db: AsyncSession = Depends(get_db)):
     try:
         # Crear nuevo mensaje de contacto
         db_message = ContactMessage(
             name=message.name,
             email=message.email,
             phone=message.phone,
-            message=message.message
+            message=message.message,
+            email_status=EMAIL_PENDING
         )
         db.add(db_message)
-        db.commit()
-        db.refresh(db_message)
-        
-        # Enviar email de notificación
-        subject = f"Nueva consulta de {message.name} - ARMAN TRAVEL"
-        email_body = f"""
-Nueva consulta recibida en ARMAN TRAVEL
-
-Datos del cliente:
-• Nombre: {message.name}
-• Email: {message.email}
-• Teléfono: {message.phone or 'No proporcionado'}
-
-Mensaje:
-{message.message}
+        await db.commit()
 
----
-Enviado desde el sitio web de ARMAN TRAVEL
-Fecha: {datetime.utcnow().strftime('%d/%m/%Y %H:%M:%S')} UTC
-        """
-        
-        await send_email(subject, email_body.strip(), message.name, message.email)
+        # La notificación por email se envía en segundo plano; si el proceso se reinicia,
+        # el mensaje sigue como 'pending' y se re-encola al iniciar
+        contact_mailer.enqueue(db_message.id)
         
         return {"message": "Mensaje enviado correctamente"}
             
     except Exception as e:
         print(f"Error al procesar mensaje de contacto: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 @app.post("/admin/login")
@@ -566,62 +430,100 @@ async def refresh_token(token_data = Depends(verify_token)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/packages/promoted")
-async def get_promoted_packages(db: Session = Depends(get_db)):
+async def get_promoted_packages(request: Request, fields: Optional[str] = None, db: AsyncSession = Depends(get_db)):
     """Obtener paquetes promocionados para el carrusel, ordenados por carousel_order"""
     try:
-        packages = db.query(Package).filter(
-            Package.promoted == True
-        ).order_by(Package.carousel_order, Package.id).all()
-        
-        return [get_package_with_features(package, db) for package in packages]
-        
+        selected_fields = parse_fields(fields)
+        return await cached_json_response(request, ("packages", "promoted", selected_fields), lambda: load_catalog(db, promoted_only=True, fields=selected_fields))
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error al obtener paquetes promocionados: {e}")
         raise HTTPException(status_code=500, detail="Error al obtener paquetes promocionados")
 
-def extract_price_value(price_string):
-    """Extraer valor numérico de un string de precio"""
-    # Buscar números en el string, incluyendo decimales
-    numbers = re.findall(r'[\d,]+\.?\d*', price_string.replace(',', ''))
-    if numbers:
-        try:
-            return float(numbers[0])
-        except ValueError:
-            return float('inf')  # Si no se puede convertir, devolver infinito para que no sea el menor
-    return float('inf')
-
-def get_package_with_features(package, db):
-    """Helper para obtener un paquete con sus features de la base de datos y calcular precio"""
-    package_dict = package.to_dict()
-    
-    # Obtener features de la base de datos
-    db_features = db.query(PackageFeature).filter(
-        PackageFeature.package_id == package.id
-    ).order_by(PackageFeature.order_index).all()
-    
-    # Si hay features en la base de datos, usarlas; sino usar las hardcodeadas
-    if db_features:
-        package_dict['features'] = [feature.text for feature in db_features]
-    
-    return package_dict
-
 @app.get("/packages")
-async def get_packages(db: Session = Depends(get_db)):
+async def get_packages(
+    request: Request,
+    category: Optional[str] = None,
+    destination: Optional[str] = None,
+    promoted: Optional[bool] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    sort: str = "id",
+    limit: Optional[int] = Query(None, ge=1, le=CATALOG_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Listado de paquetes con filtros, orden y paginación por cursor.
+
+    Sin parámetros devuelve el catálogo completo. Con limit/cursor la respuesta trae el
+    header X-Next-Cursor mientras haya más páginas. fields=card (o una lista de campos)
+    devuelve solo esas claves y lee solo esas columnas. sort=price/-price, min_price y
+    max_price requieren currency.
+    """
+    if sort not in CATALOG_SORTS:
+        raise HTTPException(status_code=400, detail=f"Orden inválido. Opciones: {', '.join(CATALOG_SORTS)}")
     try:
-        packages = db.query(Package).all()
-        return [get_package_with_features(package, db) for package in packages]
-        
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filters = {
+        "category": category,
+        "destination": destination.strip() if destination else None,
+        "promoted": promoted,
+        "min_price": Decimal(str(min_price)) if min_price is not None else None,
+        "max_price": Decimal(str(max_price)) if max_price is not None else None,
+        "currency": currency.upper() if currency else None,
+        "sort": sort,
+        "limit": limit,
+        "cursor": cursor,
+        "fields": selected_fields
+    }
+    try:
+        cache_key = ("packages",) + tuple(filters.values())
+        return await cached_json_response(request, cache_key, lambda: load_catalog_page(db, **filters))
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error al obtener paquetes: {e}")
         raise HTTPException(status_code=500, detail="Error al obtener paquetes")
 
+# Debe declararse antes de /packages/{package_id} para que "search" no se tome como id
+@app.get("/packages/search")
+async def search_packages_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_RESULTS),
+    db: AsyncSession = Depends(get_db)
+):
+    """Búsqueda de texto completo en paquetes, ordenada por relevancia"""
+    try:
+        async def build():
+            packages = await search_packages(db, q, limit)
+            return await serialize_packages(db, packages)
+
+        return await cached_json_response(request, ("search", normalize_search_text(q).strip(), limit), build)
+
+    except Exception as e:
+        print(f"Error al buscar paquetes: {e}")
+        raise HTTPException(status_code=500, detail="Error al buscar paquetes")
+
 @app.get("/packages/{package_id}")
-async def get_package(package_id: int, db: Session = Depends(get_db)):
+async def get_package(request: Request, package_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        package = db.query(Package).filter(Package.id == package_id).first()
-        if not package:
-            raise HTTPException(status_code=404, detail="Paquete no encontrado")
-        return get_package_with_features(package, db)
+        async def build():
+            package = await db.get(Package, package_id)
+            if not package:
+                raise HTTPException(status_code=404, detail="Paquete no encontrado")
+            return (await serialize_packages(db, [package]))[0]
+
+        return await cached_json_response(request, ("package", package_id), build, package_id)
         
     except HTTPException:
         raise
@@ -629,8 +531,26 @@ async def get_package(package_id: int, db: Session = Depends(get_db)):
         print(f"Error al obtener paquete: {e}")
         raise HTTPException(status_code=500, detail="Error al obtener paquete")
 
+@app.get("/packages/{package_id}/full")
+async def get_package_full(request: Request, package_id: int, db: AsyncSession = Depends(get_db)):
+    """Obtener el detalle completo de un paquete (galería, hoteles, info y features) en una sola respuesta"""
+    try:
+        async def build():
+            detail = await load_package_detail(db, package_id)
+            if detail is None:
+                raise HTTPException(status_code=404, detail="Paquete no encontrado")
+            return detail
+
+        return await cached_json_response(request, ("full", package_id), build, package_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error al obtener detalle completo del paquete: {e}")
+        raise HTTPException(status_code=500, detail="Error al obtener paquete")
+
 @app.post("/admin/packages")
-async def create_package(package: PackageCreate, username: str = Depends(verify_token), db: Session = Depends(get_db)):
+async def create_package(package: PackageCreate, username: str = Depends(verify_token), db: AsyncSession = Depends(get_db)):
     try:
         # Crear nuevo paquete
         db_package = Package(
@@ -649,20 +569,23 @@ async def create_package(package: PackageCreate, username: str = Depends(verify_
             carousel_order=package.carousel_order
         )
         db.add(db_package)
-        db.commit()
-        db.refresh(db_package)
+        await db.flush()
+        await refresh_search_document(db, db_package.id)
+        await db.commit()
+        await db.refresh(db_package)
+        catalog_cache.invalidate_package(db_package.id)
         
         return db_package.to_dict()
             
     except Exception as e:
         print(f"Error al crear paquete: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 @app.put("/admin/packages/{package_id}")
-async def update_package(package_id: int, package: PackageUpdate, username: str = Depends(verify_token), db: Session = Depends(get_db)):
+async def update_package(package_id: int, package: PackageUpdate, username: str = Depends(verify_token), db: AsyncSession = Depends(get_db)):
     try:
-        db_package = db.query(Package).filter(Package.id == package_id).first()
+        db_package = await db.get(Package, package_id)
         if not db_package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
 
@@ -678,12 +601,12 @@ async def update_package(package_id: int, package: PackageUpdate, username: str
         for field, value in update_data.items():
             setattr(db_package, field, value)
 
-        db.flush()
-        db.commit()
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
 
         # Re-query to verify the change persisted
-        db.expire_all()
-        db_package = db.query(Package).filter(Package.id == package_id).first()
+        await db.refresh(db_package)
 
         print(f"Precio después de actualizar: {db_package.price}")
 
@@ -693,48 +616,49 @@ async def update_package(package_id: int, package: PackageUpdate, username: str
         raise
     except Exception as e:
         print(f"Error al actualizar paquete: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 @app.delete("/admin/packages/{package_id}")
-async def delete_package(package_id: int, username: str = Depends(verify_token), db: Session = Depends(get_db)):
+async def delete_package(package_id: int, background_tasks: BackgroundTasks, username: str = Depends(verify_token), db: AsyncSession = Depends(get_db)):
     try:
-        db_package = db.query(Package).filter(Package.id == package_id).first()
+        db_package = await db.get(Package, package_id)
         if not db_package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
 
-        # Eliminar imagen de portada de Cloudinary si existe
-        if db_package.image:
-            delete_cloudinary_image(db_package.image)
-
-        # Eliminar imágenes de galería de Cloudinary
-        gallery_images = db.query(PackageGalleryImage).filter(PackageGalleryImage.package_id == package_id).all()
-        for gallery_image in gallery_images:
-            if gallery_image.image_url:
-                if gallery_image.image_url.startswith("/static/uploads/"):
-                    # Archivo local
-                    file_path = f"frontend{gallery_image.image_url}"
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                else:
-                    # Imagen de Cloudinary
-                    delete_cloudinary_image(gallery_image.image_url)
-
-        # Eliminar imágenes de hoteles de Cloudinary
-        hotels = db.query(PackageHotel).filter(PackageHotel.package_id == package_id).all()
-        for hotel in hotels:
-            if hotel.image_url:
-                delete_cloudinary_image(hotel.image_url)
+        # Juntar las imágenes a borrar; se eliminan después del commit, fuera del request
+        public_ids = []
+        local_paths = []
+        image_urls = [db_package.image]
+        for model in (PackageGalleryImage, PackageHotel):
+            rows = (await db.execute(select(model.image_url, model.variants).where(model.package_id == package_id))).all()
+            for image_url, variants in rows:
+                image_urls.extend([image_url, *variant_urls(variants)])
+        for image_url in image_urls:
+            if not image_url:
+                continue
+            if image_url.startswith("/static/uploads/"):
+                # Archivo local
+                local_paths.append(f"frontend{image_url}")
+            else:
+                public_id = extract_cloudinary_public_id(image_url)
+                if public_id:
+                    public_ids.append(public_id)
 
-        # Eliminar registros relacionados de la base de datos
-        db.query(PackageGalleryImage).filter(PackageGalleryImage.package_id == package_id).delete()
-        db.query(PackageHotel).filter(PackageHotel.package_id == package_id).delete()
-        db.query(PackageInfo).filter(PackageInfo.package_id == package_id).delete()
-        db.query(PackageFeature).filter(PackageFeature.package_id == package_id).delete()
+        # En PostgreSQL las tablas hijas se borran por ON DELETE CASCADE; SQLite no aplica
+        # las FK por defecto, ahí se borran a mano
+        if db.bind.dialect.name != "postgresql":
+            for model in PACKAGE_CHILD_MODELS:
+                await db.execute(delete(model).where(model.package_id == package_id))
 
         # Eliminar el paquete
-        db.delete(db_package)
-        db.commit()
+        await db.delete(db_package)
+        await db.commit()
+        # invalidate_all y no invalidate_package: así no queda la versión del paquete borrado
+        catalog_cache.invalidate_all()
+
+        # Limpieza de imágenes en segundo plano (los fallos quedan en asset_cleanup_failures)
+        background_tasks.add_task(cleanup_assets, public_ids, local_paths)
 
         return {"message": "Paquete eliminado correctamente"}
             
@@ -742,19 +666,29 @@ async def delete_package(package_id: int, username: str = Depends(verify_token),
         raise
     except Exception as e:
         print(f"Error al eliminar paquete: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 @app.get("/admin/contact-messages")
-async def get_contact_messages(username: str = Depends(verify_token), db: Session = Depends(get_db)):
+async def get_contact_messages(username: str = Depends(verify_token), db: AsyncSession = Depends(get_db)):
     try:
-        messages = db.query(ContactMessage).order_by(ContactMessage.created_at.desc()).all()
+        messages = (await db.scalars(select(ContactMessage).order_by(ContactMessage.created_at.desc()))).all()
         return [message.to_dict() for message in messages]
             
     except Exception as e:
         print(f"Error al obtener mensajes: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+@app.get("/admin/cache/stats")
+async def get_cache_stats(username: str = Depends(verify_token)):
+    """Estadísticas de la caché del catálogo público"""
+    return catalog_cache.stats()
+
+@app.get("/admin/db/pool")
+async def get_db_pool_stats(username: str = Depends(verify_token)):
+    """Estadísticas del pool de conexiones (para dimensionarlo según la cantidad de workers)"""
+    return get_pool_stats()
+
 @app.get("/health")
 async def health_check():
     return {"status": "OK", "message": "ARMAN TRAVEL API funcionando correctamente", "database": "PostgreSQL"}
@@ -765,27 +699,28 @@ async def logs_stream_dummy():
     return {"status": "disabled", "message": "Logs endpoint disabled"}
 
 @app.get("/config")
-async def get_config():
+async def get_config(request: Request):
     """Endpoint para obtener configuración de contacto"""
-    return {
-        "whatsapp_number": WHATSAPP_NUMBER,
-        "recipient_email": RECIPIENT_EMAIL,
-        "cloudinary_configured": bool(
-            os.getenv("CLOUDINARY_CLOUD_NAME") and 
-            os.getenv("CLOUDINARY_API_KEY") and 
-            os.getenv("CLOUDINARY_API_SECRET")
-        )
-    }
+    async def build():
+        return {
+            "whatsapp_number": WHATSAPP_NUMBER,
+            "recipient_email": RECIPIENT_EMAIL,
+            "cloudinary_configured": is_cloudinary_configured()
+        }
+
+    return await cached_json_response(request, ("config",), build)
 
 @app.get("/config/contact")
-async def get_contact_config():
+async def get_contact_config(request: Request):
     """Endpoint para obtener la configuración de contacto"""
-    return {
-        "email": CONTACT_EMAIL,
-        "whatsapp": WHATSAPP_NUMBER,
-        "whatsapp_url": f"https://wa.me/{WHATSAPP_NUMBER}"
+    async def build():
+        return {
+            "email": CONTACT_EMAIL,
+            "whatsapp": WHATSAPP_NUMBER,
+            "whatsapp_url": f"https://wa.me/{WHATSAPP_NUMBER}"
+        }
 
-    }
+    return await cached_json_response(request, ("config", "contact"), build)
 
 @app.get("/debug")
 async def debug_files():
@@ -804,7 +739,7 @@ async def debug_files():
         admin_exists = os.path.exists("frontend/admin.html")
         
         # Verificar conexión a la base de datos
-        db_connection = test_connection()
+        db_connection = await test_async_connection()
         
         return {
             "current_directory": os.getcwd(),
@@ -823,20 +758,23 @@ async def debug_files():
 # === ENDPOINTS PARA GALERÍA DE IMÁGENES ===
 
 @app.get("/packages/{package_id}/gallery")
-async def get_package_gallery(package_id: int, db: Session = Depends(get_db)):
+async def get_package_gallery(request: Request, package_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener galería de imágenes de un paquete"""
     try:
-        # Verificar que el paquete existe
-        package = db.query(Package).filter(Package.id == package_id).first()
-        if not package:
-            raise HTTPException(status_code=404, detail="Paquete no encontrado")
-        
-        # Obtener imágenes de galería
-        gallery_images = db.query(PackageGalleryImage).filter(
-            PackageGalleryImage.package_id == package_id
-        ).order_by(PackageGalleryImage.order_index, PackageGalleryImage.id).all()
-        
-        return [img.to_dict() for img in gallery_images]
+        async def build():
+            # Verificar que el paquete existe
+            package = await db.get(Package, package_id)
+            if not package:
+                raise HTTPException(status_code=404, detail="Paquete no encontrado")
+
+            # Obtener imágenes de galería
+            gallery_images = (await db.scalars(select(PackageGalleryImage).where(
+                PackageGalleryImage.package_id == package_id
+            ).order_by(PackageGalleryImage.order_index, PackageGalleryImage.id))).all()
+
+            return [img.to_dict() for img in gallery_images]
+
+        return await cached_json_response(request, ("gallery", package_id), build, package_id)
         
     except HTTPException:
         raise
@@ -852,43 +790,26 @@ async def upload_gallery_image(
     order_index: int = Form(0),
     is_cover: int = Form(0),
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Subir imagen a la galería de un paquete"""
     try:
         # Verificar que el paquete existe
-        package = db.query(Package).filter(Package.id == package_id).first()
+        package = await db.get(Package, package_id)
         if not package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
-        # Validar archivo
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No se proporcionó archivo")
-        
-        if not is_valid_image_file(file.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Tipo de archivo no válido. Permitidos: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
-        
-        # Verificar tamaño
-        file.file.seek(0, 2)  # Ir al final del archivo
-        file_size = file.file.tell()
-        file.file.seek(0)  # Volver al inicio
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Archivo muy grande. Máximo permitido: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
-            )
+        # Validar archivo (tamaño y magic bytes)
+        await validate_image_upload(file)
         
         # Subir archivo a Cloudinary
-        image_url = upload_to_cloudinary(file, "arman-travel/gallery")
+        image_url, variants = await upload_processed_image(file, "arman-travel/gallery")
         
         # Crear entrada en la base de datos
         gallery_image = PackageGalleryImage(
             package_id=package_id,
             image_url=image_url,
+            variants=variants,
             image_filename=file.filename,
             caption=caption,
             order_index=order_index,
@@ -896,8 +817,9 @@ async def upload_gallery_image(
         )
         
         db.add(gallery_image)
-        db.commit()
-        db.refresh(gallery_image)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(gallery_image)
         
         return gallery_image.to_dict()
         
@@ -905,7 +827,7 @@ async def upload_gallery_image(
         raise
     except Exception as e:
         print(f"Error al subir imagen: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al subir imagen")
 
 @app.post("/admin/packages/{package_id}/gallery/url")
@@ -913,12 +835,12 @@ async def add_gallery_image_url(
     package_id: int,
     image_data: GalleryImageCreate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Agregar imagen por URL a la galería de un paquete"""
     try:
         # Verificar que el paquete existe
-        package = db.query(Package).filter(Package.id == package_id).first()
+        package = await db.get(Package, package_id)
         if not package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
@@ -935,8 +857,9 @@ async def add_gallery_image_url(
         )
         
         db.add(gallery_image)
-        db.commit()
-        db.refresh(gallery_image)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(gallery_image)
         
         return gallery_image.to_dict()
         
@@ -944,7 +867,7 @@ async def add_gallery_image_url(
         raise
     except Exception as e:
         print(f"Error al agregar imagen por URL: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al agregar imagen")
 
 @app.put("/admin/packages/{package_id}/gallery/{image_id}")
@@ -953,14 +876,14 @@ async def update_gallery_image(
     image_id: int,
     image_data: GalleryImageCreate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar imagen de galería"""
     try:
-        gallery_image = db.query(PackageGalleryImage).filter(
+        gallery_image = await db.scalar(select(PackageGalleryImage).where(
             PackageGalleryImage.id == image_id,
             PackageGalleryImage.package_id == package_id
-        ).first()
+        ))
         
         if not gallery_image:
             raise HTTPException(status_code=404, detail="Imagen no encontrada")
@@ -972,11 +895,13 @@ async def update_gallery_image(
             gallery_image.order_index = image_data.order_index
         if image_data.is_cover is not None:
             gallery_image.is_cover = image_data.is_cover
-        if image_data.image_url is not None:
+        if image_data.image_url is not None and image_data.image_url != gallery_image.image_url:
             gallery_image.image_url = image_data.image_url
+            gallery_image.variants = None  # Las variantes eran de la imagen anterior
         
-        db.commit()
-        db.refresh(gallery_image)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(gallery_image)
         
         return gallery_image.to_dict()
         
@@ -984,7 +909,7 @@ async def update_gallery_image(
         raise
     except Exception as e:
         print(f"Error al actualizar imagen: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al actualizar imagen")
 
 @app.delete("/admin/packages/{package_id}/gallery/{image_id}")
@@ -992,31 +917,36 @@ async def delete_gallery_image(
     package_id: int,
     image_id: int,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Eliminar imagen de galería"""
     try:
-        gallery_image = db.query(PackageGalleryImage).filter(
+        gallery_image = await db.scalar(select(PackageGalleryImage).where(
             PackageGalleryImage.id == image_id,
             PackageGalleryImage.package_id == package_id
-        ).first()
+        ))
 
         if not gallery_image:
             raise HTTPException(status_code=404, detail="Imagen no encontrada")
 
-        # Eliminar archivo según el tipo
-        if gallery_image.image_url:
-            if gallery_image.image_url.startswith("/static/uploads/"):
+        # Eliminar archivos (imagen y variantes) según el tipo
+        cloudinary_urls = []
+        for image_url in [gallery_image.image_url, *variant_urls(gallery_image.variants)]:
+            if not image_url:
+                continue
+            if image_url.startswith("/static/uploads/"):
                 # Archivo local - eliminar del servidor
-                file_path = f"frontend{gallery_image.image_url}"
+                file_path = f"frontend{image_url}"
                 if os.path.exists(file_path):
                     os.remove(file_path)
             else:
-                # Imagen de Cloudinary - eliminar de Cloudinary
-                delete_cloudinary_image(gallery_image.image_url)
+                cloudinary_urls.append(image_url)
+        # Imágenes de Cloudinary - eliminar en lote
+        await delete_images(cloudinary_urls)
 
-        db.delete(gallery_image)
-        db.commit()
+        await db.delete(gallery_image)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
         
         return {"message": "Imagen eliminada correctamente"}
         
@@ -1024,7 +954,7 @@ async def delete_gallery_image(
         raise
     except Exception as e:
         print(f"Error al eliminar imagen: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al eliminar imagen")
 
 @app.post("/admin/upload-cover-image")
@@ -1034,34 +964,16 @@ async def upload_cover_image(
 ):
     """Subir imagen de portada y retornar URL"""
     try:
-        # Validar archivo
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No se proporcionó archivo")
-        
-        if not is_valid_image_file(file.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Tipo de archivo no válido. Permitidos: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
-        
-        # Verificar tamaño
-        file.file.seek(0, 2)  # Ir al final del archivo
-        file_size = file.file.tell()
-        file.file.seek(0)  # Volver al inicio
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Archivo muy grande. Máximo permitido: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
-            )
+        # Validar archivo (tamaño y magic bytes)
+        await validate_image_upload(file)
         
         # Subir archivo a Cloudinary  
-        image_url = upload_to_cloudinary(file, "arman-travel/covers")
+        image_url = await upload_image(file, "arman-travel/covers")
         
         return {
             "image_url": image_url,
             "filename": file.filename,
-            "size": file_size
+            "size": file.size
         }
         
     except HTTPException:
@@ -1077,11 +989,11 @@ async def toggle_package_promotion(
     package_id: int, 
     promoted: bool,
     username: str = Depends(verify_token), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Activar/desactivar promoción de un paquete"""
     try:
-        db_package = db.query(Package).filter(Package.id == package_id).first()
+        db_package = await db.get(Package, package_id)
         if not db_package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
@@ -1089,14 +1001,12 @@ async def toggle_package_promotion(
         
         # Si se está promocionando, asignar un orden por defecto
         if promoted and db_package.carousel_order == 0:
-            # Obtener el mayor orden actual y sumar 1
-            max_order = db.query(func.max(Package.carousel_order)).filter(
-                Package.promoted == True
-            ).scalar() or 0
-            db_package.carousel_order = max_order + 1
+            # Al final del carrusel (con lock: dos promociones a la vez no comparten orden)
+            db_package.carousel_order = await next_carousel_order(db)
         
-        db.commit()
-        db.refresh(db_package)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(db_package)
         
         return db_package.to_dict()
             
@@ -1104,7 +1014,7 @@ async def toggle_package_promotion(
         raise
     except Exception as e:
         print(f"Error al cambiar promoción: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al cambiar promoción")
 
 @app.put("/admin/packages/{package_id}/carousel-order")
@@ -1112,11 +1022,11 @@ async def update_carousel_order(
     package_id: int, 
     new_order: int,
     username: str = Depends(verify_token), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar orden del paquete en el carrusel"""
     try:
-        db_package = db.query(Package).filter(Package.id == package_id).first()
+        db_package = await db.get(Package, package_id)
         if not db_package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
@@ -1124,8 +1034,9 @@ async def update_carousel_order(
             raise HTTPException(status_code=400, detail="Solo se puede ordenar paquetes promocionados")
         
         db_package.carousel_order = new_order
-        db.commit()
-        db.refresh(db_package)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(db_package)
         
         return db_package.to_dict()
             
@@ -1133,69 +1044,60 @@ async def update_carousel_order(
         raise
     except Exception as e:
         print(f"Error al actualizar orden: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al actualizar orden")
 
 @app.post("/admin/packages/reorder-carousel")
 async def reorder_carousel_packages(
     package_orders: List[dict],  # [{"id": 1, "order": 1}, {"id": 2, "order": 2}]
     username: str = Depends(verify_token), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Reordenar múltiples paquetes del carrusel de una vez"""
+    """Reordenar múltiples paquetes del carrusel de una vez (un solo UPDATE)"""
     try:
-        for item in package_orders:
-            package_id = item.get("id")
-            new_order = item.get("order")
-            
-            if package_id and new_order is not None:
-                db_package = db.query(Package).filter(Package.id == package_id).first()
-                if db_package and db_package.promoted:
-                    db_package.carousel_order = new_order
-        
-        db.commit()
-        
-        # Retornar paquetes promocionados actualizados
-        promoted_packages = db.query(Package).filter(
-            Package.promoted == True
-        ).order_by(Package.carousel_order, Package.id).all()
+        # Si un id se repite gana el último orden enviado
+        orders = {
+            int(item["id"]): int(item["order"])
+            for item in package_orders
+            if item.get("id") and item.get("order") is not None
+        }
+        promoted_packages = await reorder_carousel(db, orders)
+        await db.commit()
+        catalog_cache.invalidate_all()
         
+        # Los paquetes actualizados salen del RETURNING del mismo UPDATE
         return [package.to_dict() for package in promoted_packages]
             
     except Exception as e:
         print(f"Error al reordenar carrusel: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al reordenar carrusel")
 
 # === ENDPOINTS PARA GESTIÓN DE HOTELES ===
 
 @app.get("/packages/{package_id}/hotels")
-async def get_package_hotels(package_id: int, db: Session = Depends(get_db)):
+async def get_package_hotels(request: Request, package_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener hoteles de un paquete agrupados por destino"""
     try:
-        # Verificar que el paquete existe
-        package = db.query(Package).filter(Package.id == package_id).first()
-        if not package:
-            raise HTTPException(status_code=404, detail="Paquete no encontrado")
-
-        # Obtener hoteles del paquete ordenados por destino y orden
-        hotels = db.query(PackageHotel).filter(
-            PackageHotel.package_id == package_id
-        ).order_by(
-            PackageHotel.destination,
-            PackageHotel.order_in_destination,
-            PackageHotel.order_index
-        ).all()
-
-        # Agrupar hoteles por destino
-        destinations = {}
-        for hotel in hotels:
-            destination = hotel.destination
-            if destination not in destinations:
-                destinations[destination] = []
-            destinations[destination].append(hotel.to_dict())
-
-        return destinations
+        async def build():
+            # Verificar que el paquete existe
+            package = await db.get(Package, package_id)
+            if not package:
+                raise HTTPException(status_code=404, detail="Paquete no encontrado")
+
+            # Obtener hoteles del paquete ordenados por destino y orden
+            hotels = (await db.scalars(select(PackageHotel).where(
+                PackageHotel.package_id == package_id
+            ).order_by(
+                PackageHotel.destination,
+                PackageHotel.order_in_destination,
+                PackageHotel.order_index
+            ))).all()
+
+            # Agrupar hoteles por destino
+            return group_hotels_by_destination(hotels)
+
+        return await cached_json_response(request, ("hotels", package_id), build, package_id)
         
     except HTTPException:
         raise
@@ -1208,7 +1110,7 @@ async def create_package_hotel(
     package_id: int,
     hotel_data: HotelCreate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Agregar hotel a un paquete"""
     try:
@@ -1216,7 +1118,7 @@ async def create_package_hotel(
         print(f"Datos recibidos: {hotel_data}")
         
         # Verificar que el paquete existe
-        package = db.query(Package).filter(Package.id == package_id).first()
+        package = await db.get(Package, package_id)
         if not package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
@@ -1244,9 +1146,11 @@ async def create_package_hotel(
             print("Agregando hotel a la sesión...")
             db.add(hotel)
             print("Hotel agregado, haciendo commit...")
-            db.commit()
+            await refresh_search_document(db, package_id)
+            await db.commit()
+            catalog_cache.invalidate_package(package_id)
             print("Commit exitoso, refrescando hotel...")
-            db.refresh(hotel)
+            await db.refresh(hotel)
             print("Hotel refrescado exitosamente")
             
             result = hotel.to_dict()
@@ -1255,14 +1159,14 @@ async def create_package_hotel(
         except Exception as db_error:
             print(f"Error en operación de base de datos: {db_error}")
             print(f"Tipo de error: {type(db_error)}")
-            db.rollback()
+            await db.rollback()
             raise
         
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error al crear hotel: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al crear hotel")
 
 @app.post("/admin/packages/{package_id}/hotels/upload")
@@ -1275,42 +1179,23 @@ async def upload_hotel_image(
     amenities: str = Form("[]"),  # JSON string de amenities
     order_index: int = Form(0),
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Subir imagen y crear hotel"""
     try:
         # Verificar que el paquete existe
-        package = db.query(Package).filter(Package.id == package_id).first()
+        package = await db.get(Package, package_id)
         if not package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
-        # Validar archivo
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No se proporcionó archivo")
-        
-        if not is_valid_image_file(file.filename):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Tipo de archivo no válido. Permitidos: {', '.join(ALLOWED_EXTENSIONS)}"
-            )
-        
-        # Verificar tamaño
-        file.file.seek(0, 2)
-        file_size = file.file.tell()
-        file.file.seek(0)
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Archivo muy grande. Máximo permitido: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
-            )
+        # Validar archivo (tamaño y magic bytes)
+        await validate_image_upload(file)
         
         # Subir archivo a Cloudinary
-        image_url = upload_to_cloudinary(file, "arman-travel/hotels")
+        image_url, variants = await upload_processed_image(file, "arman-travel/hotels")
         
         # Parsear amenities JSON
         try:
-            import json
             amenities_list = json.loads(amenities) if amenities else []
         except json.JSONDecodeError:
             amenities_list = []
@@ -1321,6 +1206,7 @@ async def upload_hotel_image(
             name=name,
             description=description if description else None,
             image_url=image_url,
+            variants=variants,
             price=price,
             amenities=amenities_list,
             destination="Destino principal",  # Default value, should be updated via admin
@@ -1332,8 +1218,10 @@ async def upload_hotel_image(
         )
         
         db.add(hotel)
-        db.commit()
-        db.refresh(hotel)
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(hotel)
         
         return hotel.to_dict()
         
@@ -1341,7 +1229,7 @@ async def upload_hotel_image(
         raise
     except Exception as e:
         print(f"Error al subir hotel: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al subir hotel")
 
 @app.put("/admin/packages/{package_id}/hotels/{hotel_id}")
@@ -1350,25 +1238,29 @@ async def update_package_hotel(
     hotel_id: int,
     hotel_data: HotelUpdate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar hotel de un paquete"""
     try:
-        hotel = db.query(PackageHotel).filter(
+        hotel = await db.scalar(select(PackageHotel).where(
             PackageHotel.id == hotel_id,
             PackageHotel.package_id == package_id
-        ).first()
+        ))
         
         if not hotel:
             raise HTTPException(status_code=404, detail="Hotel no encontrado")
         
         # Actualizar campos proporcionados
         update_data = hotel_data.dict(exclude_unset=True)
+        if 'image_url' in update_data and update_data['image_url'] != hotel.image_url:
+            hotel.variants = None  # Las variantes eran de la imagen anterior
         for field, value in update_data.items():
             setattr(hotel, field, value)
         
-        db.commit()
-        db.refresh(hotel)
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(hotel)
         
         return hotel.to_dict()
         
@@ -1376,7 +1268,7 @@ async def update_package_hotel(
         raise
     except Exception as e:
         print(f"Error al actualizar hotel: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al actualizar hotel")
 
 @app.delete("/admin/packages/{package_id}/hotels/{hotel_id}")
@@ -1384,24 +1276,26 @@ async def delete_package_hotel(
     package_id: int,
     hotel_id: int,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Eliminar hotel de un paquete"""
     try:
-        hotel = db.query(PackageHotel).filter(
+        hotel = await db.scalar(select(PackageHotel).where(
             PackageHotel.id == hotel_id,
             PackageHotel.package_id == package_id
-        ).first()
+        ))
 
         if not hotel:
             raise HTTPException(status_code=404, detail="Hotel no encontrado")
 
-        # Eliminar imagen de Cloudinary si existe
+        # Eliminar imagen de Cloudinary (y sus variantes) si existe
         if hotel.image_url:
-            delete_cloudinary_image(hotel.image_url)
+            await delete_images([hotel.image_url, *variant_urls(hotel.variants)])
 
-        db.delete(hotel)
-        db.commit()
+        await db.delete(hotel)
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
         
         return {"message": "Hotel eliminado correctamente"}
         
@@ -1409,9 +1303,67 @@ async def delete_package_hotel(
         raise
     except Exception as e:
         print(f"Error al eliminar hotel: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al eliminar hotel")
 
+@app.put("/admin/packages/{package_id}/hotels")
+async def sync_package_hotels(
+    package_id: int,
+    hotels_data: List[HotelSyncItem],
+    background_tasks: BackgroundTasks,
+    username: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reemplazar los hoteles del paquete por la lista enviada (altas, cambios, bajas y orden en un commit)"""
+    try:
+        package = await db.get(Package, package_id)
+        if not package:
+            raise HTTPException(status_code=404, detail="Paquete no encontrado")
+
+        # El orden de la lista define order_index y el orden dentro de cada destino
+        items = []
+        positions_by_destination = {}
+        for hotel_data in hotels_data:
+            item = hotel_data.dict(exclude={"order_index", "order_in_destination"})
+            item["amenities"] = item["amenities"] if item["amenities"] is not None else []
+            item["order_in_destination"] = positions_by_destination.get(item["destination"], 0)
+            positions_by_destination[item["destination"]] = item["order_in_destination"] + 1
+            items.append(item)
+
+        hotels, removed = await sync_package_items(db, PackageHotel, package_id, items)
+        for hotel in hotels:
+            if hotel.id is not None and inspect(hotel).attrs.image_url.history.has_changes():
+                hotel.variants = None  # Las variantes eran de la imagen anterior
+
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+
+        # Borrar de Cloudinary las imágenes de los hoteles eliminados que ya no se usan
+        kept_urls = {hotel.image_url for hotel in hotels}
+        removed_urls = [
+            url for hotel in removed if hotel.image_url not in kept_urls
+            for url in (hotel.image_url, *variant_urls(hotel.variants))
+        ]
+        if removed_urls:
+            background_tasks.add_task(delete_images, removed_urls)
+
+        hotels = await load_package_items(
+            db, PackageHotel, package_id,
+            PackageHotel.destination, PackageHotel.order_in_destination, PackageHotel.order_index
+        )
+        return group_hotels_by_destination(hotels)
+
+    except HTTPException:
+        raise
+    except SyncError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error al sincronizar hoteles: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Error al guardar hoteles")
+
 # ===== RUTAS PACKAGE INFO =====
 
 class PackageInfoCreate(BaseModel):
@@ -1424,19 +1376,25 @@ class PackageInfoUpdate(BaseModel):
     label: Optional[str] = None
     value: Optional[str] = None
 
+class PackageInfoSyncItem(PackageInfoCreate):
+    id: Optional[int] = None
+
 @app.get("/packages/{package_id}/info")
-async def get_package_info(package_id: int, db: Session = Depends(get_db)):
+async def get_package_info(request: Request, package_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener información de un paquete"""
     try:
-        package = db.query(Package).filter(Package.id == package_id).first()
-        if not package:
-            raise HTTPException(status_code=404, detail="Paquete no encontrado")
-        
-        info_items = db.query(PackageInfo).filter(
-            PackageInfo.package_id == package_id
-        ).order_by(PackageInfo.order_index).all()
-        
-        return [item.to_dict() for item in info_items]
+        async def build():
+            package = await db.get(Package, package_id)
+            if not package:
+                raise HTTPException(status_code=404, detail="Paquete no encontrado")
+
+            info_items = (await db.scalars(select(PackageInfo).where(
+                PackageInfo.package_id == package_id
+            ).order_by(PackageInfo.order_index))).all()
+
+            return [item.to_dict() for item in info_items]
+
+        return await cached_json_response(request, ("info", package_id), build, package_id)
         
     except HTTPException:
         raise
@@ -1449,18 +1407,18 @@ async def create_package_info(
     package_id: int,
     info_data: PackageInfoCreate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Crear nueva información para un paquete"""
     try:
-        package = db.query(Package).filter(Package.id == package_id).first()
+        package = await db.get(Package, package_id)
         if not package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
         # Obtener el siguiente order_index
-        max_order = db.query(func.max(PackageInfo.order_index)).filter(
+        max_order = await db.scalar(select(func.max(PackageInfo.order_index)).where(
             PackageInfo.package_id == package_id
-        ).scalar() or 0
+        )) or 0
         
         new_info = PackageInfo(
             package_id=package_id,
@@ -1471,8 +1429,9 @@ async def create_package_info(
         )
         
         db.add(new_info)
-        db.commit()
-        db.refresh(new_info)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(new_info)
         
         return new_info.to_dict()
         
@@ -1480,7 +1439,7 @@ async def create_package_info(
         raise
     except Exception as e:
         print(f"Error al crear info: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al crear información")
 
 @app.put("/admin/packages/{package_id}/info/{info_id}")
@@ -1489,14 +1448,14 @@ async def update_package_info(
     info_id: int,
     info_data: PackageInfoUpdate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar información de un paquete"""
     try:
-        info = db.query(PackageInfo).filter(
+        info = await db.scalar(select(PackageInfo).where(
             PackageInfo.id == info_id,
             PackageInfo.package_id == package_id
-        ).first()
+        ))
         
         if not info:
             raise HTTPException(status_code=404, detail="Información no encontrada")
@@ -1508,8 +1467,9 @@ async def update_package_info(
         if info_data.value is not None:
             info.value = info_data.value
         
-        db.commit()
-        db.refresh(info)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(info)
         
         return info.to_dict()
         
@@ -1517,7 +1477,7 @@ async def update_package_info(
         raise
     except Exception as e:
         print(f"Error al actualizar info: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al actualizar información")
 
 @app.delete("/admin/packages/{package_id}/info/{info_id}")
@@ -1525,20 +1485,21 @@ async def delete_package_info(
     package_id: int,
     info_id: int,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Eliminar información de un paquete"""
     try:
-        info = db.query(PackageInfo).filter(
+        info = await db.scalar(select(PackageInfo).where(
             PackageInfo.id == info_id,
             PackageInfo.package_id == package_id
-        ).first()
+        ))
         
         if not info:
             raise HTTPException(status_code=404, detail="Información no encontrada")
         
-        db.delete(info)
-        db.commit()
+        await db.delete(info)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
         
         return {"message": "Información eliminada correctamente"}
         
@@ -1546,9 +1507,39 @@ async def delete_package_info(
         raise
     except Exception as e:
         print(f"Error al eliminar info: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al eliminar información")
 
+@app.put("/admin/packages/{package_id}/info")
+async def sync_package_info(
+    package_id: int,
+    info_data: List[PackageInfoSyncItem],
+    username: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reemplazar la información del paquete por la lista enviada, en un solo commit"""
+    try:
+        package = await db.get(Package, package_id)
+        if not package:
+            raise HTTPException(status_code=404, detail="Paquete no encontrado")
+
+        await sync_package_items(db, PackageInfo, package_id, [item.dict() for item in info_data])
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+
+        info_items = await load_package_items(db, PackageInfo, package_id)
+        return [item.to_dict() for item in info_items]
+
+    except HTTPException:
+        raise
+    except SyncError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error al sincronizar info: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Error al guardar información")
+
 # ===== RUTAS PACKAGE FEATURES =====
 
 class PackageFeatureCreate(BaseModel):
@@ -1557,42 +1548,35 @@ class PackageFeatureCreate(BaseModel):
 class PackageFeatureUpdate(BaseModel):
     text: Optional[str] = None
 
+class PackageFeatureSyncItem(PackageFeatureCreate):
+    id: Optional[int] = None
+
 @app.get("/packages/{package_id}/features")
-async def get_package_features(package_id: int, db: Session = Depends(get_db)):
+async def get_package_features(request: Request, package_id: int, db: AsyncSession = Depends(get_db)):
     """Obtener características de un paquete"""
     try:
-        package = db.query(Package).filter(Package.id == package_id).first()
-        if not package:
-            raise HTTPException(status_code=404, detail="Paquete no encontrado")
+        async def build():
+            package = await db.get(Package, package_id)
+            if not package:
+                raise HTTPException(status_code=404, detail="Paquete no encontrado")
 
-        features = db.query(PackageFeature).filter(
-            PackageFeature.package_id == package_id
-        ).order_by(PackageFeature.order_index).all()
-
-        # Auto-migrar: si la tabla está vacía pero el JSON del paquete tiene features
-        if not features:
-            json_features = package.features if isinstance(package.features, list) else (json.loads(package.features) if package.features else [])
-            if json_features:
-                for i, text in enumerate(json_features):
-                    if text and str(text).strip():
-                        new_feature = PackageFeature(
-                            package_id=package_id,
-                            text=str(text).strip(),
-                            order_index=i + 1
-                        )
-                        db.add(new_feature)
-                db.commit()
-                features = db.query(PackageFeature).filter(
-                    PackageFeature.package_id == package_id
-                ).order_by(PackageFeature.order_index).all()
+            features = (await db.scalars(select(PackageFeature).where(
+                PackageFeature.package_id == package_id
+            ).order_by(PackageFeature.order_index))).all()
 
-        return [feature.to_dict() for feature in features]
+            # Auto-migrar: si la tabla está vacía pero el JSON del paquete tiene features
+            if not features:
+                features = await migrate_json_features(db, package)
+
+            return [feature.to_dict() for feature in features]
+
+        return await cached_json_response(request, ("features", package_id), build, package_id)
 
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error al obtener features del paquete: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al obtener características")
 
 @app.post("/admin/packages/{package_id}/features")
@@ -1600,18 +1584,18 @@ async def create_package_feature(
     package_id: int,
     feature_data: PackageFeatureCreate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Crear nueva característica para un paquete"""
     try:
-        package = db.query(Package).filter(Package.id == package_id).first()
+        package = await db.get(Package, package_id)
         if not package:
             raise HTTPException(status_code=404, detail="Paquete no encontrado")
         
         # Obtener el siguiente order_index
-        max_order = db.query(func.max(PackageFeature.order_index)).filter(
+        max_order = await db.scalar(select(func.max(PackageFeature.order_index)).where(
             PackageFeature.package_id == package_id
-        ).scalar() or 0
+        )) or 0
         
         new_feature = PackageFeature(
             package_id=package_id,
@@ -1620,8 +1604,10 @@ async def create_package_feature(
         )
         
         db.add(new_feature)
-        db.commit()
-        db.refresh(new_feature)
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(new_feature)
         
         return new_feature.to_dict()
         
@@ -1629,7 +1615,7 @@ async def create_package_feature(
         raise
     except Exception as e:
         print(f"Error al crear feature: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al crear característica")
 
 @app.put("/admin/packages/{package_id}/features/{feature_id}")
@@ -1638,14 +1624,14 @@ async def update_package_feature(
     feature_id: int,
     feature_data: PackageFeatureUpdate,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar característica de un paquete"""
     try:
-        feature = db.query(PackageFeature).filter(
+        feature = await db.scalar(select(PackageFeature).where(
             PackageFeature.id == feature_id,
             PackageFeature.package_id == package_id
-        ).first()
+        ))
         
         if not feature:
             raise HTTPException(status_code=404, detail="Característica no encontrada")
@@ -1653,8 +1639,10 @@ async def update_package_feature(
         if feature_data.text is not None:
             feature.text = feature_data.text
         
-        db.commit()
-        db.refresh(feature)
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+        await db.refresh(feature)
         
         return feature.to_dict()
         
@@ -1662,7 +1650,7 @@ async def update_package_feature(
         raise
     except Exception as e:
         print(f"Error al actualizar feature: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al actualizar característica")
 
 @app.delete("/admin/packages/{package_id}/features/{feature_id}")
@@ -1670,20 +1658,22 @@ async def delete_package_feature(
     package_id: int,
     feature_id: int,
     username: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Eliminar característica de un paquete"""
     try:
-        feature = db.query(PackageFeature).filter(
+        feature = await db.scalar(select(PackageFeature).where(
             PackageFeature.id == feature_id,
             PackageFeature.package_id == package_id
-        ).first()
+        ))
         
         if not feature:
             raise HTTPException(status_code=404, detail="Característica no encontrada")
         
-        db.delete(feature)
-        db.commit()
+        await db.delete(feature)
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
         
         return {"message": "Característica eliminada correctamente"}
         
@@ -1691,9 +1681,43 @@ async def delete_package_feature(
         raise
     except Exception as e:
         print(f"Error al eliminar feature: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error al eliminar característica")
 
+@app.put("/admin/packages/{package_id}/features")
+async def sync_package_features(
+    package_id: int,
+    features_data: List[PackageFeatureSyncItem],
+    username: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reemplazar las características del paquete por la lista enviada, en un solo commit"""
+    try:
+        package = await db.get(Package, package_id)
+        if not package:
+            raise HTTPException(status_code=404, detail="Paquete no encontrado")
+
+        # Las líneas del textarea llegan sin id: un texto que ya existía conserva su fila
+        await sync_package_items(
+            db, PackageFeature, package_id, [feature.dict() for feature in features_data], match_on="text"
+        )
+        await refresh_search_document(db, package_id)
+        await db.commit()
+        catalog_cache.invalidate_package(package_id)
+
+        features = await load_package_items(db, PackageFeature, package_id)
+        return [feature.to_dict() for feature in features]
+
+    except HTTPException:
+        raise
+    except SyncError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error al sincronizar features: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Error al guardar características")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,343 @@
+"""
+Subida y borrado de imágenes en Cloudinary fuera del event loop
+"""
+import os
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import select, delete
+import cloudinary
+import cloudinary.api
+import cloudinary.uploader
+from database import AsyncSessionLocal
+from models import AssetCleanupFailure
+from images import process_image
+
+# Configuración de Cloudinary
+cloudinary.config(
+    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+    api_key=os.getenv("CLOUDINARY_API_KEY"),
+    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+    secure=True
+)
+
+# El SDK de Cloudinary es síncrono: sus llamadas corren en un pool de threads propio y acotado,
+# así una subida lenta no frena al resto de los requests ni agota el executor por defecto
+CLOUDINARY_MAX_WORKERS = int(os.getenv("CLOUDINARY_MAX_WORKERS", "4"))
+CLOUDINARY_TIMEOUT = float(os.getenv("CLOUDINARY_TIMEOUT", "60"))  # segundos por llamada (incluye la espera en cola)
+
+CLOUDINARY_BULK_DELETE_SIZE = 100  # máximo de public_ids por llamada a delete_resources
+
+# Reintento periódico de los borrados fallidos: cada CLEANUP_RETRY_INTERVAL segundos y, mientras
+# sigan fallando, con espera doble en cada vuelta hasta CLEANUP_RETRY_MAX_INTERVAL
+CLEANUP_RETRY_INTERVAL = float(os.getenv("CLEANUP_RETRY_INTERVAL", "900"))
+CLEANUP_RETRY_MAX_INTERVAL = float(os.getenv("CLEANUP_RETRY_MAX_INTERVAL", "21600"))
+
+media_executor = ThreadPoolExecutor(max_workers=CLOUDINARY_MAX_WORKERS, thread_name_prefix="cloudinary")
+
+def is_cloudinary_configured() -> bool:
+    return bool(
+        os.getenv("CLOUDINARY_CLOUD_NAME") and
+        os.getenv("CLOUDINARY_API_KEY") and
+        os.getenv("CLOUDINARY_API_SECRET")
+    )
+
+async def run_in_media_pool(func, *args, timeout: float = CLOUDINARY_TIMEOUT):
+    """Ejecutar una llamada bloqueante en el pool de Cloudinary y esperarla con timeout"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(media_executor, func, *args), timeout=timeout)
+
+def shutdown_media_pool():
+    """Cerrar el pool descartando las tareas que todavía no empezaron"""
+    media_executor.shutdown(wait=False, cancel_futures=True)
+
+def upload_to_cloudinary(file: UploadFile, folder: str = "arman-travel") -> str:
+    """Subir archivo a Cloudinary y retornar la URL (bloqueante, usar upload_image desde los handlers)"""
+
+    # Verificar que Cloudinary esté configurado
+    if not is_cloudinary_configured():
+        raise HTTPException(status_code=500, detail="Cloudinary no está configurado correctamente")
+
+    try:
+        # Generar public_id único
+        public_id = f"{folder}/{uuid.uuid4()}"
+
+        # Subir a Cloudinary con optimizaciones. El SDK lee el archivo completo para armar
+        # el multipart, así que en memoria queda una copia acotada por MAX_FILE_SIZE
+        file.file.seek(0)
+        upload_result = cloudinary.uploader.upload(
+            file.file,
+            filename=file.filename,
+            public_id=public_id,
+            resource_type="image",
+            transformation=[
+                {"width": 1200, "height": 800, "crop": "limit"}
+            ],
+            timeout=CLOUDINARY_TIMEOUT
+        )
+
+        print(f"✅ Imagen subida a Cloudinary: {upload_result.get('secure_url')}")
+
+        return upload_result.get('secure_url')
+
+    except Exception as e:
+        print(f"❌ Error al subir imagen a Cloudinary: {e}")
+        raise HTTPException(status_code=500, detail=f"Error al subir imagen: {str(e)}")
+
+def extract_cloudinary_public_id(image_url: str) -> str:
+    """Extraer public_id de una URL de Cloudinary"""
+    if not image_url or "cloudinary.com" not in image_url:
+        return None
+
+    try:
+        # Ejemplo URL: https://res.cloudinary.com/cloud/image/upload/v1234567890/arman-travel/covers/uuid.jpg
+        # Queremos extraer: arman-travel/covers/uuid
+        parts = image_url.split('/')
+        if 'upload' in parts:
+            upload_index = parts.index('upload')
+            # Tomar todo después de 'upload' excepto la versión (v1234567890)
+            public_id_parts = parts[upload_index + 1:]
+
+            # Remover versión si existe (empieza con 'v' y seguido de números)
+            if public_id_parts and public_id_parts[0].startswith('v') and public_id_parts[0][1:].isdigit():
+                public_id_parts = public_id_parts[1:]
+
+            # Unir las partes y remover extensión
+            public_id = '/'.join(public_id_parts)
+            if '.' in public_id:
+                public_id = public_id.rsplit('.', 1)[0]
+
+            return public_id
+    except Exception as e:
+        print(f"❌ Error extrayendo public_id de {image_url}: {e}")
+        return None
+
+def delete_cloudinary_image(image_url: str) -> bool:
+    """Eliminar imagen de Cloudinary usando su URL (bloqueante, usar delete_image desde los handlers)"""
+    if not image_url:
+        return False
+
+    public_id = extract_cloudinary_public_id(image_url)
+    if not public_id:
+        print(f"⚠️ No es una URL de Cloudinary o no se pudo extraer public_id: {image_url}")
+        return False
+
+    try:
+        # Eliminar de Cloudinary
+        result = cloudinary.uploader.destroy(public_id, timeout=CLOUDINARY_TIMEOUT)
+
+        if result.get('result') == 'ok':
+            print(f"✅ Imagen eliminada de Cloudinary: {public_id}")
+            return True
+        else:
+            print(f"⚠️ No se pudo eliminar imagen de Cloudinary: {result}")
+            return False
+
+    except Exception as e:
+        print(f"❌ Error eliminando imagen de Cloudinary {public_id}: {e}")
+        return False
+
+async def upload_image(file: UploadFile, folder: str = "arman-travel") -> str:
+    """Subir una imagen sin bloquear el event loop; 504 si Cloudinary no responde a tiempo"""
+    try:
+        return await run_in_media_pool(upload_to_cloudinary, file, folder)
+    except asyncio.TimeoutError:
+        print(f"❌ Timeout al subir imagen a Cloudinary ({CLOUDINARY_TIMEOUT:g}s)")
+        raise HTTPException(status_code=504, detail="Cloudinary no respondió a tiempo, intentá de nuevo")
+
+async def delete_image(image_url: str) -> bool:
+    """Eliminar una imagen sin bloquear el event loop; False si falla o no responde a tiempo"""
+    if not image_url:
+        return False
+    try:
+        return await run_in_media_pool(delete_cloudinary_image, image_url)
+    except asyncio.TimeoutError:
+        print(f"❌ Timeout eliminando imagen de Cloudinary: {image_url}")
+        return False
+
+def upload_variant_to_cloudinary(data: bytes, public_id: str) -> str:
+    """Subir una variante ya procesada tal cual, sin transformaciones (bloqueante)"""
+    upload_result = cloudinary.uploader.upload(
+        data,
+        public_id=public_id,
+        resource_type="image",
+        timeout=CLOUDINARY_TIMEOUT
+    )
+    return upload_result.get('secure_url')
+
+def build_variants(uploaded):
+    """Lista serializable de variantes [(variante, url)] para guardar en la columna variants"""
+    return [
+        {"url": url, "width": variant.width, "height": variant.height, "format": variant.format}
+        for variant, url in uploaded
+    ]
+
+def variant_urls(variants) -> list:
+    """URLs de todas las variantes guardadas de una imagen"""
+    return [variant.get("url") for variant in (variants or []) if variant.get("url")]
+
+def primary_variant_url(variants):
+    """URL de la variante WebP más grande, la que se usa como image_url"""
+    webp = [variant for variant in variants if variant["format"] == "webp"]
+    return max(webp or variants, key=lambda variant: variant["width"])["url"]
+
+async def upload_processed_image(file: UploadFile, folder: str = "arman-travel"):
+    """
+    Procesar la imagen (una sola decodificación) y subir sus variantes responsive en paralelo.
+
+    Devuelve (image_url, variants); si la imagen no se puede procesar se sube el
+    original como siempre y variants es None.
+    """
+    if not is_cloudinary_configured():
+        raise HTTPException(status_code=500, detail="Cloudinary no está configurado correctamente")
+
+    try:
+        processed = await run_in_media_pool(process_image, file.file)
+    except asyncio.TimeoutError:
+        processed = None
+    if not processed:
+        return await upload_image(file, folder), None
+
+    base_id = f"{folder}/{uuid.uuid4()}"
+    public_ids = [f"{base_id}-{variant.width}-{variant.format}" for variant in processed]
+
+    async def upload_variant(variant, public_id):
+        return await run_in_media_pool(upload_variant_to_cloudinary, variant.data, public_id)
+
+    results = await asyncio.gather(
+        *(upload_variant(variant, public_id) for variant, public_id in zip(processed, public_ids)),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # No dejar variantes huérfanas de una subida incompleta
+        uploaded_ids = [public_id for public_id, result in zip(public_ids, results) if not isinstance(result, BaseException)]
+        await cleanup_assets(uploaded_ids)
+        print(f"❌ Error al subir variantes a Cloudinary: {errors[0]!r}")
+        if isinstance(errors[0], asyncio.TimeoutError):
+            raise HTTPException(status_code=504, detail="Cloudinary no respondió a tiempo, intentá de nuevo")
+        raise HTTPException(status_code=500, detail=f"Error al subir imagen: {str(errors[0])}")
+
+    variants = build_variants(zip(processed, results))
+    image_url = primary_variant_url(variants)
+    print(f"✅ Imagen subida a Cloudinary con {len(variants)} variantes: {image_url}")
+    return image_url, variants
+
+async def delete_images(image_urls) -> None:
+    """Eliminar varias imágenes (por ejemplo una imagen y sus variantes) con borrado en lote"""
+    public_ids = [extract_cloudinary_public_id(url) for url in image_urls if url]
+    public_ids = [public_id for public_id in public_ids if public_id]
+    if public_ids:
+        await cleanup_assets(public_ids)
+
+def delete_cloudinary_resources(public_ids) -> dict:
+    """Borrar hasta 100 public_ids en una sola llamada; devuelve {public_id: error o None} (bloqueante)"""
+    try:
+        result = cloudinary.api.delete_resources(list(public_ids), timeout=CLOUDINARY_TIMEOUT)
+    except Exception as e:
+        return {public_id: str(e) for public_id in public_ids}
+
+    deleted = result.get('deleted', {})
+    errors = {}
+    for public_id in public_ids:
+        status = deleted.get(public_id)
+        # not_found cuenta como borrada: el objetivo es que el asset no exista
+        errors[public_id] = None if status in ('deleted', 'not_found') else f"Estado inesperado: {status}"
+    return errors
+
+async def delete_public_ids(public_ids) -> dict:
+    """Borrar public_ids en lotes concurrentes dentro del pool de Cloudinary"""
+    public_ids = list(dict.fromkeys(public_ids))
+    chunks = [public_ids[i:i + CLOUDINARY_BULK_DELETE_SIZE] for i in range(0, len(public_ids), CLOUDINARY_BULK_DELETE_SIZE)]
+
+    async def delete_chunk(chunk):
+        try:
+            return await run_in_media_pool(delete_cloudinary_resources, chunk)
+        except asyncio.TimeoutError:
+            return {public_id: "Timeout de Cloudinary" for public_id in chunk}
+
+    errors = {}
+    for chunk_errors in await asyncio.gather(*(delete_chunk(chunk) for chunk in chunks)):
+        errors.update(chunk_errors)
+    return errors
+
+async def record_cleanup_results(errors: dict):
+    """Registrar los borrados fallidos para reintentarlos y quitar los que ya se resolvieron"""
+    failed = {public_id: error for public_id, error in errors.items() if error is not None}
+    succeeded = [public_id for public_id, error in errors.items() if error is None]
+
+    async with AsyncSessionLocal() as db:
+        if succeeded:
+            await db.execute(delete(AssetCleanupFailure).where(AssetCleanupFailure.public_id.in_(succeeded)))
+        if failed:
+            existing = {
+                row.public_id: row for row in (await db.scalars(
+                    select(AssetCleanupFailure).where(AssetCleanupFailure.public_id.in_(list(failed)))
+                )).all()
+            }
+            for public_id, error in failed.items():
+                row = existing.get(public_id)
+                if row:
+                    row.attempts += 1
+                    row.error = error
+                else:
+                    db.add(AssetCleanupFailure(public_id=public_id, error=error))
+        await db.commit()
+
+async def cleanup_assets(public_ids, local_paths=()):
+    """Job de limpieza de imágenes de un paquete ya borrado de la base; devuelve cuántos borrados fallaron"""
+    for file_path in local_paths:
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except OSError as e:
+            print(f"⚠️ No se pudo eliminar el archivo local {file_path}: {e}")
+
+    if not public_ids:
+        return 0
+
+    try:
+        errors = await delete_public_ids(public_ids)
+        await record_cleanup_results(errors)
+    except Exception as e:
+        print(f"❌ Error en la limpieza de imágenes de Cloudinary: {e}")
+        return len(public_ids)
+
+    failed = sum(1 for error in errors.values() if error is not None)
+    if failed:
+        print(f"⚠️ Limpieza de Cloudinary: {len(errors) - failed} eliminadas, {failed} pendientes de reintento")
+    else:
+        print(f"✅ Limpieza de Cloudinary: {len(errors)} imágenes eliminadas")
+    return failed
+
+async def retry_failed_cleanups() -> bool:
+    """Reintentar los borrados que fallaron en limpiezas anteriores; True si quedan pendientes"""
+    try:
+        async with AsyncSessionLocal() as db:
+            public_ids = (await db.scalars(select(AssetCleanupFailure.public_id).order_by(AssetCleanupFailure.id))).all()
+    except Exception as e:
+        print(f"⚠️ No se pudieron leer las limpiezas pendientes: {e}")
+        return True
+    if not public_ids:
+        return False
+    print(f"🧹 Reintentando la limpieza de {len(public_ids)} imágenes de Cloudinary")
+    return await cleanup_assets(public_ids) > 0
+
+def cleanup_retry_delay(failed_rounds: int) -> float:
+    """Espera hasta la próxima vuelta: el intervalo base, duplicado por cada vuelta fallida seguida"""
+    if failed_rounds <= 1:
+        return CLEANUP_RETRY_INTERVAL
+    return min(CLEANUP_RETRY_INTERVAL * 2 ** (failed_rounds - 1), CLEANUP_RETRY_MAX_INTERVAL)
+
+async def run_cleanup_retries():
+    """Reintentar los borrados pendientes al iniciar y después periódicamente (se cancela al cerrar la app)"""
+    failed_rounds = 0
+    while True:
+        try:
+            pending = await retry_failed_cleanups()
+        except Exception as e:
+            print(f"❌ Error al reintentar la limpieza de Cloudinary: {e}")
+            pending = True
+        failed_rounds = failed_rounds + 1 if pending else 0
+        await asyncio.sleep(cleanup_retry_delay(failed_rounds))
@@ -0,0 +1,261 @@
+"""
+Migraciones versionadas del esquema
+
+Cada paso tiene un número de versión y corre una sola vez, en su propia transacción,
+que también registra la versión en schema_version. Al iniciar solo se lee la última
+versión aplicada; si está al día no se inspecciona nada más.
+
+Para cambiar el esquema: agregar una función al final de MIGRATIONS (nunca editar ni
+reordenar un paso ya publicado) y, si corresponde, actualizar el modelo en models.py.
+El paso 1 crea las tablas con los modelos actuales, así que los pasos siguientes deben
+tolerar que su cambio ya exista (bases nuevas) o no (bases creadas antes del runner).
+
+    python migrations.py           # aplicar las pendientes
+    python migrations.py --status  # ver versión actual y pendientes
+"""
+import sys
+from sqlalchemy import text, inspect, bindparam, Numeric, select, func
+from sqlalchemy.orm import Session
+from database import engine
+from models import Base, Package, PackageFeature, PACKAGE_CHILD_MODELS
+from pricing import parse_price
+from search import backfill_search_documents, SEARCH_VECTOR_SQL
+
+# Clave del advisory lock que evita que dos workers migren a la vez (PostgreSQL)
+MIGRATION_LOCK_KEY = 7_231_002
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def column_names(db, table):
+    return {column['name'] for column in inspect(db.connection()).get_columns(table)}
+
+def add_missing_columns(db, table, columns):
+    """ALTER TABLE ... ADD COLUMN para las columnas (nombre -> DDL) que la tabla no tiene"""
+    existing = column_names(db, table)
+    added = [name for name in columns if name not in existing]
+    for name in added:
+        db.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}"))
+    if added:
+        print(f"   columnas agregadas a {table}: {', '.join(added)}")
+
+# === PASOS ===
+
+def create_base_schema(db):
+    """Tablas de los modelos actuales (en bases existentes solo crea las que falten)"""
+    Base.metadata.create_all(bind=db.connection())
+
+def add_hotel_destination_columns(db):
+    """Destinos, días y selección múltiple de hoteles (antes migration_add_*.py)"""
+    add_missing_columns(db, "package_hotels", {
+        "destination": "VARCHAR(255) NOT NULL DEFAULT 'Destino principal'",
+        "days": "INTEGER NOT NULL DEFAULT 1",
+        "order_in_destination": "INTEGER DEFAULT 0",
+        "allow_user_days": "BOOLEAN NOT NULL DEFAULT FALSE",
+        "allow_multiple_per_destination": "BOOLEAN NOT NULL DEFAULT FALSE",
+    })
+
+def add_package_price_tag(db):
+    add_missing_columns(db, "packages", {"price_tag": "VARCHAR(50) NOT NULL DEFAULT 'DESDE'"})
+
+def add_contact_email_status(db):
+    # Los mensajes existentes quedan como 'sent' para no reenviarlos
+    add_missing_columns(db, "contact_messages", {
+        "email_status": "VARCHAR(20) NOT NULL DEFAULT 'sent'",
+        "email_attempts": "INTEGER NOT NULL DEFAULT 0",
+        "email_sent_at": "TIMESTAMP WITH TIME ZONE",
+    })
+
+def add_image_variants(db):
+    for table in ("package_gallery_images", "package_hotels"):
+        add_missing_columns(db, table, {"variants": "JSON"})
+
+def add_normalized_prices(db):
+    """Monto numérico + moneda a partir del texto del precio, con sus índices"""
+    for table in ("packages", "package_hotels"):
+        add_missing_columns(db, table, {"price_amount": "NUMERIC(12, 2)", "price_currency": "VARCHAR(3)"})
+        backfill_price_amounts(db, table)
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_packages_price_amount ON packages (price_amount)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_packages_price_currency_amount ON packages (price_currency, price_amount)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_package_hotels_package_id_price_amount ON package_hotels (package_id, price_amount)"))
+
+def backfill_price_amounts(db, table):
+    """Completar price_amount/price_currency de las filas que todavía no los tienen"""
+    rows = db.execute(text(f"SELECT id, price FROM {table} WHERE price_amount IS NULL AND price IS NOT NULL")).fetchall()
+    updates = []
+    for row_id, price in rows:
+        amount, currency = parse_price(price)
+        if amount is not None:
+            updates.append({"id": row_id, "amount": amount, "currency": currency})
+        else:
+            print(f"⚠️ Precio sin monto reconocible en {table} #{row_id}: {price!r}")
+    if updates:
+        statement = text(f"UPDATE {table} SET price_amount = :amount, price_currency = :currency WHERE id = :id")
+        db.execute(statement.bindparams(bindparam("amount", type_=Numeric(12, 2))), updates)
+        print(f"   {len(updates)} precios normalizados en {table}")
+
+def add_catalog_listing_indexes(db):
+    """Índices de los filtros y órdenes del listado de paquetes"""
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_packages_category ON packages (category)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_packages_promoted_carousel_order ON packages (promoted, carousel_order, id)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_packages_created_at ON packages (created_at, id)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_packages_destination_lower ON packages (lower(destination))"))
+
+def add_search_index(db):
+    """Filas de búsqueda de texto completo; en PostgreSQL tsvector generado + índice GIN"""
+    if db.bind.dialect.name == "postgresql" and "search_vector" not in column_names(db, "package_search"):
+        db.execute(text(f"ALTER TABLE package_search ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS ix_package_search_vector ON package_search USING GIN (search_vector)"))
+    indexed = backfill_search_documents(db)
+    if indexed:
+        print(f"   {indexed} paquetes agregados al índice de búsqueda")
+
+def copy_json_features(db):
+    """Copiar a package_features las features JSON de los paquetes que no tienen filas (antes create_package_info_tables.py)"""
+    packages = db.scalars(
+        select(Package).where(~select(PackageFeature.id).where(PackageFeature.package_id == Package.id).exists())
+    ).all()
+    rows = [
+        {"package_id": package.id, "text": str(feature), "order_index": position}
+        for package in packages
+        for position, feature in enumerate(package.features or [], start=1)
+    ]
+    if rows:
+        db.execute(PackageFeature.__table__.insert(), rows)
+        print(f"   {len(rows)} features copiadas a package_features")
+
+def add_child_table_indexes(db):
+    """Índices por paquete de las tablas hijas (WHERE package_id = ? ORDER BY ...)"""
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_package_gallery_images_package_id_order ON package_gallery_images (package_id, order_index, id)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_package_hotels_package_id_destination_order ON package_hotels (package_id, destination, order_in_destination, order_index)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_package_info_package_id_order ON package_info (package_id, order_index)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_package_features_package_id_order ON package_features (package_id, order_index, id)"))
+
+def add_cascade_foreign_keys(db):
+    """
+    ON DELETE CASCADE en las FK a packages (solo PostgreSQL: SQLite no permite cambiar
+    constraints, ahí delete_package sigue borrando las tablas hijas a mano).
+
+    Las FK se agregan NOT VALID (sin recorrer la tabla); las valida el paso 13 en su
+    propia transacción, que no bloquea las escrituras mientras recorre las filas.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return
+    inspector = inspect(db.connection())
+    for model in PACKAGE_CHILD_MODELS:
+        table = model.__tablename__
+        foreign_keys = [fk for fk in inspector.get_foreign_keys(table) if fk['referred_table'] == 'packages']
+        if foreign_keys and all((fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE' for fk in foreign_keys):
+            continue
+
+        # Filas huérfanas (tablas creadas sin FK) harían fallar la validación; nadie puede leerlas
+        orphans = db.execute(text(
+            f"DELETE FROM {table} WHERE package_id NOT IN (SELECT id FROM packages) RETURNING package_id"
+        )).scalars().all()
+        if orphans:
+            package_ids = sorted(set(orphans))
+            shown = ", ".join(str(package_id) for package_id in package_ids[:20])
+            more = f" y {len(package_ids) - 20} más" if len(package_ids) > 20 else ""
+            print(f"⚠️ {len(orphans)} filas huérfanas eliminadas de {table} (paquetes inexistentes: {shown}{more})")
+        for fk in foreign_keys:
+            db.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{fk["name"]}"'))
+        db.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_package_id_fkey "
+            f"FOREIGN KEY (package_id) REFERENCES packages (id) ON DELETE CASCADE NOT VALID"
+        ))
+        print(f"   FK de {table} a packages con ON DELETE CASCADE (pendiente de validar)")
+
+def add_contact_email_claim(db):
+    # Marca de tiempo del reclamo de un mensaje por un worker (estado 'sending')
+    add_missing_columns(db, "contact_messages", {"email_claimed_at": "TIMESTAMP WITH TIME ZONE"})
+
+def validate_cascade_foreign_keys(db):
+    """VALIDATE CONSTRAINT de las FK agregadas NOT VALID en el paso 11 (solo PostgreSQL)"""
+    if db.bind.dialect.name != "postgresql":
+        return
+    for model in PACKAGE_CHILD_MODELS:
+        table = model.__tablename__
+        pending = db.scalars(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'f' AND NOT convalidated"
+        ), {"table": table}).all()
+        for name in pending:
+            db.execute(text(f'ALTER TABLE {table} VALIDATE CONSTRAINT "{name}"'))
+            print(f"   FK {name} validada")
+
+# Versión -> paso. Solo se agregan pasos al final.
+MIGRATIONS = [
+    (1, create_base_schema),
+    (2, add_hotel_destination_columns),
+    (3, add_package_price_tag),
+    (4, add_contact_email_status),
+    (5, add_image_variants),
+    (6, add_normalized_prices),
+    (7, add_catalog_listing_indexes),
+    (8, add_search_index),
+    (9, copy_json_features),
+    (10, add_child_table_indexes),
+    (11, add_cascade_foreign_keys),
+    (12, add_contact_email_claim),
+    (13, validate_cascade_foreign_keys),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(connection) -> int:
+    """Última versión aplicada (0 si la base nunca pasó por el runner)"""
+    if not inspect(connection).has_table("schema_version"):
+        return 0
+    return connection.scalar(text("SELECT max(version) FROM schema_version")) or 0
+
+def migrate(target_engine=engine):
+    """
+    Aplicar las migraciones pendientes. Devuelve las versiones aplicadas en esta llamada.
+
+    Con el esquema al día cuesta una consulta. Si un paso falla su transacción se
+    revierte, la excepción se propaga y los pasos anteriores quedan registrados.
+    """
+    with target_engine.connect() as connection:
+        if current_version(connection) >= LATEST_VERSION:
+            return []
+
+    with target_engine.begin() as connection:
+        connection.execute(text(SCHEMA_VERSION_DDL))
+
+    applied = []
+    for version, step in MIGRATIONS:
+        with target_engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                # Otro worker pudo aplicar este paso mientras esperábamos el lock
+                connection.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK_KEY)))
+            if connection.scalar(text("SELECT 1 FROM schema_version WHERE version = :version"), {"version": version}):
+                continue
+
+            print(f"🔧 Migración {version}: {step.__name__}")
+            # Los commit() de helpers compartidos (ej: backfill_search_documents) no cierran
+            # la transacción del paso: la sesión trabaja dentro de la conexión
+            with Session(bind=connection, join_transaction_mode="create_savepoint") as db:
+                step(db)
+                db.commit()
+            connection.execute(
+                text("INSERT INTO schema_version (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": step.__name__}
+            )
+        applied.append(version)
+
+    if applied:
+        print(f"✅ Esquema en la versión {LATEST_VERSION} ({len(applied)} migraciones aplicadas)")
+    return applied
+
+if __name__ == "__main__":
+    if "--status" in sys.argv:
+        with engine.connect() as connection:
+            version = current_version(connection)
+        pending = [f"{number} {step.__name__}" for number, step in MIGRATIONS if number > version]
+        print(f"Versión actual: {version} (última: {LATEST_VERSION})")
+        print("Pendientes:" if pending else "Sin migraciones pendientes", *pending, sep="\n   ")
+    else:
+        migrate()
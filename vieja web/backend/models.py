@@ -1,12 +1,37 @@
 """
 Modelos SQLAlchemy para ARMAN TRAVEL
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean, Numeric, Index
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from database import Base
+from pricing import parse_price
 import json
 
+def decimal_to_float(value):
+    return float(value) if value is not None else None
+
+class JSONList(TypeDecorator):
+    """
+    Columna JSON que siempre se lee como lista.
+
+    Algunas filas viejas guardaron el JSON como texto (doble codificado); se decodifica
+    una sola vez al cargar la fila en lugar de en cada to_dict.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return []
+        return value if isinstance(value, list) else []
+
 class Package(Base):
     __tablename__ = "packages"
     
@@ -14,53 +39,80 @@ class Package(Base):
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
     price = Column(String(100), nullable=False)
+    price_amount = Column(Numeric(12, 2), nullable=True, index=True)  # Monto interpretado de price (se mantiene sincronizado)
+    price_currency = Column(String(3), nullable=True)  # ARS, USD, EUR, BRL
     image = Column(String(500), nullable=False)
-    category = Column(String(50), nullable=False)
-    features = Column(JSON, nullable=False, default=list)
+    category = Column(String(50), nullable=False, index=True)
+    features = Column(JSONList, nullable=False, default=list)
     duration = Column(String(100), nullable=True)
     destination = Column(String(255), nullable=True)
     ideal_for = Column(String(255), nullable=True)
-    gallery_images = Column(JSON, nullable=False, default=list)
-    itinerary = Column(JSON, nullable=False, default=list)
+    gallery_images = Column(JSONList, nullable=False, default=list)
+    itinerary = Column(JSONList, nullable=False, default=list)
     price_tag = Column(String(50), default="DESDE", nullable=False)
     promoted = Column(Boolean, default=False, nullable=False)
     carousel_order = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_packages_price_currency_amount", "price_currency", "price_amount"),
+        # Índices del listado público (filtros y orden de GET /packages)
+        Index("ix_packages_promoted_carousel_order", "promoted", "carousel_order", "id"),
+        Index("ix_packages_created_at", "created_at", "id"),
+        Index("ix_packages_destination_lower", func.lower(destination)),
+    )
+
+    @validates("price")
+    def validate_price(self, key, value):
+        """Mantener price_amount/price_currency sincronizados con el texto del precio"""
+        self.price_amount, self.price_currency = parse_price(value)
+        return value
     
-    def to_dict(self):
-        """Convertir el modelo a diccionario para JSON"""
-        return {
-            "id": self.id,
-            "title": self.title,
-            "description": self.description,
-            "price": self.price,
-            "price_tag": self.price_tag or "DESDE",
-            "image": self.image,
-            "category": self.category,
-            "features": self.features if isinstance(self.features, list) else json.loads(self.features) if self.features else [],
-            "duration": self.duration,
-            "destination": self.destination,
-            "ideal_for": self.ideal_for,
-            "gallery_images": self.gallery_images if isinstance(self.gallery_images, list) else json.loads(self.gallery_images) if self.gallery_images else [],
-            "itinerary": self.itinerary if isinstance(self.itinerary, list) else json.loads(self.itinerary) if self.itinerary else [],
-            "promoted": self.promoted,
-            "carousel_order": self.carousel_order,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
+    # Claves de to_dict en orden; cada una corresponde a la columna del mismo nombre
+    DICT_FIELDS = (
+        "id", "title", "description", "price", "price_amount", "price_currency", "price_tag", "image",
+        "category", "features", "duration", "destination", "ideal_for", "gallery_images", "itinerary",
+        "promoted", "carousel_order", "created_at", "updated_at"
+    )
+
+    def _dict_value(self, field):
+        value = getattr(self, field)
+        if field == "price_tag":
+            return value or "DESDE"
+        if field == "price_amount":
+            return decimal_to_float(value)
+        if field in ("features", "gallery_images", "itinerary"):
+            return value or []
+        if field in ("created_at", "updated_at"):
+            return value.isoformat() if value else None
+        return value
+
+    def to_dict(self, fields=None):
+        """
+        Convertir el modelo a diccionario para JSON.
+
+        Con fields solo se leen esas columnas, así funciona con paquetes cargados con load_only.
+        """
+        return {field: self._dict_value(field) for field in (fields or self.DICT_FIELDS)}
 
 class PackageGalleryImage(Base):
     __tablename__ = "package_gallery_images"
     
     id = Column(Integer, primary_key=True, index=True)
-    package_id = Column(Integer, ForeignKey('packages.id'), nullable=False)
+    package_id = Column(Integer, ForeignKey('packages.id', ondelete='CASCADE'), nullable=False)
     image_url = Column(String(500), nullable=False)
     image_filename = Column(String(255), nullable=True)  # Para archivos subidos
     caption = Column(String(255), nullable=True)
     order_index = Column(Integer, default=0)
     is_cover = Column(Integer, default=0)  # 1 si es imagen principal
+    variants = Column(JSON, nullable=True)  # Variantes responsive [{url, width, height, format}]
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Galería de un paquete en orden (WHERE package_id = ? ORDER BY order_index, id)
+        Index("ix_package_gallery_images_package_id_order", "package_id", "order_index", "id"),
+    )
     
     def to_dict(self):
         """Convertir el modelo a diccionario para JSON"""
@@ -72,6 +124,7 @@ class PackageGalleryImage(Base):
             "caption": self.caption,
             "order_index": self.order_index,
             "is_cover": self.is_cover,
+            "variants": self.variants or [],
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
@@ -79,12 +132,15 @@ class PackageHotel(Base):
     __tablename__ = "package_hotels"
 
     id = Column(Integer, primary_key=True, index=True)
-    package_id = Column(Integer, ForeignKey('packages.id'), nullable=False)
+    package_id = Column(Integer, ForeignKey('packages.id', ondelete='CASCADE'), nullable=False)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     image_url = Column(String(500), nullable=False)
+    variants = Column(JSON, nullable=True)  # Variantes responsive [{url, width, height, format}]
     price = Column(String(100), nullable=False)  # Precio por noche
-    amenities = Column(JSON, nullable=False, default=list)  # Lista de amenities del hotel
+    price_amount = Column(Numeric(12, 2), nullable=True)  # Monto interpretado de price (se mantiene sincronizado)
+    price_currency = Column(String(3), nullable=True)
+    amenities = Column(JSONList, nullable=False, default=list)  # Lista de amenities del hotel
     destination = Column(String(255), nullable=False, default='Destino principal')  # Ciudad/destino
     days = Column(Integer, default=1, nullable=False)  # Días en este hotel
     allow_user_days = Column(Boolean, default=False, nullable=False)  # Permitir al usuario cambiar días
@@ -93,6 +149,19 @@ class PackageHotel(Base):
     order_in_destination = Column(Integer, default=0)  # Orden dentro del destino
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Hotel más barato de cada paquete sin recorrer todas las filas
+        Index("ix_package_hotels_package_id_price_amount", "package_id", "price_amount"),
+        # Hoteles de un paquete agrupados por destino y en orden
+        Index("ix_package_hotels_package_id_destination_order", "package_id", "destination", "order_in_destination", "order_index"),
+    )
+
+    @validates("price")
+    def validate_price(self, key, value):
+        """Mantener price_amount/price_currency sincronizados con el texto del precio"""
+        self.price_amount, self.price_currency = parse_price(value)
+        return value
     
     def to_dict(self):
         """Convertir el modelo a diccionario para JSON"""
@@ -102,8 +171,11 @@ class PackageHotel(Base):
             "name": self.name,
             "description": self.description,
             "image_url": self.image_url,
+            "variants": self.variants or [],
             "price": self.price,
-            "amenities": self.amenities if isinstance(self.amenities, list) else json.loads(self.amenities) if self.amenities else [],
+            "price_amount": decimal_to_float(self.price_amount),
+            "price_currency": self.price_currency,
+            "amenities": self.amenities or [],
             "destination": self.destination,
             "days": self.days,
             "allow_user_days": self.allow_user_days,
@@ -118,13 +190,18 @@ class PackageInfo(Base):
     __tablename__ = "package_info"
     
     id = Column(Integer, primary_key=True, index=True)
-    package_id = Column(Integer, ForeignKey('packages.id'), nullable=False)
+    package_id = Column(Integer, ForeignKey('packages.id', ondelete='CASCADE'), nullable=False)
     icon = Column(String(100), nullable=False)  # FontAwesome class like "fas fa-calendar-alt"
     label = Column(String(255), nullable=False)  # e.g., "Duración", "Ideal para"
     value = Column(String(255), nullable=False)  # e.g., "7 días", "Familias"
     order_index = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Información de un paquete en orden
+        Index("ix_package_info_package_id_order", "package_id", "order_index"),
+    )
     
     def to_dict(self):
         """Convertir el modelo a diccionario para JSON"""
@@ -143,11 +220,16 @@ class PackageFeature(Base):
     __tablename__ = "package_features"
     
     id = Column(Integer, primary_key=True, index=True)
-    package_id = Column(Integer, ForeignKey('packages.id'), nullable=False)
+    package_id = Column(Integer, ForeignKey('packages.id', ondelete='CASCADE'), nullable=False)
     text = Column(String(255), nullable=False)  # e.g., "Vuelos incluidos", "Hotel 4 estrellas"
     order_index = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Features de un paquete en orden
+        Index("ix_package_features_package_id_order", "package_id", "order_index", "id"),
+    )
     
     def to_dict(self):
         """Convertir el modelo a diccionario para JSON"""
@@ -168,6 +250,10 @@ class ContactMessage(Base):
     email = Column(String(255), nullable=False)
     phone = Column(String(50), nullable=True)
     message = Column(Text, nullable=False)
+    email_status = Column(String(20), default="pending", nullable=False)  # pending, sending, sent, failed, skipped
+    email_attempts = Column(Integer, default=0, nullable=False)
+    email_claimed_at = Column(DateTime(timezone=True), nullable=True)  # cuándo un worker lo pasó a sending
+    email_sent_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     def to_dict(self):
@@ -178,5 +264,41 @@ class ContactMessage(Base):
             "email": self.email,
             "phone": self.phone,
             "message": self.message,
+            "email_status": self.email_status,
             "created_at": self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class PackageSearchDocument(Base):
+    __tablename__ = "package_search"
+
+    # Textos normalizados (sin tildes, minúsculas); en PostgreSQL migrations.py agrega la
+    # columna generada search_vector (tsvector en español) con su índice GIN
+    package_id = Column(Integer, ForeignKey('packages.id', ondelete='CASCADE'), primary_key=True)
+    title_text = Column(Text, nullable=False, default="")  # título y destino
+    body_text = Column(Text, nullable=False, default="")  # descripción
+    extra_text = Column(Text, nullable=False, default="")  # itinerario, hoteles y features
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Tablas que dependen de un paquete: package_id con ON DELETE CASCADE
+PACKAGE_CHILD_MODELS = (PackageGalleryImage, PackageHotel, PackageInfo, PackageFeature, PackageSearchDocument)
+
+class AssetCleanupFailure(Base):
+    __tablename__ = "asset_cleanup_failures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    public_id = Column(String(500), nullable=False, unique=True)  # public_id de Cloudinary pendiente de borrar
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=1, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def to_dict(self):
+        """Convertir el modelo a diccionario para JSON"""
+        return {
+            "id": self.id,
+            "public_id": self.public_id,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
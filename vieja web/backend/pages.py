@@ -0,0 +1,205 @@
+"""
+Páginas HTML en memoria: precomprimidas (gzip/brotli), con ETag y recarga por mtime
+"""
+import os
+import threading
+from fastapi import Request
+from fastapi.responses import Response
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from compression import CompressedBody, choose_encoding, etag_matches
+from serialization import dumps
+
+# Solo en desarrollo: volver a leer el archivo cuando cambia su mtime (un stat por request).
+# Por defecto las páginas se leen una vez y se sirven de memoria sin tocar el disco.
+HTML_RELOAD = os.getenv("HTML_RELOAD", "false").lower() in ("1", "true", "yes")
+HTML_CACHE_CONTROL = os.getenv("HTML_CACHE_CONTROL", "no-cache")  # el navegador revalida con If-None-Match
+# Renderizar el detalle de paquete en el servidor (con los datos embebidos) en lugar del shell vacío
+PACKAGE_SSR = os.getenv("PACKAGE_SSR", "true").lower() in ("1", "true", "yes")
+
+CATEGORY_NAMES = {
+    "nacional": "Nacional",
+    "internacional": "Internacional",
+    "aventura": "Aventura",
+    "relax": "Relax"
+}
+
+def compressed_response(request: Request, body: CompressedBody, media_type: str, cache_control: str = HTML_CACHE_CONTROL, status_code: int = 200, headers: dict = None) -> Response:
+    """Respuesta con la mejor codificación aceptada, o 304 si el cliente ya tiene esta versión"""
+    encoding = choose_encoding(request, body)
+    headers = {
+        **(headers or {}),
+        "ETag": body.etags[encoding],
+        "Vary": "Accept-Encoding",
+        "Cache-Control": cache_control
+    }
+    if status_code == 200 and etag_matches(request, body):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.encoded(encoding), status_code=status_code, media_type=media_type, headers=headers)
+
+class HTMLShell:
+    """Página HTML cargada en memoria; si viene de un archivo se recarga al cambiar su mtime"""
+
+    def __init__(self, content: str = None, path: str = None, fallback_content: str = None, transform=None):
+        self.path = path
+        self.fallback_content = fallback_content
+        # Transformación aplicada al cargar (ej: URLs de /static con fingerprint)
+        self.transform = transform or (lambda html: html)
+        self._mtime = None
+        self._body = CompressedBody(self.transform(content).encode("utf-8")) if content is not None else None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._body is not None and not HTML_RELOAD:
+            return self._body
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._body is not None and mtime == self._mtime:
+            return self._body
+
+        if mtime is None:
+            filename = os.path.basename(self.path)
+            content = self.fallback_content or f"<h1>Archivo {filename} no encontrado</h1><p>El archivo no está disponible.</p>"
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = f.read()
+            print(f"📄 HTML cargado en memoria: {self.path}")
+        self._body = CompressedBody(self.transform(content).encode("utf-8"))
+        self._mtime = mtime
+        return self._body
+
+    def body(self) -> CompressedBody:
+        if self.path is None:
+            return self._body
+        with self._lock:
+            return self._load()
+
+    def response(self, request: Request) -> Response:
+        return compressed_response(request, self.body(), "text/html")
+
+class HTMLShellRegistry:
+    """Shells por nombre de archivo dentro del directorio del frontend"""
+
+    def __init__(self, base_dir: str, transform=None):
+        self.base_dir = base_dir
+        self.transform = transform
+        self._shells = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str, fallback_content: str = None) -> HTMLShell:
+        with self._lock:
+            shell = self._shells.get(filename)
+            if shell is None:
+                shell = HTMLShell(path=os.path.join(self.base_dir, filename), fallback_content=fallback_content, transform=self.transform)
+                self._shells[filename] = shell
+            return shell
+
+def brochure_viewer_html(title: str, pdf_url: str) -> str:
+    """Página mínima que muestra un PDF a pantalla completa"""
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - ARMAN TRAVEL</title>
+    <link rel="icon" type="image/png" href="/static/images/logo_arman.PNG">
+    <style>
+        * {{ margin: 0; padding: 0; }}
+        html, body {{ width: 100%; height: 100%; overflow: hidden; }}
+        iframe {{ width: 100%; height: 100%; border: none; }}
+    </style>
+</head>
+<body>
+    <iframe src="{pdf_url}"></iframe>
+</body>
+</html>"""
+
+def embed_json(data) -> str:
+    """JSON seguro para insertar dentro de un <script> (sin cerrar la etiqueta ni abrir comentarios)"""
+    content = dumps(data).decode("utf-8")
+    return content.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+def build_srcset(variants, format: str = "webp") -> str:
+    return ", ".join(f"{variant['url']} {variant['width']}w" for variant in (variants or []) if variant.get("format") == format)
+
+def package_page_context(detail: dict) -> dict:
+    """Contexto del template de detalle a partir de load_package_detail"""
+    package = detail["package"]
+    description = package.get("description") or ""
+    paragraphs = [paragraph.strip() for paragraph in description.split("\n") if paragraph.strip()]
+
+    # Mismas reglas que package-detail.js: features de la tabla o, si no hay, las del JSON del paquete
+    feature_texts = [feature["text"] for feature in detail["features"]] or list(package.get("features") or [])
+
+    # La portada de la galería va primero, como en el carrusel
+    gallery = sorted(detail["gallery"], key=lambda image: 0 if image.get("is_cover") else 1)
+
+    hotels = {
+        destination: [{**hotel, "srcset": build_srcset(hotel.get("variants"))} for hotel in destination_hotels]
+        for destination, destination_hotels in detail["hotels"].items()
+    }
+
+    return {
+        "package": package,
+        "category_name": CATEGORY_NAMES.get(package.get("category"), package.get("category")),
+        "description_paragraphs": paragraphs or [description],
+        "feature_texts": feature_texts,
+        "info": detail["info"],
+        "gallery": gallery,
+        "hotels": hotels,
+        "detail_json": embed_json(detail)
+    }
+
+class PackagePageRenderer:
+    """Renderiza package-detail.html con Jinja2; sin paquete devuelve el shell que completa el JS"""
+
+    def __init__(self, base_dir: str, template_name: str = "package-detail.html", transform=None):
+        self.template_name = template_name
+        self.transform = transform or (lambda html: html)
+        self.template_path = os.path.join(base_dir, template_name)
+        self.env = Environment(
+            loader=FileSystemLoader(base_dir),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=HTML_RELOAD
+        )
+        self._shell = None
+        self._shell_version = None
+        self._loaded_version = None
+        self._lock = threading.Lock()
+
+    def template_version(self) -> int:
+        """mtime del template: forma parte de la clave de caché de las páginas renderizadas"""
+        if not HTML_RELOAD and self._loaded_version is not None:
+            return self._loaded_version
+        try:
+            version = os.stat(self.template_path).st_mtime_ns
+        except FileNotFoundError:
+            version = 0
+        # Sin recarga el template de Jinja2 no cambia: la versión se lee una sola vez
+        self._loaded_version = version
+        return version
+
+    def render(self, detail: dict = None) -> str:
+        context = package_page_context(detail) if detail else {"info": [], "gallery": [], "hotels": {}, "feature_texts": []}
+        return self.transform(self.env.get_template(self.template_name).render(**context))
+
+    def render_body(self, detail: dict) -> CompressedBody:
+        # Brotli con calidad media: estas páginas se comprimen en caliente, no al iniciar
+        return CompressedBody(self.render(detail).encode("utf-8"), brotli_quality=6)
+
+    def shell(self) -> CompressedBody:
+        """Página sin datos (el JS carga el paquete); se renderiza una vez por versión del template"""
+        with self._lock:
+            version = self.template_version()
+            if self._shell is None or version != self._shell_version:
+                try:
+                    content = self.render()
+                except Exception as e:
+                    print(f"❌ Error renderizando {self.template_name}: {e}")
+                    content = "<h1>Detalle del Paquete</h1><p>Página no disponible</p>"
+                self._shell = CompressedBody(content.encode("utf-8"))
+                self._shell_version = version
+            return self._shell
@@ -0,0 +1,67 @@
+"""
+Interpretación de los precios cargados como texto ("$45.000", "USD 899", "U$S 1.250,50")
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+DEFAULT_CURRENCY = "ARS"
+
+# El orden importa: "US$" y "U$S" antes que "$"
+CURRENCY_PATTERNS = [
+    ("USD", re.compile(r"\b(?:USD|U\$S|US\$|DOLARES|DÓLARES)", re.IGNORECASE)),
+    ("EUR", re.compile(r"(?:\bEUR\b|€|\bEUROS?\b)", re.IGNORECASE)),
+    ("BRL", re.compile(r"(?:\bBRL\b|R\$)", re.IGNORECASE)),
+    ("ARS", re.compile(r"(?:\bARS\b|\$)", re.IGNORECASE)),
+]
+
+NUMBER_PATTERN = re.compile(r"\d[\d.,]*")
+
+# price_amount es NUMERIC(12, 2): hasta 10 dígitos enteros
+MAX_PRICE_AMOUNT = Decimal("9999999999.99")
+
+def parse_currency(text: str) -> str:
+    for currency, pattern in CURRENCY_PATTERNS:
+        if pattern.search(text):
+            return currency
+    return DEFAULT_CURRENCY
+
+def normalize_number(token: str) -> str:
+    """
+    Convertir un número con separadores locales a formato decimal estándar.
+
+    Se usa la convención argentina ("." miles, "," decimales), pero si hay un solo
+    separador seguido de algo distinto a 3 dígitos se toma como decimal ("899.99").
+    """
+    token = token.rstrip(".,")
+    if "." in token and "," in token:
+        decimal_separator = "," if token.rfind(",") > token.rfind(".") else "."
+        thousands_separator = "." if decimal_separator == "," else ","
+        return token.replace(thousands_separator, "").replace(decimal_separator, ".")
+
+    for separator in (".", ","):
+        if separator in token:
+            groups = token.split(separator)
+            if len(groups) > 2 or len(groups[-1]) == 3:
+                # "45.000", "1.250.000", "1,500": separador de miles
+                return token.replace(separator, "")
+            return token.replace(separator, ".")
+    return token
+
+def parse_price(text):
+    """
+    Devuelve (monto, moneda) a partir del texto del precio; (None, None) si no hay un
+    número o si no entra en la columna (ej: un teléfono pegado en el precio)
+    """
+    if not text:
+        return None, None
+    match = NUMBER_PATTERN.search(text)
+    if not match:
+        return None, None
+    try:
+        amount = Decimal(normalize_number(match.group(0)))
+    except InvalidOperation:
+        return None, None
+    amount = amount.quantize(Decimal("0.01"))
+    if amount > MAX_PRICE_AMOUNT:
+        return None, None
+    return amount, parse_currency(text)
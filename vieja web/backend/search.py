@@ -0,0 +1,134 @@
+"""
+Búsqueda de texto completo sobre paquetes (título, descripción, destino, itinerario, hoteles y features)
+
+En PostgreSQL cada paquete tiene una fila en package_search con un tsvector en español
+generado por la base (columna search_vector, índice GIN) y ranking con ts_rank_cd.
+Los textos se guardan sin tildes y en minúsculas, así que la búsqueda no distingue
+acentos sin depender de la extensión unaccent. En otras bases se usa LIKE como respaldo.
+"""
+import json
+import unicodedata
+from sqlalchemy import select, delete, func, literal_column, and_, case
+from models import Package, PackageFeature, PackageHotel, PackageSearchDocument
+
+SEARCH_CONFIG = "spanish"
+SEARCH_MAX_RESULTS = 50
+
+# Título y destino pesan más que la descripción, y esta más que itinerario/hoteles/features
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title_text, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(body_text, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(extra_text, '')), 'C')"
+)
+
+def normalize_search_text(text) -> str:
+    """Minúsculas y sin tildes ("Región Andina" -> "region andina")"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+def itinerary_text(itinerary) -> str:
+    if isinstance(itinerary, str):
+        try:
+            itinerary = json.loads(itinerary)
+        except ValueError:
+            return itinerary
+    parts = []
+    for day in itinerary or []:
+        if isinstance(day, dict):
+            parts.extend(str(day.get(key) or "") for key in ("title", "description"))
+        else:
+            parts.append(str(day))
+    return " ".join(part for part in parts if part)
+
+def search_fields(package, hotel_names, feature_texts) -> dict:
+    """Textos normalizados de la fila de búsqueda de un paquete"""
+    features = list(feature_texts)
+    if not features and isinstance(package.features, list):
+        features = [str(feature) for feature in package.features]
+    return {
+        "title_text": normalize_search_text(f"{package.title} {package.destination or ''}"),
+        "body_text": normalize_search_text(package.description),
+        "extra_text": normalize_search_text(" ".join([itinerary_text(package.itinerary), *hotel_names, *features]))
+    }
+
+async def refresh_search_document(db, package_id):
+    """
+    Reconstruir la fila de búsqueda de un paquete dentro de la transacción del admin.
+
+    Se llama antes del commit: primero envía las escrituras pendientes de la sesión (así
+    lee los hoteles y features nuevos) y deja la fila ya enviada a la base, de modo que
+    el paquete y su fila de búsqueda se guardan juntos. Los errores se propagan y el
+    handler revierte todo.
+    """
+    await db.flush()
+    package = await db.get(Package, package_id)
+    if package is None:
+        await db.execute(delete(PackageSearchDocument).where(PackageSearchDocument.package_id == package_id))
+        return
+
+    hotel_names = (await db.scalars(select(PackageHotel.name).where(PackageHotel.package_id == package_id))).all()
+    feature_texts = (await db.scalars(
+        select(PackageFeature.text).where(PackageFeature.package_id == package_id).order_by(PackageFeature.order_index)
+    )).all()
+    await db.merge(PackageSearchDocument(package_id=package_id, **search_fields(package, hotel_names, feature_texts)))
+    await db.flush()
+
+def backfill_search_documents(db):
+    """Crear las filas de búsqueda que falten (sesión síncrona, usado por las migraciones y init_db)"""
+    missing = db.scalars(
+        select(Package).outerjoin(PackageSearchDocument, PackageSearchDocument.package_id == Package.id)
+        .where(PackageSearchDocument.package_id.is_(None))
+    ).all()
+    if not missing:
+        return 0
+
+    ids = [package.id for package in missing]
+    hotel_names, feature_texts = {}, {}
+    for package_id, name in db.execute(select(PackageHotel.package_id, PackageHotel.name).where(PackageHotel.package_id.in_(ids))):
+        hotel_names.setdefault(package_id, []).append(name)
+    for package_id, text in db.execute(
+        select(PackageFeature.package_id, PackageFeature.text).where(PackageFeature.package_id.in_(ids)).order_by(PackageFeature.order_index)
+    ):
+        feature_texts.setdefault(package_id, []).append(text)
+
+    for package in missing:
+        db.add(PackageSearchDocument(
+            package_id=package.id,
+            **search_fields(package, hotel_names.get(package.id, []), feature_texts.get(package.id, []))
+        ))
+    db.commit()
+    return len(missing)
+
+async def search_packages(db, query: str, limit: int = 20):
+    """Paquetes que coinciden con la búsqueda, de mayor a menor relevancia"""
+    normalized = normalize_search_text(query).strip()
+    if not normalized:
+        return []
+
+    if db.bind.dialect.name == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), normalized)
+        search_vector = literal_column("package_search.search_vector")
+        rank = func.ts_rank_cd(search_vector, ts_query)
+        statement = (
+            select(Package)
+            .join(PackageSearchDocument, PackageSearchDocument.package_id == Package.id)
+            .where(search_vector.op("@@")(ts_query))
+            .order_by(rank.desc(), Package.id)
+            .limit(limit)
+        )
+    else:
+        # Respaldo sin tsvector (SQLite en desarrollo): todos los términos deben aparecer
+        terms = normalized.split()
+        document = PackageSearchDocument.title_text + " " + PackageSearchDocument.body_text + " " + PackageSearchDocument.extra_text
+        title_matches = and_(*[PackageSearchDocument.title_text.contains(term, autoescape=True) for term in terms])
+        statement = (
+            select(Package)
+            .join(PackageSearchDocument, PackageSearchDocument.package_id == Package.id)
+            .where(and_(*[document.contains(term, autoescape=True) for term in terms]))
+            .order_by(case((title_matches, 0), else_=1), Package.id)
+            .limit(limit)
+        )
+
+    return (await db.scalars(statement)).all()
@@ -0,0 +1,28 @@
+"""
+Serialización JSON de las respuestas: orjson si está instalado, json de la librería estándar si no
+"""
+import json
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _default(value):
+    # orjson ya resuelve datetime/date/UUID; los montos Numeric llegan como Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def dumps(data) -> bytes:
+    """Serializar a JSON compacto en UTF-8"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+# Clase de respuesta por defecto de la app
+DefaultJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
@@ -0,0 +1,78 @@
+"""
+Configuración común de los tests del backend
+
+Los tests corren contra una base SQLite en memoria (cache compartido, así el motor
+síncrono y el async ven las mismas tablas) y nunca contra la base configurada en .env.
+
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+import os
+import sys
+
+os.environ["DATABASE_URL"] = "sqlite:///file:arman_tests?mode=memory&cache=shared&check_same_thread=false&uri=true"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("CLOUDINARY_URL", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event
+from database import engine, async_engine
+from models import Package, PACKAGE_CHILD_MODELS
+from cache import catalog_cache
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _read_uncommitted(dbapi_connection, connection_record):
+    # Con cache compartido una lectura no espera a una escritura en curso: falla con
+    # "table is locked". Así los tests pueden consultar mientras la app escribe.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA read_uncommitted = true")
+    cursor.close()
+
+# Mantiene viva la base en memoria durante toda la sesión de tests
+_keepalive = engine.raw_connection()
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    # El startup aplica las migraciones y carga los paquetes de ejemplo
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def empty_catalog(client):
+    """Catálogo vacío (sin los paquetes de ejemplo) y cache del catálogo limpia"""
+    with engine.begin() as connection:
+        for model in PACKAGE_CHILD_MODELS:
+            connection.execute(delete(model))
+        connection.execute(delete(Package))
+    catalog_cache.invalidate_all()
+    yield
+    catalog_cache.invalidate_all()
+
+class QueryCounter:
+    """Cuenta las sentencias SQL que ejecuta el motor async mientras está activo"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(async_engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_queries():
+    return QueryCounter
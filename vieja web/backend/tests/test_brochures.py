@@ -0,0 +1,39 @@
+"""
+Folletos: el visor siempre disponible para las rutas fijas y metadatos leídos del
+archivo en cada request
+"""
+from brochures import BrochureRegistry
+
+def test_viewer_page_is_served_without_pdf(client):
+    response = client.get("/paquete-f1")
+    assert response.status_code == 200
+    assert '<iframe src="/paquete-f1/pdf">' in response.text
+    assert "<title>Paquete F1 - ARMAN TRAVEL</title>" in response.text
+
+    assert client.get("/paquete-f1/pdf").status_code == 404
+    assert client.get("/paquete-inexistente").status_code == 404
+
+def test_replaced_file_gets_new_metadata(tmp_path):
+    pdf = tmp_path / "BROCHURE-CARIBE-ARMAN-TRAVEL.pdf"
+    pdf.write_bytes(b"%PDF-1.4 primera version")
+    registry = BrochureRegistry([str(tmp_path)]).scan()
+    before = registry.get("caribe")
+
+    pdf.write_bytes(b"%PDF-1.4 segunda version, mas larga")
+    after = registry.get("caribe")
+
+    assert after.size == len(b"%PDF-1.4 segunda version, mas larga")
+    assert after.etag != before.etag
+
+    pdf.unlink()
+    assert registry.get("caribe") is None
+
+def test_pdf_range_uses_current_size(client):
+    full = client.get("/paquete-mundial/pdf")
+    assert full.status_code == 200
+    assert full.headers["content-length"] == str(len(full.content))
+
+    partial = client.get("/paquete-mundial/pdf", headers={"Range": "bytes=0-99", "If-Range": full.headers["etag"]})
+    assert partial.status_code == 206
+    assert partial.content == full.content[:100]
+    assert partial.headers["content-range"] == f"bytes 0-99/{len(full.content)}"
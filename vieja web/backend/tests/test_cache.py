@@ -0,0 +1,21 @@
+"""
+Caché versionada del catálogo
+"""
+from cache import CatalogCache
+
+def test_invalidate_all_forgets_package_versions_without_reviving_entries():
+    cache = CatalogCache()
+    cache.set(("detail", 1), "v0", package_id=1)
+    stale_version = cache.version(1)
+    cache.invalidate_package(1)
+    cache.invalidate_package(2)
+
+    # Paquete 2 borrado: invalidate_all descarta las versiones por paquete
+    cache.invalidate_all()
+    assert cache._package_versions == {}
+
+    # Una respuesta armada antes de la invalidación no vuelve a ser válida
+    cache.set(("detail", 1), "viejo", package_id=1, version=stale_version)
+    assert cache.get(("detail", 1), package_id=1) is None
+    cache.set(("detail", 1), "nuevo", package_id=1, version=cache.version(1))
+    assert cache.get(("detail", 1), package_id=1) == "nuevo"
@@ -0,0 +1,84 @@
+"""
+Regresión del N+1 del catálogo: /packages y /packages/promoted hacen siempre la
+misma cantidad de consultas (paquetes + features), sin importar cuántos paquetes haya
+"""
+import pytest
+from sqlalchemy import insert
+from database import engine
+from models import Package, PackageFeature
+from cache import catalog_cache
+
+# SELECT de paquetes + SELECT de las features de todos ellos
+CATALOG_QUERIES = 2
+
+def seed_packages(count):
+    with engine.begin() as connection:
+        ids = connection.execute(insert(Package).returning(Package.id), [
+            {"title": f"Paquete {index}", "description": "Paquete de prueba", "price": "USD 1.000",
+             "image": "https://example.com/cover.jpg", "category": "nacional", "features": [],
+             "gallery_images": [], "itinerary": [], "promoted": True, "carousel_order": index}
+            for index in range(count)
+        ]).scalars().all()
+        connection.execute(insert(PackageFeature), [
+            {"package_id": package_id, "text": f"Feature {n}", "order_index": n}
+            for package_id in ids for n in range(3)
+        ])
+
+def catalog_query_count(client, count_queries, url, expected_packages):
+    catalog_cache.invalidate_all()
+    with count_queries() as counter:
+        response = client.get(url)
+    assert response.status_code == 200
+    packages = response.json()
+    assert len(packages) == expected_packages
+    assert all(package["features"] == ["Feature 0", "Feature 1", "Feature 2"] for package in packages)
+    return counter.count
+
+@pytest.mark.parametrize("url", ["/packages", "/packages/promoted"])
+def test_catalog_query_count_is_constant(client, empty_catalog, count_queries, url):
+    seed_packages(1)
+    with_one = catalog_query_count(client, count_queries, url, 1)
+
+    seed_packages(49)
+    with_fifty = catalog_query_count(client, count_queries, url, 50)
+
+    assert with_one == CATALOG_QUERIES
+    assert with_fifty == with_one
+
+def test_cached_catalog_skips_database(client, empty_catalog, count_queries):
+    seed_packages(3)
+    catalog_query_count(client, count_queries, "/packages", 3)
+    with count_queries() as counter:
+        assert client.get("/packages").status_code == 200
+    assert counter.count == 0
+
+def seed_priced_packages(prices):
+    with engine.begin() as connection:
+        connection.execute(insert(Package), [
+            {"title": f"Paquete {index}", "description": "Paquete de prueba", "price": price,
+             "price_amount": amount, "price_currency": currency,
+             "image": "https://example.com/cover.jpg", "category": "nacional", "features": [],
+             "gallery_images": [], "itinerary": []}
+            for index, (price, amount, currency) in enumerate(prices)
+        ])
+
+@pytest.mark.parametrize("params", [{"sort": "price"}, {"sort": "-price"}, {"min_price": 1000}, {"max_price": 1000}])
+def test_price_sort_and_range_require_currency(client, empty_catalog, params):
+    response = client.get("/packages", params=params)
+    assert response.status_code == 400
+    assert "currency" in response.json()["detail"]
+
+def test_price_sort_pages_within_one_currency(client, empty_catalog):
+    seed_priced_packages([
+        ("USD 899", 899, "USD"), ("$45.000", 45000, "ARS"), ("USD 1.500", 1500, "USD"),
+        ("USD 300", 300, "USD"), ("$12.000", 12000, "ARS"),
+    ])
+    first = client.get("/packages", params={"sort": "price", "currency": "usd", "limit": 2})
+    second = client.get("/packages", params={"sort": "price", "currency": "usd", "cursor": first.headers["x-next-cursor"]})
+
+    prices = [package["price"] for package in first.json() + second.json()]
+    assert prices == ["USD 300", "USD 899", "USD 1.500"]
+    other_currency = client.get("/packages", params={"sort": "price", "currency": "ARS", "cursor": first.headers["x-next-cursor"]})
+    assert other_currency.status_code == 400
+    above = client.get("/packages", params={"currency": "USD", "min_price": 1000}).json()
+    assert [package["price"] for package in above] == ["USD 1.500"]
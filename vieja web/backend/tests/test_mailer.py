@@ -0,0 +1,175 @@
+"""
+Cola de notificaciones de contacto contra un servidor SMTP falso en proceso:
+lotes por una sola conexión, reintentos con backoff hasta failed, mensajes pendientes
+al iniciar y reclamo atómico (un mensaje nunca se envía dos veces)
+"""
+import asyncio
+import smtplib
+import pytest
+from sqlalchemy import delete, insert, select
+from database import engine, AsyncSessionLocal
+from models import ContactMessage
+import mailer
+from mailer import ContactMailer, EMAIL_PENDING, EMAIL_SENDING, EMAIL_SENT, EMAIL_FAILED
+
+class FakeSMTP:
+    """Reemplazo de smtplib.SMTP que guarda los mensajes recibidos por cada conexión"""
+
+    connections = []
+    fail_with = None  # excepción a lanzar en cada envío
+
+    def __init__(self, host, port, timeout=None):
+        self.messages = []
+        self.closed = False
+        FakeSMTP.connections.append(self)
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected("conexión cerrada")
+        return (250, b"OK")
+
+    def send_message(self, message):
+        if FakeSMTP.fail_with is not None:
+            raise FakeSMTP.fail_with
+        self.messages.append(message)
+
+    def quit(self):
+        self.closed = True
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.connections = []
+    FakeSMTP.fail_with = None
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(mailer, "SMTP_ENABLED", True)
+    with engine.begin() as connection:
+        connection.execute(delete(ContactMessage))
+    return FakeSMTP
+
+def add_contacts(count, status=EMAIL_PENDING):
+    with engine.begin() as connection:
+        return connection.execute(insert(ContactMessage).returning(ContactMessage.id), [
+            {"name": f"Cliente {index}", "email": f"cliente{index}@example.com",
+             "message": "Consulta", "email_status": status}
+            for index in range(count)
+        ]).scalars().all()
+
+def contact_rows():
+    with engine.connect() as connection:
+        return connection.execute(
+            select(ContactMessage.id, ContactMessage.email_status, ContactMessage.email_attempts)
+            .order_by(ContactMessage.id)
+        ).all()
+
+class RecordingMailer(ContactMailer):
+    """ContactMailer que anota cada lote entregado y cada reintento programado"""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.retry_delays = []
+        self.delivering = 0
+
+    async def _deliver(self, message_ids):
+        self.batches.append(list(message_ids))
+        self.delivering += 1
+        try:
+            await super()._deliver(message_ids)
+        finally:
+            self.delivering -= 1
+
+    def idle(self):
+        return not self.delivering and not self._retries and (self._queue is None or self._queue.empty())
+
+    def _schedule_retry(self, message_id, delay):
+        self.retry_delays.append(delay)
+        super()._schedule_retry(message_id, delay)
+
+async def wait_until_done(contact_mailer, timeout=5):
+    """Esperar a que el worker esté libre y no queden mensajes pendientes ni en envío"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not contact_mailer.idle() or any(status in (EMAIL_PENDING, EMAIL_SENDING) for _, status, _ in contact_rows()):
+        assert loop.time() < deadline, "la cola no terminó a tiempo"
+        await asyncio.sleep(0.01)
+
+def run(client, test):
+    """Correr la corrutina en el event loop de la app (el del motor async)"""
+    async def scenario():
+        contact_mailer = RecordingMailer()
+        try:
+            await test(contact_mailer)
+        finally:
+            await contact_mailer.stop()
+        return contact_mailer
+
+    return client.portal.call(scenario)
+
+def test_pending_messages_are_sent_at_startup_in_one_batch(client, smtp):
+    ids = add_contacts(3)
+
+    async def scenario(contact_mailer):
+        await contact_mailer.start()
+        await wait_until_done(contact_mailer)
+
+    contact_mailer = run(client, scenario)
+
+    assert contact_mailer.batches == [ids]
+    assert len(smtp.connections) == 1
+    assert len(smtp.connections[0].messages) == 3
+    assert [status for _, status, _ in contact_rows()] == [EMAIL_SENT] * 3
+
+def test_batches_share_one_connection(client, smtp, monkeypatch):
+    monkeypatch.setattr(mailer, "EMAIL_BATCH_SIZE", 4)
+
+    async def scenario(contact_mailer):
+        await contact_mailer.start()
+        for message_id in add_contacts(10):
+            contact_mailer.enqueue(message_id)
+        await wait_until_done(contact_mailer)
+
+    contact_mailer = run(client, scenario)
+
+    assert [len(batch) for batch in contact_mailer.batches] == [4, 4, 2]
+    assert len(smtp.connections) == 1
+    assert len(smtp.connections[0].messages) == 10
+
+def test_failed_sends_back_off_until_failed(client, smtp, monkeypatch):
+    monkeypatch.setattr(mailer, "EMAIL_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(mailer, "EMAIL_RETRY_BASE_DELAY", 0.01)
+    smtp.fail_with = smtplib.SMTPRecipientsRefused({})
+    [message_id] = add_contacts(1)
+
+    async def scenario(contact_mailer):
+        await contact_mailer.start()
+        await wait_until_done(contact_mailer)
+
+    contact_mailer = run(client, scenario)
+
+    assert contact_mailer.batches == [[message_id]] * 3
+    assert contact_mailer.retry_delays == [0.01, 0.02]
+    assert contact_rows() == [(message_id, EMAIL_FAILED, 3)]
+
+def test_claimed_messages_are_not_sent_twice(client, smtp):
+    ids = add_contacts(2)
+
+    async def scenario(contact_mailer):
+        other_worker = ContactMailer()
+        async with AsyncSessionLocal() as db:
+            # Otro worker reclama el primero antes de que este llegue a enviarlo
+            assert await other_worker._claim(db, ids[:1]) == ids[:1]
+            assert await other_worker._claim(db, ids[:1]) == []
+        await contact_mailer._deliver(ids)
+        await contact_mailer._deliver(ids)
+
+    contact_mailer = run(client, scenario)
+
+    assert contact_mailer.batches == [ids, ids]
+    assert len(smtp.connections[0].messages) == 1
+    assert [status for _, status, _ in contact_rows()] == [EMAIL_SENDING, EMAIL_SENT]
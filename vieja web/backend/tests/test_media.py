@@ -0,0 +1,28 @@
+"""
+Reintento periódico de los borrados de Cloudinary que fallaron
+"""
+import asyncio
+import pytest
+import media
+
+def test_cleanup_retries_back_off_while_failing(monkeypatch):
+    monkeypatch.setattr(media, "CLEANUP_RETRY_INTERVAL", 10)
+    monkeypatch.setattr(media, "CLEANUP_RETRY_MAX_INTERVAL", 35)
+    # Pendientes en las primeras cuatro vueltas, después todo limpio
+    rounds = iter([True, True, True, True, False, True])
+    delays = []
+
+    async def fake_retry():
+        return next(rounds)
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        if len(delays) == 6:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(media, "retry_failed_cleanups", fake_retry)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(media.run_cleanup_retries())
+
+    assert delays == [10, 20, 35, 35, 10, 10]
@@ -0,0 +1,22 @@
+"""
+Páginas HTML en memoria
+"""
+import os
+import pages
+from pages import HTMLShell
+
+def test_shell_is_served_from_memory_without_reload(tmp_path, monkeypatch):
+    page = tmp_path / "index.html"
+    page.write_text("<h1>v1</h1>", encoding="utf-8")
+    shell = HTMLShell(path=str(page))
+    assert shell._load().identity == b"<h1>v1</h1>"
+
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda path, *args, **kwargs: stats.append(path) or real_stat(path, *args, **kwargs))
+    page.write_text("<h1>v2</h1>", encoding="utf-8")
+    assert shell._load().identity == b"<h1>v1</h1>"
+    assert stats == []
+
+    monkeypatch.setattr(pages, "HTML_RELOAD", True)
+    assert shell._load().identity == b"<h1>v2</h1>"
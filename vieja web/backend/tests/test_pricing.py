@@ -0,0 +1,33 @@
+"""
+Interpretación del texto de precio
+"""
+from decimal import Decimal
+import pytest
+from pricing import parse_price, MAX_PRICE_AMOUNT
+
+@pytest.mark.parametrize("text, expected", [
+    ("$45.000", (Decimal("45000.00"), "ARS")),
+    ("USD 899", (Decimal("899.00"), "USD")),
+    ("U$S 1.250,50", (Decimal("1250.50"), "USD")),
+    ("Consultar", (None, None)),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
+
+@pytest.mark.parametrize("text", ["Consultar al 1145678901234", "$ 99999999999", "USD 10.000.000.000"])
+def test_amount_beyond_column_precision_is_ignored(text):
+    assert parse_price(text) == (None, None)
+
+def test_largest_amount_that_fits_the_column():
+    assert parse_price("$ 9.999.999.999,99") == (MAX_PRICE_AMOUNT, "ARS")
+
+def test_admin_save_with_long_digit_run_keeps_text_only(client):
+    token = client.post("/admin/login", json={"username": "admin", "password": "arman123"}).json()["access_token"]
+    response = client.post("/admin/packages", headers={"Authorization": f"Bearer {token}"}, json={
+        "title": "Paquete con teléfono", "description": "D", "price": "Llamar al 541145678901",
+        "image": "https://example.com/cover.jpg", "category": "nacional", "features": []
+    })
+    assert response.status_code == 200
+    package = response.json()
+    assert package["price"] == "Llamar al 541145678901"
+    assert package["price_amount"] is None
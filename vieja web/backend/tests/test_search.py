@@ -0,0 +1,50 @@
+"""
+La fila de búsqueda se guarda en la misma transacción que la escritura del admin
+"""
+import pytest
+import search
+from database import engine
+from models import Package
+from sqlalchemy import select
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post("/admin/login", json={"username": "admin", "password": "arman123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def create_package(client, admin_headers, title):
+    response = client.post("/admin/packages", headers=admin_headers, json={
+        "title": title, "description": "Lagos y montañas", "price": "USD 900",
+        "image": "https://example.com/cover.jpg", "category": "nacional", "features": [], "destination": "Bariloche"
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def search_ids(client, query):
+    response = client.get("/packages/search", params={"q": query})
+    assert response.status_code == 200
+    return [package["id"] for package in response.json()]
+
+def test_admin_writes_update_search_document(client, empty_catalog, admin_headers):
+    package_id = create_package(client, admin_headers, "Escapada Patagónica")
+    assert search_ids(client, "patagonica") == [package_id]
+
+    response = client.post(f"/admin/packages/{package_id}/features", headers=admin_headers, json={"text": "Excursión en kayak"})
+    assert response.status_code == 200
+    assert search_ids(client, "kayak") == [package_id]
+
+def test_failed_search_refresh_rolls_back_the_write(client, empty_catalog, admin_headers, monkeypatch):
+    package_id = create_package(client, admin_headers, "Escapada Patagónica")
+
+    def broken_search_fields(*args):
+        raise RuntimeError("índice no disponible")
+
+    monkeypatch.setattr(search, "search_fields", broken_search_fields)
+    response = client.put(f"/admin/packages/{package_id}", headers=admin_headers, json={"title": "Escapada Andina"})
+    assert response.status_code == 500
+
+    with engine.connect() as connection:
+        assert connection.scalar(select(Package.title).where(Package.id == package_id)) == "Escapada Patagónica"
+    monkeypatch.undo()
+    assert search_ids(client, "patagonica") == [package_id]
+    assert search_ids(client, "andina") == []
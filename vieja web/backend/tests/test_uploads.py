@@ -0,0 +1,14 @@
+"""
+Límite de tamaño de las subidas
+"""
+from uploads import MAX_UPLOAD_REQUEST_SIZE
+
+def test_oversized_upload_is_rejected_with_cors_headers(client):
+    response = client.post(
+        "/admin/packages/1/gallery/upload",
+        headers={"Origin": "https://admin.example.com"},
+        files={"file": ("grande.jpg", b"\xff" * (MAX_UPLOAD_REQUEST_SIZE + 1), "image/jpeg")}
+    )
+    assert response.status_code == 413
+    assert "Máximo permitido" in response.json()["detail"]
+    assert "access-control-allow-origin" in response.headers
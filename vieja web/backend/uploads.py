@@ -0,0 +1,137 @@
+"""
+Validación de subidas de imágenes: límite de tamaño en streaming y detección por magic bytes
+"""
+import os
+import json
+from fastapi import HTTPException, UploadFile
+
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(5 * 1024 * 1024)))  # 5MB
+# Margen para los boundaries y los campos de texto del multipart
+MULTIPART_OVERHEAD = 64 * 1024
+MAX_UPLOAD_REQUEST_SIZE = MAX_FILE_SIZE + MULTIPART_OVERHEAD
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".jfif", ".bmp"}
+
+# Firmas de los formatos aceptados: (content type, [(offset, bytes)]), deben coincidir todas
+IMAGE_SIGNATURES = [
+    ("image/jpeg", [(0, b"\xff\xd8\xff")]),
+    ("image/png", [(0, b"\x89PNG\r\n\x1a\n")]),
+    ("image/gif", [(0, b"GIF87a")]),
+    ("image/gif", [(0, b"GIF89a")]),
+    ("image/webp", [(0, b"RIFF"), (8, b"WEBP")]),
+    ("image/bmp", [(0, b"BM")]),
+]
+SNIFF_BYTES = 16
+
+def is_valid_image_file(filename: str) -> bool:
+    """Verificar si el archivo es una imagen válida"""
+    return any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS)
+
+def sniff_image_type(header: bytes):
+    """Detectar el tipo de imagen por sus primeros bytes; None si no es un formato aceptado"""
+    for content_type, signatures in IMAGE_SIGNATURES:
+        if all(header[offset:offset + len(signature)] == signature for offset, signature in signatures):
+            return content_type
+    return None
+
+def file_too_large_error() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Archivo muy grande. Máximo permitido: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
+    )
+
+async def validate_image_upload(file: UploadFile) -> str:
+    """Validar nombre, tamaño y contenido real de una imagen subida; devuelve su content type"""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No se proporcionó archivo")
+
+    if not is_valid_image_file(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de archivo no válido. Permitidos: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+
+    # El tamaño lo calcula el parser de multipart mientras recibe el archivo
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise file_too_large_error()
+
+    # No confiar en la extensión: mirar los magic bytes
+    header = await file.read(SNIFF_BYTES)
+    await file.seek(0)
+    content_type = sniff_image_type(header)
+    if content_type is None:
+        raise HTTPException(status_code=400, detail="El archivo no es una imagen válida")
+
+    return content_type
+
+class RequestTooLarge(HTTPException):
+    """Se lanza desde receive(); al ser HTTPException, FastAPI la convierte en un 413"""
+
+    def __init__(self):
+        error = file_too_large_error()
+        super().__init__(status_code=error.status_code, detail=error.detail)
+
+class UploadSizeLimitMiddleware:
+    """
+    Middleware ASGI que corta las subidas multipart apenas superan el límite.
+
+    Si el cliente manda Content-Length se rechaza antes de leer el body; si no
+    (chunked), se cuentan los bytes a medida que llegan y se responde 413 en
+    cuanto se pasa del máximo, sin esperar a recibir el archivo completo.
+    """
+
+    def __init__(self, app, max_body_size: int = MAX_UPLOAD_REQUEST_SIZE):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self.send_too_large(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise RequestTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if not response_started:
+                await self.send_too_large(send)
+
+    async def send_too_large(self, send):
+        body = json.dumps({"detail": file_too_large_error().detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
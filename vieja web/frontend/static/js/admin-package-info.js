@@ -3,11 +3,11 @@
 let currentEditingInfo = null;
 
 // Cargar información del paquete
-async function loadPackageInfo(packageId) {
+async function loadPackageInfo(packageId, preloadedInfo = null) {
     try {
-        const response = await fetch(`/packages/${packageId}/info`);
-        if (response.ok) {
-            const infoItems = await response.json();
+        const response = preloadedInfo ? null : await fetch(`/packages/${packageId}/info`);
+        if (preloadedInfo || response.ok) {
+            const infoItems = preloadedInfo || await response.json();
             displayPackageInfo(infoItems);
         }
     } catch (error) {
@@ -149,11 +149,11 @@ async function savePackageInfo() {
 let currentEditingFeature = null;
 
 // Cargar características del paquete
-async function loadPackageFeatures(packageId) {
+async function loadPackageFeatures(packageId, preloadedFeatures = null) {
     try {
-        const response = await fetch(`/packages/${packageId}/features`);
-        if (response.ok) {
-            const features = await response.json();
+        const response = preloadedFeatures ? null : await fetch(`/packages/${packageId}/features`);
+        if (preloadedFeatures || response.ok) {
+            const features = preloadedFeatures || await response.json();
             displayPackageFeatures(features);
         }
     } catch (error) {
@@ -599,8 +599,11 @@ function openPackageModal(packageId = null) {
             document.getElementById('priceTag').value = package.price_tag || 'DESDE';
             document.getElementById('image').value = package.image;
             document.getElementById('category').value = package.category;
+            // Cargar galería, hoteles, info y características en una sola petición
+            const sectionsPromise = fetchPackageSections(packageId);
+
             // Cargar características desde la nueva API
-            loadFeaturesIntoTextarea(packageId);
+            sectionsPromise.then(sections => loadFeaturesIntoTextarea(packageId, sections && sections.features));
             
             // Llenar campos adicionales
             document.getElementById('duration').value = package.duration || '';
@@ -609,22 +612,22 @@ function openPackageModal(packageId = null) {
             
             // Mostrar sección de galería y cargarla
             gallerySection.style.display = 'block';
-            loadPackageGallery(packageId);
+            sectionsPromise.then(sections => loadPackageGallery(packageId, sections && sections.gallery));
             
             // Mostrar sección de hoteles y cargarlos
             const hotelsSection = document.getElementById('hotelsSection');
             hotelsSection.style.display = 'block';
-            loadPackageHotels(packageId);
+            sectionsPromise.then(sections => loadPackageHotels(packageId, sections && sections.hotels));
             
             // Mostrar sección de información del paquete y cargarla
             const packageInfoSection = document.getElementById('packageInfoSection');
             packageInfoSection.style.display = 'block';
-            loadPackageInfo(packageId);
+            sectionsPromise.then(sections => loadPackageInfo(packageId, sections && sections.info));
             
             // Mostrar sección de características y cargarlas
             const packageFeaturesSection = document.getElementById('packageFeaturesSection');
             packageFeaturesSection.style.display = 'block';
-            loadPackageFeatures(packageId);
+            sectionsPromise.then(sections => loadPackageFeatures(packageId, sections && sections.features));
             
             // Cargar itinerario
             loadItineraryData(package.itinerary || []);
@@ -676,6 +679,20 @@ function openPackageModal(packageId = null) {
     }, 10);
 }
 
+// Obtener galería, hoteles, info y características de un paquete en una sola petición
+async function fetchPackageSections(packageId) {
+    try {
+        const response = await fetch(`${API_BASE_URL}/packages/${packageId}/full`);
+        if (response.ok) {
+            return await response.json();
+        }
+    } catch (error) {
+        console.error('Error cargando detalle completo del paquete:', error);
+    }
+    // Si falla, cada sección se carga por separado desde su endpoint
+    return null;
+}
+
 // Editar paquete
 function editPackage(id) {
     openPackageModal(id);
@@ -838,7 +855,10 @@ async function handlePackageSubmit(e) {
             try {
                 if (featuresArray.length > 0) {
                     console.log('Sincronizando características a PackageFeature...');
-                    await syncFeaturesToPackageFeatureTable(packageId, featuresArray);
+                    const featuresResponse = await syncFeaturesToPackageFeatureTable(packageId, featuresArray);
+                    if (!featuresResponse.ok) {
+                        throw new Error(`Error ${featuresResponse.status}`);
+                    }
                     console.log('Características sincronizadas exitosamente');
                 }
             } catch (featError) {
@@ -1036,11 +1056,11 @@ function initializeGalleryHandlers() {
 }
 
 // Cargar galería de un paquete
-async function loadPackageGallery(packageId) {
+async function loadPackageGallery(packageId, preloadedImages = null) {
     try {
-        const response = await fetch(`${API_BASE_URL}/packages/${packageId}/gallery`);
-        if (response.ok) {
-            const galleryImages = await response.json();
+        const response = preloadedImages ? null : await fetch(`${API_BASE_URL}/packages/${packageId}/gallery`);
+        if (preloadedImages || response.ok) {
+            const galleryImages = preloadedImages || await response.json();
             
             // Si no hay imágenes en galería, crear una entrada para la imagen principal
             if (galleryImages.length === 0) {
@@ -2512,11 +2532,11 @@ function parseHotelPrice(priceString) {
 }
 
 // Cargar hoteles de un paquete (ahora carga a tempHotels)
-async function loadPackageHotels(packageId) {
+async function loadPackageHotels(packageId, preloadedHotels = null) {
     try {
-        const response = await fetch(`${API_BASE_URL}/packages/${packageId}/hotels`);
-        if (response.ok) {
-            const hotelsData = await response.json();
+        const response = preloadedHotels ? null : await fetch(`${API_BASE_URL}/packages/${packageId}/hotels`);
+        if (preloadedHotels || response.ok) {
+            const hotelsData = preloadedHotels || await response.json();
             // Si el nuevo formato devuelve un objeto agrupado por destinos, aplanarlo
             let hotels = [];
             if (typeof hotelsData === 'object' && !Array.isArray(hotelsData)) {
@@ -3053,94 +3073,34 @@ async function saveHotelsToPackage(packageId) {
     const token = localStorage.getItem('admin_token');
     
     try {
-        // Primero obtener hoteles existentes para comparar
-        const existingResponse = await fetch(`${API_BASE_URL}/packages/${packageId}/hotels`);
-        let existingHotels = [];
-        if (existingResponse.ok) {
-            const hotelsData = await existingResponse.json();
-            // Si el nuevo formato devuelve un objeto agrupado por destinos, aplanarlo
-            if (typeof hotelsData === 'object' && !Array.isArray(hotelsData)) {
-                // Nuevo formato: { "Destino 1": [hotels], "Destino 2": [hotels] }
-                Object.values(hotelsData).forEach(destinationHotels => {
-                    existingHotels = existingHotels.concat(destinationHotels);
-                });
-            } else {
-                // Formato legacy: array directo
-                existingHotels = hotelsData;
-            }
-        }
-
-        console.log('Hoteles existentes:', existingHotels);
+        // Lista completa deseada: el servidor crea, actualiza, elimina y reordena en un solo commit
+        const hotelsToSync = tempHotels.map(hotel => ({
+            id: hotel.isExisting && hotel.id ? hotel.id : null,
+            name: hotel.name,
+            description: hotel.description,
+            price: hotel.price,
+            image_url: hotel.image_url,
+            destination: hotel.destination || 'Destino principal',
+            days: hotel.days || 1,
+            allow_user_days: hotel.allow_user_days || false,
+            allow_multiple_per_destination: hotel.allow_multiple_per_destination || false,
+            amenities: hotel.amenities || []
+        }));
+        console.log('Sincronizando hoteles:', hotelsToSync.length);
 
-        // Eliminar hoteles que ya no están en tempHotels
-        const tempHotelIds = tempHotels.filter(h => h.isExisting && h.id).map(h => h.id);
-        for (const existingHotel of existingHotels) {
-            if (!tempHotelIds.includes(existingHotel.id)) {
-                console.log('Eliminando hotel:', existingHotel.name);
-                await fetch(`${API_BASE_URL}/admin/packages/${packageId}/hotels/${existingHotel.id}`, {
-                    method: 'DELETE',
-                    headers: { 'Authorization': `Bearer ${token}` }
-                });
-            }
-        }
-        
-        // Actualizar hoteles existentes que fueron modificados
-        for (const hotel of tempHotels.filter(h => h.isExisting && h.id)) {
-            console.log('Actualizando hotel existente:', hotel.name);
-            await fetch(`${API_BASE_URL}/admin/packages/${packageId}/hotels/${hotel.id}`, {
-                method: 'PUT',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
-                },
-                body: JSON.stringify({
-                    name: hotel.name,
-                    description: hotel.description,
-                    price: hotel.price,
-                    image_url: hotel.image_url,
-                    destination: hotel.destination || 'Destino principal',
-                    days: hotel.days || 1,
-                    allow_user_days: hotel.allow_user_days || false,
-                    allow_multiple_per_destination: hotel.allow_multiple_per_destination || false,
-                    amenities: hotel.amenities || []
-                })
-            });
-        }
-        
-        // Crear nuevos hoteles
-        const newHotels = tempHotels.filter(hotel => !hotel.isExisting);
-        console.log('Creando hoteles nuevos:', newHotels.length);
-        
-        for (const hotel of newHotels) {
-            console.log('Creando hotel:', hotel.name);
-            const hotelDataToSend = {
-                name: hotel.name,
-                description: hotel.description,
-                price: hotel.price,
-                image_url: hotel.image_url,
-                destination: hotel.destination || 'Destino principal',
-                days: hotel.days || 1,
-                allow_user_days: hotel.allow_user_days || false,
-                allow_multiple_per_destination: hotel.allow_multiple_per_destination || false,
-                amenities: hotel.amenities || []
-            };
-            console.log('Datos del hotel a enviar:', JSON.stringify(hotelDataToSend, null, 2));
-            const response = await fetch(`${API_BASE_URL}/admin/packages/${packageId}/hotels`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
-                },
-                body: JSON.stringify(hotelDataToSend)
-            });
+        const response = await fetch(`${API_BASE_URL}/admin/packages/${packageId}/hotels`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify(hotelsToSync)
+        });
 
-            if (!response.ok) {
-                const errorData = await response.text();
-                console.error('Error al guardar hotel:', hotel.name, errorData);
-                throw new Error(`Error al guardar hotel: ${hotel.name}`);
-            } else {
-                console.log('Hotel guardado exitosamente:', hotel.name);
-            }
+        if (!response.ok) {
+            const errorData = await response.text();
+            console.error('Error al guardar hoteles:', errorData);
+            throw new Error(`Error al guardar hoteles: ${response.status}`);
         }
         
         console.log('Todos los hoteles guardados correctamente');
@@ -3772,45 +3732,12 @@ async function updatePackageFeatures() {
     }
 
     try {
-        const token = localStorage.getItem('admin_token');
-
-        // PASO 1: Obtener características existentes
-        const existingResponse = await fetch(`${API_BASE_URL}/packages/${packageId}/features`, {
-            headers: { 'Authorization': `Bearer ${token}` }
-        });
-
-        let existingFeatures = [];
-        if (existingResponse.ok) {
-            existingFeatures = await existingResponse.json();
-        }
-
-        // PASO 2: Eliminar todas las características existentes
-        console.log('Eliminando características existentes:', existingFeatures.length);
-        for (const feature of existingFeatures) {
-            await fetch(`${API_BASE_URL}/admin/packages/${packageId}/features/${feature.id}`, {
-                method: 'DELETE',
-                headers: { 'Authorization': `Bearer ${token}` }
-            });
-        }
-
-        // PASO 3: Agregar todas las características del textarea
-        console.log('Agregando nuevas características:', newFeatures.length);
-        let addedCount = 0;
-        for (const feature of newFeatures) {
-            const response = await fetch(`${API_BASE_URL}/admin/packages/${packageId}/features`, {
-                method: 'POST',
-                headers: {
-                    'Authorization': `Bearer ${token}`,
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({ text: feature })
-            });
-
-            if (response.ok) {
-                addedCount++;
-            } else {
-                console.error(`Error al agregar característica "${feature}":`, response.statusText);
-            }
+        // Reemplazar todas las características en un solo request
+        const response = await syncFeaturesToPackageFeatureTable(packageId, newFeatures);
+        const savedFeatures = response.ok ? await response.json() : [];
+        const addedCount = savedFeatures.length;
+        if (!response.ok) {
+            console.error('Error al sincronizar características:', response.statusText);
         }
 
         if (addedCount > 0) {
@@ -3819,8 +3746,8 @@ async function updatePackageFeatures() {
             // NO limpiar el textarea - mantener el contenido
             // featuresTextarea.value = '';
 
-            // Recargar las características en la sección "¿Qué Incluye?"
-            loadPackageFeatures(packageId);
+            // Mostrar en "¿Qué Incluye?" el estado final que devolvió el servidor
+            loadPackageFeatures(packageId, savedFeatures);
         } else {
             showNotification('No se pudieron sincronizar las características', 'error');
         }
@@ -3834,38 +3761,20 @@ async function updatePackageFeatures() {
 // Sincronizar un array de features al PackageFeature table (reemplaza todas las existentes)
 async function syncFeaturesToPackageFeatureTable(packageId, featuresArray) {
     const token = localStorage.getItem('admin_token');
-
-    // PASO 1: Obtener características existentes
-    const existingResponse = await fetch(`${API_BASE_URL}/packages/${packageId}/features`, {
-        headers: { 'Authorization': `Bearer ${token}` }
+    const features = featuresArray
+        .map(featureText => featureText.trim())
+        .filter(featureText => featureText.length > 0)
+        .map(featureText => ({ text: featureText }));
+
+    // El servidor compara con las existentes y aplica altas, bajas y orden en un solo commit
+    return fetch(`${API_BASE_URL}/admin/packages/${packageId}/features`, {
+        method: 'PUT',
+        headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(features)
     });
-
-    let existingFeatures = [];
-    if (existingResponse.ok) {
-        existingFeatures = await existingResponse.json();
-    }
-
-    // PASO 2: Eliminar todas las características existentes
-    for (const feature of existingFeatures) {
-        await fetch(`${API_BASE_URL}/admin/packages/${packageId}/features/${feature.id}`, {
-            method: 'DELETE',
-            headers: { 'Authorization': `Bearer ${token}` }
-        });
-    }
-
-    // PASO 3: Agregar todas las nuevas características
-    for (const featureText of featuresArray) {
-        const trimmed = featureText.trim();
-        if (trimmed.length === 0) continue;
-        await fetch(`${API_BASE_URL}/admin/packages/${packageId}/features`, {
-            method: 'POST',
-            headers: {
-                'Authorization': `Bearer ${token}`,
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ text: trimmed })
-        });
-    }
 }
 
 // Sanitizar texto de características: quitar especiales/emojis, limitar largo y líneas
@@ -3923,15 +3832,15 @@ function initFeaturesTextareaValidation() {
 }
 
 // Función para cargar características en el textarea
-async function loadFeaturesIntoTextarea(packageId) {
+async function loadFeaturesIntoTextarea(packageId, preloadedFeatures = null) {
     try {
         const token = localStorage.getItem('admin_token');
-        const response = await fetch(`${API_BASE_URL}/packages/${packageId}/features`, {
+        const response = preloadedFeatures ? null : await fetch(`${API_BASE_URL}/packages/${packageId}/features`, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
 
-        if (response.ok) {
-            const features = await response.json();
+        if (preloadedFeatures || response.ok) {
+            const features = preloadedFeatures || await response.json();
             const featuresTextarea = document.getElementById('features');
             if (featuresTextarea) {
                 let text = '';
@@ -3956,17 +3865,17 @@ async function loadFeaturesIntoTextarea(packageId) {
 }
 
 // Función para cargar características del paquete
-async function loadPackageFeatures(packageId) {
+async function loadPackageFeatures(packageId, preloadedFeatures = null) {
     try {
         const token = localStorage.getItem('admin_token');
-        const response = await fetch(`${API_BASE_URL}/packages/${packageId}/features`, {
+        const response = preloadedFeatures ? null : await fetch(`${API_BASE_URL}/packages/${packageId}/features`, {
             headers: {
                 'Authorization': `Bearer ${token}`
             }
         });
 
-        if (response.ok) {
-            const features = await response.json();
+        if (preloadedFeatures || response.ok) {
+            const features = preloadedFeatures || await response.json();
             displayPackageFeatures(features);
         } else {
             console.error('Error al cargar características:', response.statusText);
@@ -1,10 +1,29 @@
 // JavaScript para la página de detalle de paquetes
 const API_BASE_URL = window.location.protocol + '//' + window.location.host;
 let currentPackage = null;
+let packageSections = null; // galería, hoteles, info y features precargados desde /packages/{id}/full
 let allPackages = [];
 let config = { whatsapp_number: '5491134115485', recipient_email: 'travel@armansolutions.io' };
 let contactConfig = {};
 
+// Armar el atributo srcset con las variantes responsive de una imagen (mismo formato)
+function buildSrcset(variants, format = 'webp') {
+    if (!variants || variants.length === 0) return '';
+    return variants
+        .filter(variant => variant.format === format)
+        .map(variant => `${variant.url} ${variant.width}w`)
+        .join(', ');
+}
+
+// Elegir la variante más chica que cubra el ancho mostrado (para imágenes de fondo)
+function pickVariantUrl(url, variants, displayWidth) {
+    const webp = (variants || []).filter(variant => variant.format === 'webp').sort((a, b) => a.width - b.width);
+    if (webp.length === 0) return url;
+    const targetWidth = displayWidth * (window.devicePixelRatio || 1);
+    const match = webp.find(variant => variant.width >= targetWidth);
+    return (match || webp[webp.length - 1]).url;
+}
+
 // Función para formatear precios con puntos como separadores de miles y símbolo de moneda
 function formatPrice(priceString) {
     if (!priceString) return priceString;
@@ -154,6 +173,18 @@ function getPackageIdFromURL() {
     return packageId;
 }
 
+// Leer los datos del paquete embebidos por el renderizado en el servidor (si existen)
+function readEmbeddedPackageData() {
+    const dataElement = document.getElementById('packageData');
+    if (!dataElement) return null;
+    try {
+        return JSON.parse(dataElement.textContent);
+    } catch (error) {
+        console.error('No se pudieron leer los datos embebidos del paquete:', error);
+        return null;
+    }
+}
+
 // Cargar detalle del paquete
 async function loadPackageDetail() {
     const packageId = getPackageIdFromURL();
@@ -165,16 +196,26 @@ async function loadPackageDetail() {
         return;
     }
 
+    // Si el servidor ya renderizó la página, usar los datos embebidos sin volver a pedirlos
+    const embeddedData = readEmbeddedPackageData();
+    if (embeddedData && String(embeddedData.package.id) === String(packageId)) {
+        packageSections = embeddedData;
+        currentPackage = packageSections.package;
+        displayPackageDetail(currentPackage);
+        return;
+    }
+
     try {
         showLoading(true);
-        const apiUrl = `${API_BASE_URL}/packages/${packageId}`;
+        const apiUrl = `${API_BASE_URL}/packages/${packageId}/full`;
         console.log('Haciendo fetch a:', apiUrl);
         
         const response = await fetch(apiUrl);
         console.log('Respuesta del servidor:', response.status, response.statusText);
         
         if (response.ok) {
-            currentPackage = await response.json();
+            packageSections = await response.json();
+            currentPackage = packageSections.package;
             console.log('Datos del paquete cargados:', currentPackage);
             displayPackageDetail(currentPackage);
         } else if (response.status === 404) {
@@ -304,7 +345,9 @@ async function displayGallery(galleryImagesParam, mainImage, title) {
 
     // Intentar cargar galería real desde la base de datos
     let realGalleryImages = [];
-    if (currentPackage && currentPackage.id) {
+    if (packageSections) {
+        realGalleryImages = packageSections.gallery || [];
+    } else if (currentPackage && currentPackage.id) {
         try {
             const response = await fetch(`${API_BASE_URL}/packages/${currentPackage.id}/gallery`);
             if (response.ok) {
@@ -321,6 +364,7 @@ async function displayGallery(galleryImagesParam, mainImage, title) {
         // Usar imágenes reales de la galería
         images = realGalleryImages.map(img => ({
             url: img.image_url,
+            displayUrl: pickVariantUrl(img.image_url, img.variants, window.innerWidth),
             caption: img.caption || `${title} - Imagen`,
             isCover: img.is_cover
         }));
@@ -364,7 +408,7 @@ function createGalleryCarousel() {
     carouselTrack.innerHTML = galleryImages.map((image, index) => `
         <div class="gallery-carousel-slide ${index === 0 ? 'active' : ''}"
              onclick="openImageModal('${image.url}', '${image.caption}')"
-             style="background-image: url('${image.url}')">
+             style="background-image: url('${image.displayUrl || image.url}')">
         </div>
     `).join('');
     
@@ -870,6 +914,11 @@ function openImageModal(imageSrc, caption = '') {
 
 // Cargar información del paquete desde la API
 async function loadPackageInfo(packageId) {
+    if (packageSections) {
+        displayPackageInfo(packageSections.info);
+        return;
+    }
+
     try {
         const response = await fetch(`${API_BASE_URL}/packages/${packageId}/info`);
         if (response.ok) {
@@ -941,6 +990,11 @@ function displayDefaultPackageInfo() {
 
 // Cargar características del paquete desde la API
 async function loadPackageFeatures(packageId) {
+    if (packageSections) {
+        displayPackageFeatures(packageSections.features);
+        return;
+    }
+
     try {
         const response = await fetch(`${API_BASE_URL}/packages/${packageId}/features`);
         if (response.ok) {
@@ -988,9 +1042,9 @@ async function displayHotels(packageId) {
     const noHotelsMessage = hotelsContainer.querySelector('.no-hotels');
 
     try {
-        const response = await fetch(`${API_BASE_URL}/packages/${packageId}/hotels`);
-        if (response.ok) {
-            const destinations = await response.json();
+        const response = packageSections ? null : await fetch(`${API_BASE_URL}/packages/${packageId}/hotels`);
+        if (packageSections || response.ok) {
+            const destinations = packageSections ? packageSections.hotels : await response.json();
 
             if (Object.keys(destinations).length === 0) {
                 // No hay hoteles, mostrar mensaje y ocultar sección
@@ -1094,7 +1148,8 @@ function createDestinationHotelsHTML(destination, hotels) {
                 ${hotels.map(hotel => `
                     <div class="hotel-card" data-hotel-id="${hotel.id}" data-destination="${destination}" onclick="selectHotelCard('${hotel.id}', '${destination}', '${hotel.price}', event)">
                         <div class="hotel-image">
-                            <img src="${hotel.image_url}" alt="${hotel.name}"
+                            <img src="${hotel.image_url}" alt="${hotel.name}" loading="lazy"
+                                 ${hotel.variants && hotel.variants.length ? `srcset="${buildSrcset(hotel.variants)}" sizes="(max-width: 768px) 100vw, 400px"` : ''}
                                  onerror="this.src='data:image/svg+xml,<svg xmlns=%22http://www.w3.org/2000/svg%22 width=%22300%22 height=%22200%22><rect width=%22100%25%22 height=%22100%25%22 fill=%22%23f0f0f0%22/><text x=%2250%25%22 y=%2250%25%22 text-anchor=%22middle%22 fill=%22%23999%22 font-size=%2216%22>Hotel</text></svg>'">
                             <div class="hotel-price">${formatPrice(hotel.price)}/noche</div>
                         </div>
@@ -1,6 +1,8 @@
 // Variables globales
 let packages = [];
 let currentFilter = 'all';
+let packagesNextCursor = null;
+const PACKAGES_PAGE_SIZE = 12;
 let config = { whatsapp_number: '5491134115485', recipient_email: 'travel@armansolutions.io' };
 let contactConfig = {};
 
@@ -62,6 +64,7 @@ document.addEventListener('DOMContentLoaded', function() {
     loadContactConfig();
     loadPackages();
     initPackageFilters();
+    initLoadMorePackages();
     initHeroCarousel();
 
     // Manejar cambios de orientación en móviles
@@ -381,13 +384,25 @@ function formatPhoneNumber(phoneNumber) {
     return `+${phoneNumber}`;
 }
 
-// Cargar paquetes
-async function loadPackages() {
+// Cargar paquetes (filtrados y paginados en el servidor)
+async function loadPackages(append = false) {
     try {
-        const response = await fetch(`${API_BASE_URL}/packages`);
+        // Solo los campos que usan las tarjetas
+        const params = new URLSearchParams({ limit: PACKAGES_PAGE_SIZE, fields: 'card,description,features' });
+        if (currentFilter !== 'all') params.set('category', currentFilter);
+        if (append && packagesNextCursor) params.set('cursor', packagesNextCursor);
+
+        const response = await fetch(`${API_BASE_URL}/packages?${params}`);
         if (response.ok) {
-            packages = await response.json();
-            displayPackages(packages);
+            const page = await response.json();
+            packagesNextCursor = response.headers.get('X-Next-Cursor');
+            packages = append ? packages.concat(page) : page;
+            if (packages.length === 0) {
+                showEmptyPackages();
+            } else {
+                displayPackages(packages);
+            }
+            updateLoadMoreButton();
         } else {
             console.error('Error al cargar paquetes');
             showEmptyPackages();
@@ -398,6 +413,24 @@ async function loadPackages() {
     }
 }
 
+// Mostrar "Ver más paquetes" solo mientras el servidor indique que hay otra página
+function updateLoadMoreButton() {
+    const loadMoreBtn = document.getElementById('loadMorePackages');
+    if (loadMoreBtn) {
+        loadMoreBtn.style.display = packagesNextCursor ? 'inline-block' : 'none';
+        loadMoreBtn.disabled = false;
+    }
+}
+
+function initLoadMorePackages() {
+    const loadMoreBtn = document.getElementById('loadMorePackages');
+    if (!loadMoreBtn) return;
+    loadMoreBtn.addEventListener('click', () => {
+        loadMoreBtn.disabled = true;
+        loadPackages(true);
+    });
+}
+
 // Mostrar mensaje cuando no hay paquetes
 function showEmptyPackages() {
     const packagesGrid = document.getElementById('packagesGrid');
@@ -466,16 +499,11 @@ function initPackageFilters() {
     });
 }
 
-// Filtrar paquetes
+// Filtrar paquetes (se pide la primera página de la categoría al servidor)
 function filterPackages(filter) {
     currentFilter = filter;
-    
-    if (filter === 'all') {
-        displayPackages(packages);
-    } else {
-        const filteredPackages = packages.filter(pkg => pkg.category === filter);
-        displayPackages(filteredPackages);
-    }
+    packagesNextCursor = null;
+    loadPackages();
 }
 
 // Utilidades
@@ -555,7 +583,7 @@ async function initHeroCarousel() {
         }
 
         // Cargar paquetes promocionados
-        const response = await fetch(`${API_BASE_URL}/packages/promoted`);
+        const response = await fetch(`${API_BASE_URL}/packages/promoted?fields=card,description`);
         if (response.ok) {
             carouselPackages = await response.json();
         } else {